@@ -0,0 +1,381 @@
+"""
+Compact binary event log (alternative to events.jsonl).
+
+File  := MAGIC record*
+record := uvarint(len) payload           (length-prefixed, one event per record)
+value := tag byte + body:
+  NONE / FALSE / TRUE
+  INT      zigzag uvarint
+  FLOAT    8-byte little-endian double
+  STR      uvarint(len) utf-8            (not interned)
+  STR_DEF  uvarint(len) utf-8            (interned: gets the next string id)
+  STR_REF  uvarint(id)
+  LIST     uvarint(n) value*
+  DICT     uvarint(n) (key value)*       (keys are always interned strings)
+  DICT_DEF DICT body                     (interned: gets the next dict id)
+  DICT_REF uvarint(id)
+
+Interning tables live per file (= per rotated segment), so a file is
+self-contained and must be read from the start. Values are normalized the
+same way json.dumps(default=str) does, so converting back to JSONL gives the
+exact lines write_jsonl would have written.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from .compression import open_binary
+from .events import MAX_RECORD_BYTES, AppendFile
+from .hashing import _deep_copy, _identical
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one writer per file is up to the caller
+    fcntl = None  # type: ignore[assignment]
+
+MAGIC = b"CAEV\x01"
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _STR_DEF, _STR_REF = range(8)
+_LIST, _DICT, _DICT_DEF, _DICT_REF = range(8, 12)
+
+# String values under these keys repeat across events and are interned.
+INTERN_KEYS = frozenset(
+    {
+        "event_type",
+        "symbol",
+        "side",
+        "intent",
+        "strategy_tag",
+        "order_type",
+        "comment",
+        "run_id",
+        "app_version",
+        "config_fingerprint",
+        "params_fingerprint",
+        "params_key",
+    }
+)
+# Dict values under these keys are dictionary-encoded (written once per file).
+DICT_INTERN_KEYS = frozenset({"params"})
+
+_MAX_TABLE = 1 << 16  # stop interning new entries past this many per file
+_DOUBLE = struct.Struct("<d")
+
+
+def _uvarint(n: int, out: bytearray) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _json_key(k: Any) -> str:
+    # Mirror json.dumps handling of non-str dict keys.
+    if isinstance(k, str):
+        return k
+    if k is None or isinstance(k, (bool, int, float)):
+        return json.dumps(k)
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(k).__name__}")
+
+
+class BinaryEventWriter:
+    """
+    Appends events to a binary log. Opening an existing file replays it to
+    rebuild the interning tables, so appends after a restart stay valid.
+
+    The interning tables live in this object, so a file can only have one
+    writer at a time: another writer's STR_REF/DICT_REF ids would decode as
+    this one's. The writer holds an exclusive lock on the file (POSIX flock)
+    until close(); opening a file that another writer holds raises ValueError.
+    Processes sharing an audit folder need distinct writer_ids (see EventLog).
+    """
+
+    def __init__(self, path: str | Path, max_record_bytes: Optional[int] = MAX_RECORD_BYTES):
+        self.path = Path(path)
+        self.max_record_bytes = max_record_bytes
+        self._fh: Optional[AppendFile] = None
+        self._strings: dict[str, int] = {}
+        self._dicts: dict[bytes, int] = {}
+        # Last params object seen per key -> (id, snapshot, dict id): skips
+        # re-encoding when the bot passes the same, unchanged params dict again.
+        self._last_dict: dict[str, tuple[int, dict, int]] = {}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self._lock_fd: Optional[int] = os.open(self.path, flags, 0o644)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    raise ValueError(
+                        f"binary event log is in use by another writer: {self.path} "
+                        "(give each process its own writer_id)"
+                    ) from None
+            # Under the lock, so two writers starting together cannot both
+            # see an empty file and write MAGIC over each other's records.
+            if os.fstat(self._lock_fd).st_size == 0:
+                os.write(self._lock_fd, MAGIC)
+            else:
+                with self.path.open("rb") as f:
+                    reader = _Reader(f)
+                    for _ in reader:
+                        pass
+                self._strings = {s: i for i, s in enumerate(reader.strings)}
+                self._dicts = {raw: i for i, raw in enumerate(reader.dict_bodies)}
+        except BaseException:
+            self.close()
+            raise
+
+    def _str(self, s: str, out: bytearray, intern: bool) -> None:
+        i = self._strings.get(s)
+        if i is not None:
+            out.append(_STR_REF)
+            _uvarint(i, out)
+            return
+        b = s.encode("utf-8")
+        if intern and len(self._strings) < _MAX_TABLE:
+            self._strings[s] = len(self._strings)
+            out.append(_STR_DEF)
+        else:
+            out.append(_STR)
+        _uvarint(len(b), out)
+        out += b
+
+    def _dict_body(self, d: dict, out: bytearray) -> None:
+        _uvarint(len(d), out)
+        for k, v in d.items():
+            key = _json_key(k)
+            self._str(key, out, True)
+            self._value(v, out, key)
+
+    def _value(self, v: Any, out: bytearray, key: str | None = None) -> None:
+        t = type(v)
+        if v is None:
+            out.append(_NONE)
+        elif t is bool:
+            out.append(_TRUE if v else _FALSE)
+        elif t is int:
+            out.append(_INT)
+            _uvarint(v * 2 if v >= 0 else -v * 2 - 1, out)
+        elif t is float:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(v)
+        elif t is str:
+            self._str(v, out, key in INTERN_KEYS)
+        elif t is dict:
+            if key in DICT_INTERN_KEYS:
+                self._interned_dict(v, out, key)
+            else:
+                out.append(_DICT)
+                self._dict_body(v, out)
+        elif t is list or t is tuple:
+            out.append(_LIST)
+            _uvarint(len(v), out)
+            for x in v:
+                self._value(x, out)
+        elif isinstance(v, bool):
+            out.append(_TRUE if v else _FALSE)
+        elif isinstance(v, int):
+            self._value(int(v), out, key)
+        elif isinstance(v, float):
+            self._value(float(v), out, key)
+        elif isinstance(v, str):
+            # str-based enums: json writes the underlying value, not str(v)
+            self._value(str.__str__(v), out, key)
+        elif isinstance(v, dict):
+            self._value(dict(v), out, key)
+        elif isinstance(v, (list, tuple)):
+            self._value(list(v), out, key)
+        else:
+            # Same fallback as json.dumps(default=str)
+            self._str(str(v), out, False)
+
+    def _interned_dict(self, d: dict, out: bytearray, key: str) -> None:
+        last = self._last_dict.get(key)
+        if last is not None and last[0] == id(d) and _identical(last[1], d):
+            out.append(_DICT_REF)
+            _uvarint(last[2], out)
+            return
+
+        # Tables are append-only, so encoding the body first may define strings
+        # inside it; those definitions then live inside the DICT_DEF body.
+        body = bytearray()
+        self._dict_body(d, body)
+        raw = bytes(body)
+        i = self._dicts.get(raw)
+        if i is None:
+            if len(self._dicts) >= _MAX_TABLE:
+                out.append(_DICT)
+                out += raw
+                return
+            i = self._dicts[raw] = len(self._dicts)
+            out.append(_DICT_DEF)
+            out += raw
+        else:
+            out.append(_DICT_REF)
+            _uvarint(i, out)
+        self._last_dict[key] = (id(d), _deep_copy(d), i)
+
+    def encode(self, event: dict[str, Any]) -> bytes:
+        payload = bytearray()
+        self._value(event, payload)
+        rec = bytearray()
+        _uvarint(len(payload), rec)
+        rec += payload
+        return bytes(rec)
+
+    def write(self, event: dict[str, Any]) -> int:
+        """Append one event (single write call). Returns the number of bytes written."""
+        n_strings, n_dicts, last = len(self._strings), len(self._dicts), dict(self._last_dict)
+        rec = self.encode(event)
+        if self.max_record_bytes is not None and len(rec) > self.max_record_bytes:
+            # Rejected: forget what encode() interned, the record is never written.
+            self._strings = {k: i for k, i in self._strings.items() if i < n_strings}
+            self._dicts = {k: i for k, i in self._dicts.items() if i < n_dicts}
+            self._last_dict = last
+            raise ValueError(
+                f"event record too large: {len(rec)} bytes (limit {self.max_record_bytes})"
+            )
+        if self._fh is None:
+            self._fh = AppendFile(self.path, self.max_record_bytes)
+        return self._fh.write(rec)
+
+    def close(self) -> None:
+        """Close the file and release the writer lock."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+class _Reader:
+    """Sequential decoder; keeps the interning tables it rebuilt."""
+
+    def __init__(self, f: IO[bytes]):
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a binary event log (bad magic)")
+        self.f = f
+        self.strings: list[str] = []
+        self.dicts: list[dict] = []
+        self.dict_bodies: list[bytes] = []
+        self._buf = b""
+        self._pos = 0
+
+    def _byte(self) -> int:
+        b = self._buf[self._pos]
+        self._pos += 1
+        return b
+
+    def _uvarint(self) -> int:
+        n = shift = 0
+        while True:
+            b = self._byte()
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def _take(self, n: int) -> bytes:
+        b = self._buf[self._pos : self._pos + n]
+        self._pos += n
+        return b
+
+    def _dict_body(self) -> dict:
+        n = self._uvarint()
+        d = {}
+        for _ in range(n):
+            k = self._value()
+            d[k] = self._value()
+        return d
+
+    def _value(self) -> Any:
+        tag = self._byte()
+        if tag == _NONE:
+            return None
+        if tag == _FALSE:
+            return False
+        if tag == _TRUE:
+            return True
+        if tag == _INT:
+            z = self._uvarint()
+            return z >> 1 if not z & 1 else -((z + 1) >> 1)
+        if tag == _FLOAT:
+            return _DOUBLE.unpack(self._take(8))[0]
+        if tag in (_STR, _STR_DEF):
+            s = self._take(self._uvarint()).decode("utf-8")
+            if tag == _STR_DEF:
+                self.strings.append(s)
+            return s
+        if tag == _STR_REF:
+            return self.strings[self._uvarint()]
+        if tag == _LIST:
+            return [self._value() for _ in range(self._uvarint())]
+        if tag == _DICT:
+            return self._dict_body()
+        if tag == _DICT_DEF:
+            start = self._pos
+            d = self._dict_body()
+            self.dicts.append(d)
+            self.dict_bodies.append(self._buf[start : self._pos])
+            return _deep_copy(d)
+        if tag == _DICT_REF:
+            return _deep_copy(self.dicts[self._uvarint()])
+        raise ValueError(f"corrupt binary event log: unknown tag {tag}")
+
+    def _read_len(self) -> int | None:
+        n = shift = 0
+        while True:
+            c = self.f.read(1)
+            if not c:
+                if shift:
+                    raise ValueError("corrupt binary event log: truncated length")
+                return None
+            b = c[0]
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        while True:
+            n = self._read_len()
+            if n is None:
+                return
+            self._buf = self.f.read(n)
+            if len(self._buf) != n:
+                raise ValueError("corrupt binary event log: truncated record")
+            self._pos = 0
+            yield self._value()
+
+
+def is_binary_log(path: str | Path) -> bool:
+    with open_binary(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_binary_events(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Decode every event of a (possibly compressed) binary log, in order."""
+    with open_binary(path, "rb") as f:
+        yield from _Reader(f)
+
+
+def convert_to_jsonl(src: str | Path, dst: str | Path) -> int:
+    """
+    Lossless binary -> JSONL conversion (same lines write_jsonl produces).
+    Returns the number of events written.
+    """
+    n = 0
+    with open_binary(dst, "wb") as out:
+        for ev in read_binary_events(src):
+            out.write((json.dumps(ev, default=str) + "\n").encode("utf-8"))
+            n += 1
+    return n
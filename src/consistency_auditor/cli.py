@@ -1,13 +1,19 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 from typing import Iterable
 
 from . import __version__
-from .io_csv import read_trades_csv
-from .match import audit_trades
-from .report_csv import write_audit_csv
+from .compression import COMPRESSIONS
+
+# Subcommand modules are imported inside their _run_* function, so each command
+# (and --version) only pays for the code it uses. Same values as
+# io_csv.BAD_ROW_MODES and match.ID_KEYS, spelled out so building the parser
+# doesn't load the reader/matcher.
+BAD_ROW_MODES = ("fail", "skip", "quarantine")
+ID_KEYS = ("trade_id", "trade_id+symbol", "signal_id")
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -20,8 +26,8 @@ def build_parser() -> argparse.ArgumentParser:
     sub = p.add_subparsers(dest="cmd")
 
     pa = sub.add_parser("audit", help="Compare backtest vs live CSV trade lists")
-    pa.add_argument("--backtest", required=True, help="Path to backtest CSV")
-    pa.add_argument("--live", required=True, help="Path to live CSV")
+    pa.add_argument("--backtest", required=True, help="Path to backtest CSV (.gz/.zst/.bz2/.xz ok)")
+    pa.add_argument("--live", required=True, help="Path to live CSV (.gz/.zst/.bz2/.xz ok)")
     pa.add_argument("--tolerance", type=int, default=120, help="Match tolerance in seconds (default: 120)")
     pa.add_argument(
         "--price-tolerance",
@@ -29,14 +35,445 @@ def build_parser() -> argparse.ArgumentParser:
         default=None,
         help="Optional max abs open-price diff to allow a match",
     )
+    pa.add_argument(
+        "--max-volume-diff",
+        type=float,
+        default=None,
+        help="Optional max abs volume diff to allow a match (enables weighted matching)",
+    )
+    pa.add_argument(
+        "--close-tolerance",
+        type=float,
+        default=None,
+        help="Optional max close_time diff in seconds to allow a match (enables weighted matching)",
+    )
+    pa.add_argument(
+        "--weights",
+        default="",
+        help=(
+            "Distance weights, e.g. time=1,price=0.5,volume=1 "
+            "(each term is |diff| / its tolerance)"
+        ),
+    )
     pa.add_argument("--out", default="", help="Optional output folder to write matched/unmatched CSVs")
     pa.add_argument("--out-prefix", default="", help="Optional prefix for output CSV filenames (avoid overwrites)")
+    pa.add_argument(
+        "--compress",
+        choices=["none", *COMPRESSIONS],
+        default="none",
+        help="Compress output CSVs (default: none)",
+    )
     pa.add_argument(
         "--fail-on",
         choices=["none", "any", "missing", "extra"],
         default="none",
         help="Exit with code 3 if mismatches exist (any/missing/extra). Default: none",
     )
+    pa.add_argument(
+        "--on-bad-row",
+        choices=list(BAD_ROW_MODES),
+        default="fail",
+        help="Unparseable input rows: fail (default), skip, or quarantine to a CSV",
+    )
+    pa.add_argument(
+        "--max-bad-rows",
+        type=int,
+        default=None,
+        help="Per-file error budget for skip/quarantine; abort once exceeded",
+    )
+    pa.add_argument(
+        "--quarantine-dir",
+        default="",
+        help="Folder for quarantine_<source>.csv (default: --out, else next to the input)",
+    )
+    pa.add_argument(
+        "--reader",
+        choices=["csv", "mmap"],
+        default="csv",
+        help=(
+            "CSV ingestion path: csv (streaming DictReader) or mmap (chunked, parallel). "
+            "Default: csv"
+        ),
+    )
+    pa.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes for mmap parsing, time-partitioned matching and --group-by "
+            "(default: 1)"
+        ),
+    )
+    pa.add_argument(
+        "--partition-size",
+        type=int,
+        default=50_000,
+        help="Live trades per time partition when --workers > 1 (default: 50000)",
+    )
+    pa.add_argument(
+        "--id-key",
+        choices=list(ID_KEYS),
+        default="trade_id",
+        help="Field(s) linking trades in the exact-id pass (default: trade_id)",
+    )
+    pa.add_argument(
+        "--partial-fills",
+        action="store_true",
+        help=(
+            "Match several live fills to one backtest trade until its volume is covered "
+            "(VWAP price)"
+        ),
+    )
+    pa.add_argument(
+        "--volume-tolerance",
+        type=float,
+        default=1e-9,
+        help="Volume slack when summing partial fills (default: 1e-9)",
+    )
+    pa.add_argument(
+        "--auto-skew",
+        action="store_true",
+        help=(
+            "Estimate the live clock offset per group first, correct it, "
+            "then match with --tolerance"
+        ),
+    )
+    pa.add_argument(
+        "--skew-by",
+        choices=["global", "symbol", "day", "symbol_day"],
+        default="symbol",
+        help="Groups that get their own offset estimate (default: symbol)",
+    )
+    pa.add_argument(
+        "--skew-max-offset",
+        type=float,
+        default=3600.0,
+        help="Largest offset in seconds the estimator considers (default: 3600)",
+    )
+    pa.add_argument(
+        "--skew-bin",
+        type=float,
+        default=1.0,
+        help="Histogram bin width in seconds for the offset estimate (default: 1)",
+    )
+    pa.add_argument(
+        "--group-by",
+        default="",
+        help=(
+            "Comma list of day, hour, session, symbol: print per-bucket counts and slippage "
+            "(and write pivot_<prefix> with --out)"
+        ),
+    )
+    pa.add_argument(
+        "--pivot-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="File format of the --group-by pivot (parquet needs pyarrow). Default: csv",
+    )
+    pa.add_argument(
+        "--outliers",
+        action="store_true",
+        help=(
+            "Flag matches with anomalous slippage/time diff per symbol (rolling median/MAD); "
+            "writes outliers_<prefix>.csv with --out"
+        ),
+    )
+    pa.add_argument(
+        "--outlier-threshold",
+        type=float,
+        default=3.5,
+        help="Robust z-score above which a match is an outlier (default: 3.5)",
+    )
+    pa.add_argument(
+        "--outlier-window",
+        type=int,
+        default=2000,
+        help="Rolling window of matches per symbol for median/MAD (default: 2000)",
+    )
+    pa.add_argument(
+        "--external-sort",
+        action="store_true",
+        help=(
+            "Sort each input on disk within --sort-memory-mb and audit it as a sorted stream, "
+            "one (symbol, side) at a time"
+        ),
+    )
+    pa.add_argument(
+        "--sort-memory-mb",
+        type=float,
+        default=512,
+        help="Memory budget per input for --external-sort (default: 512)",
+    )
+    pa.add_argument(
+        "--sort-tmp-dir",
+        default="",
+        help="Folder for --external-sort run files (default: system temp)",
+    )
+    pa.add_argument("--store", default="", help="Append results to this SQLite result store")
+    pa.add_argument(
+        "--run-id", default="", help="Run id in the store (default: --out-prefix, else a timestamp)"
+    )
+    pa.add_argument("--account", default="", help="Account label in the store (default: empty)")
+    pa.add_argument(
+        "--symbol-map",
+        default="",
+        help="JSON symbol map (aliases, suffixes, regex patterns) applied while reading trades",
+    )
+
+    pf = sub.add_parser(
+        "audit-fanout",
+        help="Audit one backtest against several live accounts (shared index, parallel workers)",
+    )
+    pf.add_argument("--backtest", required=True, help="Path to backtest CSV (.gz/.zst/.bz2/.xz ok)")
+    pf.add_argument(
+        "--live",
+        action="append",
+        required=True,
+        help="Live CSV as ACCOUNT=PATH or PATH (account = file name stem); repeatable",
+    )
+    pf.add_argument(
+        "--tolerance", type=int, default=120, help="Match tolerance in seconds (default: 120)"
+    )
+    pf.add_argument(
+        "--price-tolerance",
+        type=float,
+        default=None,
+        help="Optional max abs open-price diff to allow a match",
+    )
+    pf.add_argument(
+        "--id-key",
+        choices=list(ID_KEYS),
+        default="trade_id",
+        help="Field(s) linking trades in the exact-id pass (default: trade_id)",
+    )
+    pf.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Worker processes, one account each at a time (default: 4)",
+    )
+    pf.add_argument(
+        "--out",
+        default="",
+        help=(
+            "Optional output folder: matched/unmatched CSVs per account "
+            "and divergence_<prefix>.csv"
+        ),
+    )
+    pf.add_argument(
+        "--out-prefix",
+        default="",
+        help="Optional prefix for output CSV filenames (avoid overwrites)",
+    )
+    pf.add_argument(
+        "--compress",
+        choices=["none", *COMPRESSIONS],
+        default="none",
+        help="Compress output CSVs (default: none)",
+    )
+    pf.add_argument(
+        "--fail-on",
+        choices=["none", "any", "missing", "extra"],
+        default="none",
+        help=(
+            "Exit with code 3 if mismatches exist in any account (any/missing/extra). "
+            "Default: none"
+        ),
+    )
+    pf.add_argument(
+        "--symbol-map",
+        default="",
+        help="JSON symbol map (aliases, suffixes, regex patterns) applied while reading trades",
+    )
+
+    pw = sub.add_parser(
+        "watch", help="Tail a live CSV or recorder events.jsonl and alert on mismatches"
+    )
+    pw.add_argument(
+        "--backtest", required=True, help="Path to backtest/replay CSV (preloaded and indexed)"
+    )
+    pw.add_argument(
+        "--live", required=True, help="Path to live trade CSV or recorder events.jsonl to follow"
+    )
+    pw.add_argument(
+        "--format",
+        choices=["auto", "csv", "events"],
+        default="auto",
+        help="Live file format (default: auto, .jsonl => events)",
+    )
+    pw.add_argument(
+        "--tolerance", type=int, default=120, help="Match tolerance in seconds (default: 120)"
+    )
+    pw.add_argument(
+        "--price-tolerance",
+        type=float,
+        default=None,
+        help="Optional max abs open-price diff to allow a match",
+    )
+    pw.add_argument(
+        "--lateness",
+        type=float,
+        default=None,
+        help=(
+            "Seconds live trades may arrive out of order or after their id-matched "
+            "backtest trade (default: --tolerance)"
+        ),
+    )
+    pw.add_argument(
+        "--sink",
+        default="stdout",
+        help=(
+            "Alert sink: stdout | jsonl:<path> | unix:<socket> | udp:<host>:<port> "
+            "(default: stdout)"
+        ),
+    )
+    pw.add_argument(
+        "--poll-interval",
+        type=float,
+        default=0.2,
+        help="File poll interval in seconds (default: 0.2)",
+    )
+    pw.add_argument(
+        "--no-follow", action="store_true", help="Process the current file contents and exit"
+    )
+    pw.add_argument(
+        "--wall-clock",
+        action="store_true",
+        help="Advance the missing-trade watermark with wall clock time, not only live trade times",
+    )
+    pw.add_argument("--show-matched", action="store_true", help="Also emit MATCHED alerts")
+    pw.add_argument(
+        "--symbol-map",
+        default="",
+        help="JSON symbol map (aliases, suffixes, regex patterns) applied while reading trades",
+    )
+    pw.add_argument(
+        "--on-bad-row",
+        choices=list(BAD_ROW_MODES),
+        default="fail",
+        help="Unparseable backtest rows: fail (default), skip, or quarantine to a CSV",
+    )
+    pw.add_argument(
+        "--max-bad-rows",
+        type=int,
+        default=None,
+        help="Error budget for skip/quarantine; abort once exceeded",
+    )
+    pw.add_argument(
+        "--quarantine-dir",
+        default="",
+        help="Folder for quarantine_backtest.csv (default: next to the backtest file)",
+    )
+
+    pr = sub.add_parser(
+        "replay", help="Re-run a strategy over recorded bar snapshots and compare decisions"
+    )
+    pr.add_argument(
+        "--audit-dir", required=True, help="Recorder audit folder (<root>/<run_id>/audit)"
+    )
+    pr.add_argument(
+        "--strategy",
+        required=True,
+        help="Vectorized strategy as module:function, called as f(frames, contexts, params)",
+    )
+    pr.add_argument(
+        "--params", default="", help="JSON file with params to replay with (default: logged params)"
+    )
+    pr.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    pr.add_argument(
+        "--batch-size", type=int, default=256, help="Decisions per strategy call (default: 256)"
+    )
+    pr.add_argument(
+        "--price-tolerance",
+        type=float,
+        default=1e-9,
+        help="Max abs suggested-price diff still counted as a match (default: 1e-9)",
+    )
+    pr.add_argument("--out", default="", help="Optional output folder for replay_<prefix>.csv")
+    pr.add_argument("--out-prefix", default="", help="Optional prefix for the output CSV filename")
+    pr.add_argument(
+        "--fail-on",
+        choices=["none", "any"],
+        default="none",
+        help="Exit with code 3 if any decision does not replay (default: none)",
+    )
+
+    pn = sub.add_parser(
+        "show-snapshot", help="Load, verify and print the bar snapshots of logged decisions"
+    )
+    pn.add_argument(
+        "--audit-dir", required=True, help="Recorder audit folder (<root>/<run_id>/audit)"
+    )
+    pn.add_argument(
+        "--signal-id",
+        action="append",
+        required=True,
+        help="Signal id of a DECISION event (repeatable, or a comma list)",
+    )
+    pn.add_argument("--columns", default="", help="Comma list of columns to load (default: all)")
+    pn.add_argument(
+        "--rows", type=int, default=5, help="Last rows to print per snapshot (default: 5, 0 = none)"
+    )
+    pn.add_argument(
+        "--bars-hasher",
+        default="",
+        help=(
+            "module:function that computed bars_hash from the bars DataFrame, to verify against "
+            "(default: the hash stored in the snapshot)"
+        ),
+    )
+    pn.add_argument("--workers", type=int, default=4, help="Reader threads (default: 4)")
+
+    pq = sub.add_parser(
+        "query", help="Trend queries over stored audit results (pre-aggregated rollups)"
+    )
+    pq.add_argument("--store", required=True, help="SQLite result store written by audit --store")
+    pq.add_argument(
+        "--metric",
+        default="price_diff",
+        help="price_diff | abs_price_diff | time_diff_s | matched | missing | extra | match_rate",
+    )
+    pq.add_argument(
+        "--stat", default="p95", help="mean | count | min | max | sum | pNN (default: p95)"
+    )
+    pq.add_argument(
+        "--by",
+        default="week",
+        help="Comma list of day, week, month, symbol, account (default: week)",
+    )
+    pq.add_argument("--symbol", default=None, help="Only this symbol")
+    pq.add_argument("--account", default=None, help="Only this account")
+    pq.add_argument("--since", default=None, help="First day (YYYY-MM-DD, inclusive)")
+    pq.add_argument("--until", default=None, help="Last day (YYYY-MM-DD, inclusive)")
+
+    ps = sub.add_parser(
+        "serve", help="Run a local audit server that keeps backtest sets indexed in memory"
+    )
+    ps.add_argument(
+        "--listen",
+        default="127.0.0.1:8765",
+        help="HOST:PORT or unix:PATH (default: 127.0.0.1:8765)",
+    )
+    ps.add_argument("--workers", type=int, default=4, help="Request worker threads (default: 4)")
+    ps.add_argument(
+        "--cache-mb",
+        type=int,
+        default=512,
+        help="Memory budget of cached backtest sets in MB (default: 512)",
+    )
+    ps.add_argument("--root", default="", help="Only serve files below this folder")
+    ps.add_argument(
+        "--preload",
+        action="append",
+        default=[],
+        help="Backtest CSV to index at startup (repeatable)",
+    )
+    ps.add_argument("--verbose", action="store_true", help="Log every request to stderr")
+    ps.add_argument(
+        "--symbol-map",
+        default="",
+        help="JSON symbol map (aliases, suffixes, regex patterns) applied while reading trades",
+    )
 
     return p
 
@@ -68,7 +505,9 @@ def _print_audit(res) -> None:
         mean_time = 0.0
         mean_abs_price = 0.0
 
-    print(f"matched={matched} missing_in_live={missing} extra_in_live={extra}")
+    under = sum(m.under_filled for m in res.matched)
+    under_s = f" under_filled={under}" if under else ""
+    print(f"matched={matched} missing_in_live={missing} extra_in_live={extra}{under_s}")
     print(f"mean_open_time_diff_s={mean_time:.2f} mean_abs_open_price_diff={mean_abs_price:.6f}")
 
     if matched:
@@ -78,21 +517,54 @@ def _print_audit(res) -> None:
             lv = _fmt_trade(m.live)
             print(f"  BT: {bt}")
             print(f"  LV: {lv}")
-            print(f"  dt_s={m.open_time_diff_s:.2f} price_diff={m.open_price_diff:+.6f}\n")
+            fills = f" fills={m.fill_count}" if m.fill_count > 1 else ""
+            if m.under_filled:
+                fills += f" under_filled volume={m.live.volume}/{m.backtest.volume}"
+            print(f"  dt_s={m.open_time_diff_s:.2f} price_diff={m.open_price_diff:+.6f}{fills}\n")
 
     _print_list("Missing in live", res.missing_in_live)
     _print_list("Extra in live", res.extra_in_live)
 
+    if res.id_conflicts:
+        print(f"\nID conflicts ({len(res.id_conflicts)}):")
+        for c in res.id_conflicts:
+            print(f"  id={c.key} {c.reason} backtest={len(c.backtest)} live={len(c.live)}")
+
+
+def _print_outliers(outliers: list) -> None:
+    print(f"\nOutliers ({len(outliers)}):")
+    if not outliers:
+        print("  -")
+    for o in outliers:
+        print(
+            f"  {_fmt_trade(o.match.backtest)} {o.metric}={o.value:+.6f} "
+            f"median={o.median:+.6f} mad={o.mad:.6f} score={o.score:+.1f}"
+        )
+
+
+def _print_pivot(rows: list, by: tuple) -> None:
+    from .pivot import PIVOT_COLUMNS, format_value
+
+    print(f"\nBy {','.join(by)} ({len(rows)}):")
+    columns = [*by, *PIVOT_COLUMNS]
+    print("  " + "\t".join(columns))
+    for row in rows:
+        print("  " + "\t".join(format_value(row[c]) or "-" for c in columns))
+
 
 def _should_fail(args, res) -> bool:
+    return _fails(args, len(res.missing_in_live), len(res.extra_in_live))
+
+
+def _fails(args, missing: int, extra: int) -> bool:
     if args.fail_on == "none":
         return False
     if args.fail_on == "any":
-        return bool(res.missing_in_live or res.extra_in_live)
+        return bool(missing or extra)
     if args.fail_on == "missing":
-        return bool(res.missing_in_live)
+        return bool(missing)
     if args.fail_on == "extra":
-        return bool(res.extra_in_live)
+        return bool(extra)
     return False
 
 
@@ -105,38 +577,597 @@ def main(argv: list[str] | None = None) -> int:
         return 0
 
     if args.cmd == "audit":
-        bt_path = Path(args.backtest)
-        lv_path = Path(args.live)
+        return _run_audit(args)
 
-        if not bt_path.exists():
-            print(f"ERROR: backtest file not found: {bt_path}")
-            return 2
-        if not lv_path.exists():
-            print(f"ERROR: live file not found: {lv_path}")
-            return 2
+    if args.cmd == "audit-fanout":
+        return _run_audit_fanout(args)
+
+    if args.cmd == "watch":
+        return _run_watch(args)
+
+    if args.cmd == "replay":
+        return _run_replay(args)
+
+    if args.cmd == "show-snapshot":
+        return _run_show_snapshot(args)
+
+    if args.cmd == "query":
+        return _run_query(args)
+
+    if args.cmd == "serve":
+        return _run_serve(args)
+
+    p.print_help()
+    return 0
+
+
+def _run_audit(args) -> int:
+    from .match import audit_trades, match_dims, parse_weights
+    from .report_csv import write_audit_csv, write_id_conflicts_csv
+
+    bt_path = Path(args.backtest)
+    lv_path = Path(args.live)
+
+    if not bt_path.exists():
+        print(f"ERROR: backtest file not found: {bt_path}")
+        return 2
+    if not lv_path.exists():
+        print(f"ERROR: live file not found: {lv_path}")
+        return 2
 
-        bt = read_trades_csv(bt_path, source="backtest")
-        lv = read_trades_csv(lv_path, source="live")
+    try:
+        weights = parse_weights(args.weights) if args.weights else None
+        dims = match_dims(args.price_tolerance, args.max_volume_diff, args.close_tolerance, weights)
+        if dims is not None and args.partial_fills:
+            raise ValueError(
+                "weighted matching (--weights, --max-volume-diff, --close-tolerance) "
+                "does not apply with --partial-fills"
+            )
+        group_by = None
+        if args.group_by:
+            from .pivot import parse_group_by
 
-        res = audit_trades(
+            group_by = parse_group_by(args.group_by)
+        if args.external_sort and (args.auto_skew or args.reader == "mmap"):
+            raise ValueError("--external-sort does not combine with --auto-skew or --reader mmap")
+        if args.external_sort and (group_by or args.outliers or args.store):
+            raise ValueError(
+                "--external-sort streams its results: --group-by, --outliers and --store "
+                "need them all in memory"
+            )
+        symbols = _symbol_mapper(args)
+        bt = _load_trades(args, bt_path, "backtest", symbols)
+        lv = _load_trades(args, lv_path, "live", symbols)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+    # The mmap reader's columns go straight to audit_columns; the other modes need Trades.
+    columnar = args.reader == "mmap" and not (
+        args.auto_skew or args.partial_fills or dims is not None
+    )
+    if args.reader == "mmap" and not columnar:
+        bt, lv = bt.to_trades(), lv.to_trades()
+
+    audit_kwargs = {
+        "time_tolerance_s": args.tolerance,
+        "price_tolerance": args.price_tolerance,
+        "workers": args.workers,
+        "partition_size": args.partition_size,
+        "partial_fills": args.partial_fills,
+        "volume_tolerance": args.volume_tolerance,
+        "id_key": args.id_key,
+        "max_volume_diff": args.max_volume_diff,
+        "close_tolerance_s": args.close_tolerance,
+        "weights": weights,
+    }
+    if args.auto_skew:
+        from .skew import audit_with_skew, estimate_skew
+
+        estimates = estimate_skew(
+            bt,
+            lv,
+            by=args.skew_by,
+            max_offset_s=args.skew_max_offset,
+            bin_s=args.skew_bin,
+        )
+        for est in estimates.values():
+            note = "" if est.applied else " (not applied: too little support)"
+            print(
+                f"skew {est.key}: live-backtest offset={est.offset_s:+.3f}s "
+                f"support={est.support}/{est.candidates}{note}"
+            )
+        res = audit_with_skew(bt, lv, estimates, by=args.skew_by, **audit_kwargs)
+    elif args.external_sort:
+        return _run_audit_sorted(args, bt, lv, audit_kwargs)
+    elif columnar:
+        from .match import audit_columns
+
+        res = audit_columns(
             bt,
             lv,
             time_tolerance_s=args.tolerance,
             price_tolerance=args.price_tolerance,
+            workers=args.workers,
+            partition_size=args.partition_size,
+            id_key=args.id_key,
+        )
+    else:
+        res = audit_trades(bt, lv, **audit_kwargs)
+
+    _print_audit(res)
+
+    pivot = None
+    if group_by:
+        from .pivot import pivot_audit
+
+        pivot = pivot_audit(res, group_by, workers=args.workers)
+        _print_pivot(pivot, group_by)
+
+    outliers = None
+    if args.outliers:
+        from .outliers import find_outliers
+
+        try:
+            outliers = find_outliers(
+                res.matched, threshold=args.outlier_threshold, window=args.outlier_window
+            )
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return 2
+        _print_outliers(outliers)
+
+    if args.out:
+        matched_path, unmatched_path = write_audit_csv(
+            res,
+            args.out,
+            prefix=args.out_prefix or None,
+            compression=None if args.compress == "none" else args.compress,
+            partial_fills=args.partial_fills,
         )
+        print(f"\nWrote: {matched_path}")
+        print(f"Wrote: {unmatched_path}")
+        if res.id_conflicts:
+            conflicts_path = write_id_conflicts_csv(
+                res,
+                args.out,
+                prefix=args.out_prefix or None,
+                compression=None if args.compress == "none" else args.compress,
+            )
+            print(f"Wrote: {conflicts_path}")
+        if outliers is not None:
+            from .report_csv import write_outliers_csv
 
-        _print_audit(res)
+            outliers_path = write_outliers_csv(
+                outliers,
+                args.out,
+                prefix=args.out_prefix or None,
+                compression=None if args.compress == "none" else args.compress,
+            )
+            print(f"Wrote: {outliers_path}")
+        if pivot is not None:
+            from .report_csv import write_pivot
 
+            try:
+                pivot_path = write_pivot(
+                    pivot,
+                    group_by,
+                    args.out,
+                    prefix=args.out_prefix or None,
+                    compression=None if args.compress == "none" else args.compress,
+                    fmt=args.pivot_format,
+                )
+            except ImportError as e:
+                print(f"ERROR: {e}")
+                return 2
+            print(f"Wrote: {pivot_path}")
+
+    if args.store:
+        from .report_csv import _default_prefix
+        from .store import ResultStore
+
+        run_id = args.run_id or args.out_prefix or _default_prefix()
+        try:
+            with ResultStore(args.store) as store:
+                store.add_run(run_id, res, account=args.account)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            return 2
+        print(f"Stored run {run_id} in {args.store}")
+
+    return 3 if _should_fail(args, res) else 0
+
+
+def _run_audit_sorted(args, bt, lv, audit_kwargs: dict) -> int:
+    """
+    --external-sort: audit the sorted streams one (symbol, side) at a time and
+    append each bucket's rows to the CSVs. Only counts (and id conflicts) are
+    kept, so memory stays bounded by the largest bucket.
+    """
+    from .match import AuditResult, audit_sorted
+    from .report_csv import AuditCsvWriter, write_id_conflicts_csv
+
+    compression = None if args.compress == "none" else args.compress
+    matched = missing = extra = under = 0
+    time_sum = price_sum = 0.0
+    conflicts: list = []
+    writer = None
+    try:
         if args.out:
-            matched_path, unmatched_path = write_audit_csv(res, args.out, prefix=args.out_prefix or None)
-            print(f"\nWrote: {matched_path}")
-            print(f"Wrote: {unmatched_path}")
+            writer = AuditCsvWriter(
+                args.out, args.out_prefix or None, compression, args.partial_fills
+            )
+        for _, res in audit_sorted(bt, lv, **audit_kwargs):
+            matched += len(res.matched)
+            missing += len(res.missing_in_live)
+            extra += len(res.extra_in_live)
+            for m in res.matched:
+                time_sum += m.open_time_diff_s
+                price_sum += abs(m.open_price_diff)
+                under += m.under_filled
+            conflicts.extend(res.id_conflicts)
+            if writer is not None:
+                writer.write(res)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+    finally:
+        if writer is not None:
+            writer.close()
+        bt.close()
+        lv.close()
+
+    under_s = f" under_filled={under}" if under else ""
+    print(f"matched={matched} missing_in_live={missing} extra_in_live={extra}{under_s}")
+    print(
+        f"mean_open_time_diff_s={time_sum / matched if matched else 0.0:.2f} "
+        f"mean_abs_open_price_diff={price_sum / matched if matched else 0.0:.6f}"
+    )
+    if conflicts:
+        print(f"\nID conflicts ({len(conflicts)}):")
+        for c in conflicts:
+            print(f"  id={c.key} {c.reason} backtest={len(c.backtest)} live={len(c.live)}")
 
-        return 3 if _should_fail(args, res) else 0
+    if writer is not None:
+        print(f"\nWrote: {writer.matched_path}")
+        print(f"Wrote: {writer.unmatched_path}")
+        if conflicts:
+            conflicts_path = write_id_conflicts_csv(
+                AuditResult([], [], [], conflicts),
+                args.out,
+                prefix=args.out_prefix or None,
+                compression=compression,
+            )
+            print(f"Wrote: {conflicts_path}")
 
-    p.print_help()
+    return 3 if _fails(args, missing, extra) else 0
+
+
+def _live_accounts(specs: list[str]) -> dict[str, Path]:
+    """--live values (ACCOUNT=PATH or PATH) -> {account: path}, in the given order."""
+    out: dict[str, Path] = {}
+    for spec in specs:
+        account, sep, path = spec.partition("=")
+        if not sep:
+            account, path = Path(spec).name.split(".")[0], spec
+        if not account or not path:
+            raise ValueError(f"invalid --live: {spec!r} (expected ACCOUNT=PATH or PATH)")
+        if account in out:
+            raise ValueError(f"duplicate account: {account!r} (name it with ACCOUNT=PATH)")
+        if not Path(path).exists():
+            raise ValueError(f"live file not found: {path}")
+        out[account] = Path(path)
+    return out
+
+
+def _run_audit_fanout(args) -> int:
+    from .fanout import audit_fanout, fanout_summary
+    from .io_csv import read_trades_csv
+    from .report_csv import _default_prefix, write_audit_csv, write_divergence_csv
+
+    bt_path = Path(args.backtest)
+    if not bt_path.exists():
+        print(f"ERROR: backtest file not found: {bt_path}")
+        return 2
+
+    try:
+        accounts = _live_accounts(args.live)
+        symbols = _symbol_mapper(args)
+        bt = read_trades_csv(bt_path, source="backtest", symbols=symbols)
+        fr = audit_fanout(
+            bt,
+            accounts,
+            time_tolerance_s=args.tolerance,
+            price_tolerance=args.price_tolerance,
+            id_key=args.id_key,
+            workers=args.workers,
+            symbols=symbols,
+        )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    for account, res in fr.results.items():
+        conflicts = f" id_conflicts={len(res.id_conflicts)}" if res.id_conflicts else ""
+        print(
+            f"{account}: matched={len(res.matched)} missing_in_live={len(res.missing_in_live)} "
+            f"extra_in_live={len(res.extra_in_live)}{conflicts}"
+        )
+    summary = fanout_summary(fr)
+    print(
+        f"\nDivergence: backtest_trades={summary['backtest_trades']} "
+        f"missing_in_all={summary['missing_in_all']} missing_in_some={summary['missing_in_some']} "
+        f"max_price_spread={summary['max_price_spread']:.6f} "
+        f"max_time_spread_s={summary['max_time_spread_s']:.2f}"
+    )
+
+    if args.out:
+        px = (args.out_prefix or "").strip() or _default_prefix()
+        compression = None if args.compress == "none" else args.compress
+        print()
+        for account, res in fr.results.items():
+            paths = write_audit_csv(
+                res, args.out, prefix=f"{px}_{account}", compression=compression
+            )
+            for path in paths:
+                print(f"Wrote: {path}")
+        print(f"Wrote: {write_divergence_csv(fr, args.out, prefix=px, compression=compression)}")
+
+    return 3 if any(_should_fail(args, res) for res in fr.results.values()) else 0
+
+
+def _symbol_mapper(args):
+    if not args.symbol_map:
+        return None
+    from .symbols import load_symbol_map
+
+    path = Path(args.symbol_map)
+    if not path.exists():
+        raise ValueError(f"symbol map file not found: {path}")
+    return load_symbol_map(path)
+
+
+def _load_trades(args, path: Path, source: str, symbols=None):
+    from .io_csv import BadRowPolicy, read_trades_csv
+
+    qdir = Path(args.quarantine_dir or args.out or path.parent)
+    suffix = f"_{args.out_prefix}" if args.out_prefix else ""
+    policy = BadRowPolicy(
+        args.on_bad_row,
+        max_bad_rows=args.max_bad_rows,
+        quarantine_path=qdir / f"quarantine_{source}{suffix}.csv",
+    )
+
+    if args.external_sort:
+        from .extsort import external_sort
+        from .io_csv import iter_trades_csv
+
+        trades = external_sort(
+            iter_trades_csv(path, source=source, bad_rows=policy, symbols=symbols),
+            memory_mb=args.sort_memory_mb,
+            tmp_dir=args.sort_tmp_dir or None,
+        )
+    elif args.reader == "mmap":
+        from .io_mmap import read_trades_columns
+
+        trades = read_trades_columns(
+            path, source=source, workers=args.workers, bad_rows=policy, symbols=symbols
+        )
+    else:
+        trades = read_trades_csv(path, source=source, bad_rows=policy, symbols=symbols)
+
+    if policy.count:
+        if policy.mode == "quarantine":
+            print(f"{source}: quarantined {policy.count} bad rows -> {policy.quarantine_path}")
+        else:
+            print(f"{source}: skipped {policy.count} bad rows")
+    return trades
+
+
+def _run_watch(args) -> int:
+    from .io_csv import BadRowPolicy, read_trades_csv
+    from .watch import (
+        CsvTradeParser,
+        EventTradeParser,
+        LineFollower,
+        StreamMatcher,
+        make_sink,
+        run_watch,
+    )
+
+    bt_path = Path(args.backtest)
+    if not bt_path.exists():
+        print(f"ERROR: backtest file not found: {bt_path}")
+        return 2
+
+    policy = BadRowPolicy(
+        args.on_bad_row,
+        max_bad_rows=args.max_bad_rows,
+        quarantine_path=Path(args.quarantine_dir or bt_path.parent) / "quarantine_backtest.csv",
+    )
+    try:
+        symbols = _symbol_mapper(args)
+        backtest = read_trades_csv(bt_path, source="backtest", bad_rows=policy, symbols=symbols)
+        sink = make_sink(args.sink)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+    if policy.count:
+        if policy.mode == "quarantine":
+            print(f"backtest: quarantined {policy.count} bad rows -> {policy.quarantine_path}")
+        else:
+            print(f"backtest: skipped {policy.count} bad rows")
+
+    lv_path = Path(args.live)
+    fmt = args.format
+    if fmt == "auto":
+        fmt = "events" if lv_path.suffix.lower() == ".jsonl" else "csv"
+    to_symbol = symbols or sys.intern
+    if fmt == "events":
+        parser = EventTradeParser(symbols=to_symbol)
+    else:
+        parser = CsvTradeParser(name=lv_path.name, symbols=to_symbol)
+
+    matcher = StreamMatcher(
+        backtest,
+        time_tolerance_s=args.tolerance,
+        price_tolerance=args.price_tolerance,
+        lateness_s=args.lateness,
+    )
+    if matcher.id_conflicts:
+        print(f"ID conflicts ({len(matcher.id_conflicts)}):")
+        for c in matcher.id_conflicts:
+            print(f"  id={c.key} {c.reason} backtest={len(c.backtest)} live={len(c.live)}")
+    counts = run_watch(
+        matcher,
+        LineFollower(lv_path),
+        parser,
+        sink,
+        follow=not args.no_follow,
+        poll_interval=args.poll_interval,
+        wall_clock=args.wall_clock,
+        emit_matched=args.show_matched,
+    )
+    print(
+        f"watch done: matched={counts['MATCHED']} "
+        f"missing_in_live={counts['MISSING']} extra_in_live={counts['EXTRA']}"
+        + (f" bad_lines={counts['BAD_LINES']}" if counts["BAD_LINES"] else "")
+    )
+    return 0
+
+
+def _run_replay(args) -> int:
+    import json
+
+    from .replay import load_strategy, replay_decisions
+    from .report_csv import write_replay_csv
+
+    audit_dir = Path(args.audit_dir)
+    if not audit_dir.is_dir():
+        print(f"ERROR: audit folder not found: {audit_dir}")
+        return 2
+
+    try:
+        strategy = load_strategy(args.strategy)
+        params = None
+        if args.params:
+            params = json.loads(Path(args.params).read_text("utf-8"))
+        res = replay_decisions(
+            audit_dir,
+            strategy,
+            params=params,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            price_tolerance=args.price_tolerance,
+        )
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    counts = res.counts()
+    print(
+        f"replayed={counts['MATCH'] + counts['MISMATCH']} match={counts['MATCH']} "
+        f"mismatch={counts['MISMATCH']} no_snapshot={counts['NO_SNAPSHOT']}"
+    )
+    for o in res.mismatches:
+        print(
+            f"  {o.signal_id} {o.symbol} {o.decision_time} {o.reason.value}: "
+            f"logged={o.logged_intent}@{o.logged_price} "
+            f"replayed={o.replayed_intent}@{o.replayed_price}"
+        )
+
+    if args.out:
+        path = write_replay_csv(res, args.out, prefix=args.out_prefix or None)
+        print(f"\nWrote: {path}")
+
+    return 3 if args.fail_on == "any" and res.mismatches else 0
+
+
+def _run_show_snapshot(args) -> int:
+    from .replay import load_callable
+    from .snapshot import HASH_MISMATCH, MISSING, load_snapshots
+
+    audit_dir = Path(args.audit_dir)
+    if not audit_dir.is_dir():
+        print(f"ERROR: audit folder not found: {audit_dir}")
+        return 2
+
+    signal_ids = [s.strip() for spec in args.signal_id for s in spec.split(",") if s.strip()]
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] or None
+    try:
+        hasher = load_callable(args.bars_hasher, "bars hasher") if args.bars_hasher else None
+        snapshots = load_snapshots(
+            audit_dir, signal_ids, columns=columns, workers=args.workers, hasher=hasher
+        )
+    except (ImportError, OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    for snap in snapshots:
+        if snap.frame is None:
+            where = "no snapshot logged" if snap.path is None else f"file not found: {snap.path}"
+            print(f"{snap.signal_id}: {snap.status} ({where})")
+            continue
+        print(f"{snap.signal_id}: {snap.status} rows={len(snap.frame)} file={snap.path}")
+        if snap.status == HASH_MISMATCH:
+            print(f"  bars_hash logged={snap.logged_hash} found={snap.found_hash}")
+        if args.rows > 0:
+            for line in snap.frame.tail(args.rows).to_string().splitlines():
+                print("  " + line)
+
+    return 3 if any(s.status in (HASH_MISMATCH, MISSING) for s in snapshots) else 0
+
+
+def _run_query(args) -> int:
+    from .store import COUNT_METRICS, ResultStore
+
+    if not Path(args.store).exists():
+        print(f"ERROR: store not found: {args.store}")
+        return 2
+
+    by = tuple(d.strip() for d in args.by.split(",") if d.strip())
+    try:
+        with ResultStore(args.store) as store:
+            rows = store.query(
+                metric=args.metric,
+                stat=args.stat,
+                by=by,
+                symbol=args.symbol,
+                account=args.account,
+                since=args.since,
+                until=args.until,
+            )
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 2
+
+    label = args.metric if args.metric in COUNT_METRICS else f"{args.metric}_{args.stat}"
+    print("\t".join([*by, "n", label]))
+    for row in rows:
+        value = row["value"]
+        if value is None:
+            shown = "-"
+        else:
+            shown = f"{value:.6f}" if isinstance(value, float) else str(value)
+        print("\t".join([*(str(row[d]) for d in by), str(row["n"]), shown]))
+    return 0
+
+
+def _run_serve(args) -> int:
+    from .server import AuditService, BacktestCache, serve
+
+    try:
+        symbols = _symbol_mapper(args)
+        cache = BacktestCache(max_bytes=args.cache_mb << 20, symbols=symbols)
+        service = AuditService(cache, root=args.root or None, symbols=symbols)
+        for path in args.preload:
+            info = service.preload({"backtest": path})
+            print(f"Preloaded {path} ({info['trades']} trades)")
+        serve(args.listen, service, workers=args.workers, verbose=args.verbose)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 2
     return 0
 
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import IO, Optional
+
+# Extension -> codec, and magic bytes -> codec (for files without a telling name).
+_EXTENSIONS = {
+    ".gz": "gz",
+    ".gzip": "gz",
+    ".zst": "zst",
+    ".zstd": "zst",
+    ".bz2": "bz2",
+    ".xz": "xz",
+}
+_MAGIC = (
+    (b"\x1f\x8b", "gz"),
+    (b"\x28\xb5\x2f\xfd", "zst"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+COMPRESSIONS = ("gz", "zst", "bz2", "xz")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required for .zst files. pip install zstandard") from None
+    return zstandard
+
+
+def detect_compression(path: str | Path) -> Optional[str]:
+    """
+    Codec for `path` ("gz", "zst", "bz2", "xz") or None for plain files.
+    The extension wins; otherwise the first bytes of an existing file are checked.
+    """
+    p = Path(path)
+    codec = _EXTENSIONS.get(p.suffix.lower())
+    if codec is not None:
+        return codec
+    try:
+        with p.open("rb") as f:
+            head = f.read(6)
+    except OSError:
+        return None
+    for magic, name in _MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def with_compression_suffix(path: str | Path, compression: Optional[str]) -> Path:
+    """`matched.csv` + "gz" -> `matched.csv.gz` (unchanged for None)."""
+    p = Path(path)
+    if not compression:
+        return p
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"unsupported compression: {compression!r} (expected one of {COMPRESSIONS})"
+        )
+    return p.with_name(f"{p.name}.{compression}")
+
+
+def open_binary(
+    path: str | Path, mode: str = "rb", compression: Optional[str] = "auto"
+) -> IO[bytes]:
+    """
+    Open `path` for streaming (de)compression. mode is "rb", "wb" or "ab".
+    compression="auto" detects from extension/magic bytes; None means plain.
+    """
+    p = Path(path)
+    if compression == "auto":
+        compression = detect_compression(p) if "r" in mode else _EXTENSIONS.get(p.suffix.lower())
+
+    if compression is None:
+        return p.open(mode)
+    # Codec modules are imported on first use (keeps CLI startup cheap).
+    if compression == "gz":
+        import gzip
+
+        return gzip.open(p, mode)
+    if compression == "bz2":
+        import bz2
+
+        return bz2.open(p, mode)
+    if compression == "xz":
+        import lzma
+
+        return lzma.open(p, mode)
+    if compression == "zst":
+        zstd = _zstd()
+        raw = p.open(mode)
+        if "r" in mode:
+            return zstd.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return zstd.ZstdCompressor().stream_writer(raw, closefd=True)
+    raise ValueError(f"unsupported compression: {compression!r} (expected one of {COMPRESSIONS})")
+
+
+def open_text(
+    path: str | Path,
+    mode: str = "r",
+    compression: Optional[str] = "auto",
+    encoding: str = "utf-8",
+    newline: Optional[str] = None,
+) -> IO[str]:
+    """Text-mode counterpart of open_binary (mode "r", "w" or "a")."""
+    raw = open_binary(path, mode.replace("t", "") + "b", compression)
+    return io.TextIOWrapper(raw, encoding=encoding, newline=newline)
@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import re
+import shutil
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Optional
+
+from .binlog import MAGIC, BinaryEventWriter, is_binary_log, read_binary_events
+from .compression import open_binary, open_text, with_compression_suffix
+from .events import MAX_RECORD_BYTES, AppendFile, encode_jsonl
+from .models import epoch_us
+
+MANIFEST_NAME = "manifest.json"
+ENCODINGS = ("jsonl", "binary")
+_EXT = {"jsonl": ".jsonl", "binary": ".bin"}
+_WRITER_ID = re.compile(r"[A-Za-z0-9_-]+")
+# Active file / manifest of a writer (its closed segments are in the manifest).
+_WRITER_FILE = re.compile(r"events\.([A-Za-z0-9_-]+)\.(?:jsonl|bin)$")
+_WRITER_MANIFEST = re.compile(r"manifest\.([A-Za-z0-9_-]+)\.json$")
+
+
+def event_time(event: dict[str, Any]) -> Optional[datetime]:
+    """Timestamp of a recorder event (DECISION events carry it in their context)."""
+    raw = event.get("timestamp")
+    if raw is None:
+        raw = (event.get("context") or {}).get("decision_time")
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class _SegmentState:
+    """Running summary of the active segment (becomes its manifest entry)."""
+
+    def __init__(self) -> None:
+        self.opened_at = time.time()
+        self.events = 0
+        self.bytes = 0
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.first_signal_id: Optional[str] = None
+        self.last_signal_id: Optional[str] = None
+
+    def add(self, n_bytes: int, ts: Optional[datetime], signal_id: Optional[str]) -> None:
+        self.events += 1
+        self.bytes += n_bytes
+        if ts is not None:
+            if self.start is None or ts < self.start:
+                self.start = ts
+            if self.end is None or ts > self.end:
+                self.end = ts
+        if signal_id:
+            if self.first_signal_id is None:
+                self.first_signal_id = signal_id
+            self.last_signal_id = signal_id
+
+
+def _manifest_name(writer_id: Optional[str]) -> str:
+    return MANIFEST_NAME if writer_id is None else f"manifest.{writer_id}.json"
+
+
+def read_manifest(audit_dir: str | Path, writer_id: Optional[str] = None) -> list[dict[str, Any]]:
+    """
+    Closed segments of an audit folder (of one writer), oldest first (empty if
+    never rotated).
+    """
+    p = Path(audit_dir) / _manifest_name(writer_id)
+    if not p.exists():
+        return []
+    return json.loads(p.read_text("utf-8"))["segments"]
+
+
+class EventLog:
+    """
+    Append-only event log with optional size/time based rotation.
+
+    The active segment is `<audit_dir>/events.jsonl` (or `events.bin` with
+    encoding="binary", see binlog). On rotation it is renamed to
+    `events-000001.jsonl` (next number), optionally compressed, and an entry with
+    its time range, first/last signal_id, event and byte counts is added to
+    `manifest.json`. Without rotation limits and with the default encoding the
+    file format is exactly what write_jsonl produces.
+
+    Records go out through a persistent O_APPEND descriptor, one write call per
+    event (see events.AppendFile), so several processes may append to the same
+    active file without interleaving. Rotation renames the shared file under
+    the other writers, though: processes that rotate should each pass their
+    own writer_id instead. That gives every writer its own files
+    (`events.<writer_id>.jsonl`, `events-000001.<writer_id>.jsonl`,
+    `manifest.<writer_id>.json`); iter_events merges them by event time.
+    Binary files cannot be shared at all (their interning tables are per
+    writer): with encoding="binary" every process needs its own writer_id, and
+    opening a binary log another writer holds raises ValueError.
+    """
+
+    def __init__(
+        self,
+        audit_dir: str | Path,
+        max_bytes: Optional[int] = None,
+        max_age_s: Optional[float] = None,
+        compress: Optional[str] = None,
+        encoding: str = "jsonl",
+        writer_id: Optional[str] = None,
+        max_record_bytes: Optional[int] = MAX_RECORD_BYTES,
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"invalid event encoding: {encoding!r} (expected one of {ENCODINGS})")
+        if writer_id is not None and not _WRITER_ID.fullmatch(writer_id):
+            raise ValueError(
+                f"invalid writer_id: {writer_id!r} (letters, digits, '_' and '-' only)"
+            )
+        self.dir = Path(audit_dir)
+        self.encoding = encoding
+        self.ext = _EXT[encoding]
+        self._empty_size = len(MAGIC) if encoding == "binary" else 0
+        self.writer_id = writer_id
+        self._stem = "events" if writer_id is None else f"events.{writer_id}"
+        self.path = self.dir / f"{self._stem}{self.ext}"
+        self.max_record_bytes = max_record_bytes
+        self._fh: Optional[AppendFile] = None
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.compress = compress
+        self._writer: Optional[BinaryEventWriter] = None
+        self._state = _SegmentState()
+        self.generation = 0  # bumped on every rotation
+        if self.rotating and self.path.exists():
+            self._recover()
+        if encoding == "binary":
+            # Take the file now, so a second writer fails here, not on append.
+            self._writer = BinaryEventWriter(self.path, self.max_record_bytes)
+
+    @property
+    def rotating(self) -> bool:
+        return self.max_bytes is not None or self.max_age_s is not None
+
+    def _recover(self) -> None:
+        # Restarted process: rebuild the summary of the segment we are appending to.
+        for ev in _read_segment(self.path):
+            self._state.add(0, event_time(ev), ev.get("signal_id"))
+        self._state.bytes = self.path.stat().st_size
+
+    def append(
+        self,
+        event: dict[str, Any],
+        ts: Optional[datetime] = None,
+        signal_id: Optional[str] = None,
+        rotate: bool = True,
+    ) -> None:
+        """rotate=False keeps this event in the current segment (see maybe_rotate)."""
+        if rotate:
+            self.maybe_rotate()
+
+        if self.encoding == "binary":
+            if self._writer is None:
+                self._writer = BinaryEventWriter(self.path, self.max_record_bytes)
+            n = self._writer.write(event)
+        else:
+            if self._fh is None:
+                self._fh = AppendFile(self.path, self.max_record_bytes)
+            n = self._fh.write(encode_jsonl(event))
+        self._state.add(n, ts, signal_id)
+
+    def close(self) -> None:
+        """Close the open descriptor (appending again reopens it)."""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def maybe_rotate(self) -> None:
+        """Rotate if the active segment reached its size/age limit."""
+        if self.rotating and self._state.events:
+            too_old = (
+                self.max_age_s is not None
+                and time.time() - self._state.opened_at >= self.max_age_s
+            )
+            too_big = self.max_bytes is not None and self._state.bytes >= self.max_bytes
+            if too_old or too_big:
+                self.rotate()
+
+    def rotate(self) -> Optional[Path]:
+        """Close the active segment now. Returns the segment path (None if empty)."""
+        if not self.path.exists() or self.path.stat().st_size <= self._empty_size:
+            return None
+
+        segments = read_manifest(self.dir, self.writer_id)
+        seq = segments[-1]["seq"] + 1 if segments else 1
+        self.close()  # binary interning tables are per segment, too
+        tag = "" if self.writer_id is None else f".{self.writer_id}"
+        target = self.dir / f"events-{seq:06d}{tag}{self.ext}"
+        os.replace(self.path, target)
+
+        if self.compress:
+            packed = with_compression_suffix(target, self.compress)
+            with target.open("rb") as src, open_binary(packed, "wb", self.compress) as dst:
+                shutil.copyfileobj(src, dst)
+            target.unlink()
+            target = packed
+
+        st = self._state
+        segments.append(
+            {
+                "seq": seq,
+                "file": target.name,
+                "start": st.start.isoformat() if st.start else None,
+                "end": st.end.isoformat() if st.end else None,
+                "first_signal_id": st.first_signal_id,
+                "last_signal_id": st.last_signal_id,
+                "events": st.events,
+                "bytes": st.bytes,
+            }
+        )
+        name = _manifest_name(self.writer_id)
+        tmp = self.dir / (name + ".tmp")
+        tmp.write_text(json.dumps({"segments": segments}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.dir / name)
+
+        self._state = _SegmentState()
+        self.generation += 1
+        return target
+
+
+def _read_segment(path: Path) -> Iterator[dict[str, Any]]:
+    if is_binary_log(path):
+        yield from read_binary_events(path)
+        return
+    with open_text(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _inline_params(ev: dict[str, Any], params: dict[str, Any]) -> None:
+    etype = ev.get("event_type")
+    # Logs written before params_key referenced params by params_fingerprint.
+    if etype == "PARAMS":
+        params[ev.get("params_key") or ev["params_fingerprint"]] = ev.get("params")
+    elif etype == "DECISION":
+        ctx = ev.get("context")
+        if ctx and "params" not in ctx:
+            ref = ctx.get("params_key") or ctx.get("params_fingerprint")
+            if ref in params:
+                ctx["params"] = params[ref]
+
+
+def writer_ids(audit_dir: str | Path) -> list[Optional[str]]:
+    """Writers with files in an audit folder; None is the default (shared) log."""
+    d = Path(audit_dir)
+    ids: set[Optional[str]] = set()
+    if not d.is_dir():
+        return []
+    for p in d.iterdir():
+        if p.name == MANIFEST_NAME or p.name in {f"events{ext}" for ext in _EXT.values()}:
+            ids.add(None)
+            continue
+        m = _WRITER_FILE.match(p.name) or _WRITER_MANIFEST.match(p.name)
+        if m:
+            ids.add(m.group(1))
+    return sorted(ids, key=lambda w: (w is not None, w or ""))
+
+
+def _iter_writer(
+    d: Path,
+    writer_id: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Iterator[dict[str, Any]]:
+    paths: list[Path] = []
+    for seg in read_manifest(d, writer_id):
+        if start is not None and seg["end"] and datetime.fromisoformat(seg["end"]) < start:
+            continue
+        if end is not None and seg["start"] and datetime.fromisoformat(seg["start"]) > end:
+            continue
+        paths.append(d / seg["file"])
+    stem = "events" if writer_id is None else f"events.{writer_id}"
+    for ext in _EXT.values():
+        active = d / f"{stem}{ext}"
+        if active.exists():
+            paths.append(active)
+
+    params: dict[str, Any] = {}
+    for p in paths:
+        for ev in _read_segment(p):
+            _inline_params(ev, params)
+            if start is not None or end is not None:
+                ts = event_time(ev)
+                if ts is not None and (
+                    (start is not None and ts < start) or (end is not None and ts > end)
+                ):
+                    continue
+            yield ev
+
+
+def _time_keyed(events: Iterator[dict[str, Any]]) -> Iterator[tuple[int, dict[str, Any]]]:
+    # Events without a timestamp keep the position of the previous event.
+    last = -(1 << 62)
+    for ev in events:
+        ts = event_time(ev)
+        if ts is not None:
+            last = epoch_us(ts)
+        yield last, ev
+
+
+def iter_events(
+    audit_dir: str | Path,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield events from all segments plus the active file, oldest segment first.
+    With start/end, whole segments outside the window are skipped via the
+    manifest and remaining events are filtered by their own timestamp.
+    DECISION events that reference interned params (params_key) get
+    their params dict filled back in from the segment's PARAMS events.
+    With several writers (writer_id), each writer's stream is read this way and
+    the streams are k-way merged by event time (ties: default log first, then
+    writer_id order).
+    """
+    d = Path(audit_dir)
+    ids = writer_ids(d)
+    if len(ids) <= 1:
+        yield from _iter_writer(d, ids[0] if ids else None, start, end)
+        return
+    streams = [_time_keyed(_iter_writer(d, w, start, end)) for w in ids]
+    for _, ev in heapq.merge(*streams, key=itemgetter(0)):
+        yield ev
+
+
+def decision_counts(events: Iterable[dict[str, Any]]) -> dict[tuple[str, str], int]:
+    """
+    Estimated number of decisions per (symbol, intent), whatever the recorder's
+    none_policy was: sampled DECISION events count sample_weight times and
+    DECISION_SUMMARY events add their count.
+    """
+    counts: dict[tuple[str, str], int] = {}
+    for ev in events:
+        etype = ev.get("event_type")
+        if etype == "DECISION":
+            key = ((ev.get("context") or {}).get("symbol"), ev.get("intent"))
+            n = ev.get("sample_weight", 1)
+        elif etype == "DECISION_SUMMARY":
+            key = (ev.get("symbol"), ev.get("intent"))
+            n = ev["count"]
+        else:
+            continue
+        counts[key] = counts.get(key, 0) + n
+    return counts
@@ -1,9 +1,10 @@
 ﻿from __future__ import annotations
 
 import json
+import os
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
 
 class MismatchReason(str, Enum):
@@ -19,15 +20,65 @@ class MismatchReason(str, Enum):
     UNKNOWN = "UNKNOWN"
 
 
-def write_jsonl(path: str | Path, event: dict[str, Any]) -> None:
+MAX_RECORD_BYTES = 1 << 20  # 1 MiB per event line
+
+
+def encode_jsonl(event: dict[str, Any]) -> bytes:
+    """One JSONL line as utf-8 bytes (json.dumps(default=str) handles datetimes/decimals)."""
+    return (json.dumps(event, default=str) + "\n").encode("utf-8")
+
+
+class AppendFile:
+    """
+    Append-only file kept open as an O_APPEND descriptor.
+
+    Every record goes out in a single write(2) call, so whole records from
+    several processes appending to the same file never interleave (on local
+    filesystems; not on NFS), and there is no open/close per event. Records
+    larger than max_record_bytes (None: no limit) are rejected instead of
+    being written.
+    """
+
+    def __init__(self, path: str | Path, max_record_bytes: Optional[int] = MAX_RECORD_BYTES):
+        self.path = Path(path)
+        self.max_record_bytes = max_record_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self.fd: Optional[int] = os.open(self.path, flags, 0o644)
+
+    def write(self, data: bytes) -> int:
+        if self.fd is None:
+            raise ValueError(f"write to closed file: {self.path}")
+        if self.max_record_bytes is not None and len(data) > self.max_record_bytes:
+            raise ValueError(
+                f"event record too large: {len(data)} bytes (limit {self.max_record_bytes})"
+            )
+        n = os.write(self.fd, data)
+        if n < len(data):
+            # Only on disk full / signals: finish the record (it may interleave now).
+            view = memoryview(data)
+            while n < len(data):
+                n += os.write(self.fd, view[n:])
+        return n
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self) -> AppendFile:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def write_jsonl(path: str | Path, event: dict[str, Any]) -> int:
     """
     Append a single event to a JSONL file (Steps 7 & 11).
+    Returns the number of bytes written.
     """
-    p = Path(path)
-    # Ensure the directory exists (prevents FileNotFoundError)
-    p.parent.mkdir(parents=True, exist_ok=True)
-
-    # Atomic append (text mode, utf-8)
-    # json.dumps(default=str) handles datetimes/decimals safely
-    with p.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(event, default=str) + "\n")
+    # Single O_APPEND write per line (see AppendFile); creates the directory.
+    # For many events keep an AppendFile open instead of calling this per event.
+    with AppendFile(path, max_record_bytes=None) as f:
+        return f.write(encode_jsonl(event))
@@ -0,0 +1,300 @@
+"""
+External merge sort of trades by (symbol, side, open_time), in bounded memory.
+
+Trades are buffered up to a memory budget; a full buffer is sorted and spilled
+to a temporary run file; the runs are then k-way merged (heapq.merge). Ties
+keep input order, so the result equals a stable in-memory sort.
+
+Run file := record*
+record   := HEADER symbol_def? source_def? trade_id? signal_id?
+HEADER   := seq open_us close_us open_off close_off open_price close_price
+            volume sl tp side flags symbol_ref source_ref len*4   (struct _HDR)
+
+Times are epoch microseconds plus the UTC offset in seconds (so the original
+tz-aware datetimes come back). flags marks which optional fields are set.
+symbol and source are interned per run file: a ref equal to the table size
+defines the next entry (its UTF-8 follows), _INLINE means not interned.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import weakref
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+from .models import Side, Trade, epoch_us
+
+# Rough footprint of one buffered Trade and its sort key (object, datetimes,
+# floats, key tuple); sets how many trades fit in the memory budget.
+TRADE_BYTES = 512
+
+_HDR = struct.Struct("<qqqiidddddBBHHHHHH")
+_INLINE = 0xFFFF
+_F_CLOSE_TIME, _F_CLOSE_PRICE, _F_VOLUME, _F_SL, _F_TP, _F_TRADE_ID, _F_SIGNAL_ID = (
+    1 << i for i in range(7)
+)
+_SIDES = (Side.BUY, Side.SELL)
+_SIDE_VALUES = tuple(s.value for s in _SIDES)
+_SIDE_CODE = {Side.BUY: 0, Side.SELL: 1}
+_EPOCH = datetime(1970, 1, 1)
+_BUF = 1 << 16
+
+# (symbol, side, open_time epoch us, input sequence number)
+SortKey = tuple[str, str, int, int]
+
+
+def _offset_s(dt: datetime) -> int:
+    return int(dt.utcoffset() // timedelta(seconds=1))
+
+
+class _RunWriter:
+    def __init__(self, path: Path):
+        self.f: BinaryIO = open(path, "wb", buffering=_BUF)
+        self.strings: dict[str, int] = {}
+
+    def _ref(self, s: str) -> tuple[int, bytes]:
+        ref = self.strings.get(s)
+        if ref is not None:
+            return ref, b""
+        if len(self.strings) >= _INLINE:
+            return _INLINE, s.encode("utf-8")
+        ref = self.strings[s] = len(self.strings)
+        return ref, s.encode("utf-8")
+
+    def write(self, key: SortKey, t: Trade) -> None:
+        flags = 0
+        close_us = close_off = 0
+        if t.close_time is not None:
+            flags |= _F_CLOSE_TIME
+            close_us, close_off = epoch_us(t.close_time), _offset_s(t.close_time)
+        floats = []
+        for bit, v in (
+            (_F_CLOSE_PRICE, t.close_price),
+            (_F_VOLUME, t.volume),
+            (_F_SL, t.sl),
+            (_F_TP, t.tp),
+        ):
+            if v is not None:
+                flags |= bit
+            floats.append(0.0 if v is None else v)
+        tid = sig = b""
+        if t.trade_id is not None:
+            flags |= _F_TRADE_ID
+            tid = t.trade_id.encode("utf-8")
+        if t.signal_id is not None:
+            flags |= _F_SIGNAL_ID
+            sig = t.signal_id.encode("utf-8")
+        sym_ref, sym = self._ref(t.symbol)
+        src_ref, src = self._ref(t.source)
+        self.f.write(
+            _HDR.pack(
+                key[3],
+                key[2],
+                close_us,
+                _offset_s(t.open_time),
+                close_off,
+                t.open_price,
+                *floats,
+                _SIDE_CODE[t.side],
+                flags,
+                sym_ref,
+                src_ref,
+                len(sym),
+                len(src),
+                len(tid),
+                len(sig),
+            )
+        )
+        self.f.write(sym + src + tid + sig)
+
+    def close(self) -> None:
+        self.f.close()
+
+
+def _local(us: int, off: int, tz: Callable[[int], timezone]) -> datetime:
+    # Wall-clock time at UTC offset `off` (seconds), tagged with that offset.
+    return (_EPOCH + timedelta(microseconds=us + off * 1_000_000)).replace(tzinfo=tz(off))
+
+
+def _read_run(path: Path) -> Iterator[tuple[SortKey, Trade]]:
+    strings: list[str] = []
+    zones: dict[int, timezone] = {}
+
+    def tz(off: int) -> timezone:
+        z = zones.get(off)
+        if z is None:
+            z = zones[off] = timezone(timedelta(seconds=off))
+        return z
+
+    def string(ref: int, raw: bytes) -> str:
+        if ref == _INLINE:
+            return raw.decode("utf-8")
+        if ref == len(strings):
+            # Interned: every run file then hands out the same symbol/source objects.
+            strings.append(sys.intern(raw.decode("utf-8")))
+        return strings[ref]
+
+    size = _HDR.size
+    with open(path, "rb", buffering=_BUF) as f:
+        while True:
+            head = f.read(size)
+            if not head:
+                return
+            (
+                seq, open_us, close_us, open_off, close_off, open_price, close_price, volume,
+                sl, tp, side, flags, sym_ref, src_ref, n_sym, n_src, n_tid, n_sig,
+            ) = _HDR.unpack(head)
+            raw = f.read(n_sym + n_src + n_tid + n_sig)
+            symbol = string(sym_ref, raw[:n_sym])
+            source = string(src_ref, raw[n_sym : n_sym + n_src])
+            a = n_sym + n_src
+            close_time = _local(close_us, close_off, tz) if flags & _F_CLOSE_TIME else None
+            t = Trade(
+                source,
+                symbol,
+                _SIDES[side],
+                _local(open_us, open_off, tz),
+                open_price,
+                close_time=close_time,
+                close_price=close_price if flags & _F_CLOSE_PRICE else None,
+                volume=volume if flags & _F_VOLUME else None,
+                sl=sl if flags & _F_SL else None,
+                tp=tp if flags & _F_TP else None,
+                trade_id=raw[a : a + n_tid].decode("utf-8") if flags & _F_TRADE_ID else None,
+                signal_id=raw[a + n_tid :].decode("utf-8") if flags & _F_SIGNAL_ID else None,
+            )
+            yield (symbol, _SIDE_VALUES[side], open_us, seq), t
+
+
+class SortedTrades:
+    """
+    Result of external_sort: iterable (any number of times) over the trades in
+    (symbol, side, open_time) order. Holds either the one in-memory run or the
+    spilled run files, which close() (or garbage collection) deletes.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        memory: Optional[list[tuple[SortKey, Trade]]] = None,
+        runs: Optional[list[Path]] = None,
+        tmp: Optional[Path] = None,
+    ):
+        self.count = count
+        self._memory = memory
+        self.runs = runs or []
+        self.tmp = tmp
+        self._cleanup = None if tmp is None else weakref.finalize(self, shutil.rmtree, tmp, True)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def keyed(self) -> Iterator[tuple[SortKey, Trade]]:
+        """(sort key, trade) pairs in order."""
+        if self._memory is not None:
+            return iter(self._memory)
+        return heapq.merge(*(_read_run(p) for p in self.runs), key=itemgetter(0))
+
+    def __iter__(self) -> Iterator[Trade]:
+        for _, t in self.keyed():
+            yield t
+
+    def close(self) -> None:
+        self._memory = None
+        self.runs = []
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def __enter__(self) -> SortedTrades:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def external_sort(
+    trades: Iterable[Trade],
+    memory_mb: float = 512,
+    tmp_dir: str | Path | None = None,
+    fan_in: int = 64,
+    run_size: Optional[int] = None,
+) -> SortedTrades:
+    """
+    Sort trades by (symbol, side, open_time) holding about memory_mb of them
+    at a time (run_size trades per run if given, else memory_mb / TRADE_BYTES).
+
+    The input is consumed here. If it fits in one run, nothing touches disk;
+    otherwise sorted runs are spilled to a temporary folder under tmp_dir
+    (default: the system temp dir) and, while there are more than fan_in of
+    them, merged fan_in at a time into longer runs, so the final merge keeps at
+    most fan_in files open.
+    """
+    if fan_in < 2:
+        raise ValueError("fan_in must be >= 2")
+    limit = run_size if run_size is not None else int(memory_mb * (1 << 20)) // TRADE_BYTES
+    if limit < 1:
+        raise ValueError("sort memory budget is too small for one trade")
+
+    buf: list[tuple[SortKey, Trade]] = []
+    runs: list[Path] = []
+    tmp: Optional[Path] = None
+    seq = 0
+    try:
+        for t in trades:
+            buf.append(((t.symbol, t.side.value, epoch_us(t.open_time), seq), t))
+            seq += 1
+            if len(buf) >= limit:
+                if tmp is None:
+                    tmp = Path(tempfile.mkdtemp(prefix="ca-sort-", dir=tmp_dir))
+                buf.sort(key=itemgetter(0))
+                runs.append(_spill(buf, tmp / f"run-{len(runs):06d}.bin"))
+                buf = []
+        if tmp is None:
+            buf.sort(key=itemgetter(0))
+            return SortedTrades(seq, memory=buf)
+        if buf:
+            buf.sort(key=itemgetter(0))
+            runs.append(_spill(buf, tmp / f"run-{len(runs):06d}.bin"))
+            buf = []
+
+        n_runs = len(runs)
+        while len(runs) > fan_in:
+            merged = []
+            for i in range(0, len(runs), fan_in):
+                group = runs[i : i + fan_in]
+                if len(group) == 1:
+                    merged.append(group[0])
+                    continue
+                out = _spill(
+                    heapq.merge(*(_read_run(p) for p in group), key=itemgetter(0)),
+                    tmp / f"run-{n_runs:06d}.bin",
+                )
+                n_runs += 1
+                for p in group:
+                    os.remove(p)
+                merged.append(out)
+            runs = merged
+    except BaseException:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return SortedTrades(seq, runs=runs, tmp=tmp)
+
+
+def _spill(items: Iterable[tuple[SortKey, Trade]], path: Path) -> Path:
+    w = _RunWriter(path)
+    try:
+        for key, t in items:
+            w.write(key, t)
+    finally:
+        w.close()
+    return path
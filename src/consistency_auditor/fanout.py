@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from collections.abc import Hashable, Mapping
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Optional
+from zlib import crc32
+
+from .io_csv import read_trades_csv
+from .match import (
+    AuditResult,
+    BacktestIndex,
+    IdConflict,
+    TradeMatch,
+    _fmt_key,
+    _id_index,
+    _id_match,
+    _prices,
+    _times,
+    greedy_match,
+    id_key_func,
+)
+from .models import Trade, epoch_us
+
+
+@dataclass(frozen=True)
+class Divergence:
+    """
+    One backtest trade across all accounts of a fan-out audit. The spreads are
+    max - min of the live open price / time over the accounts that matched it
+    (0 with fewer than two).
+    """
+    backtest: Trade
+    matched: int
+    missing_accounts: tuple[str, ...]
+    price_spread: float
+    time_spread_s: float
+
+
+@dataclass(frozen=True)
+class FanoutResult:
+    results: dict[str, AuditResult]  # per account, in input order
+    divergence: list[Divergence]  # per backtest trade, in backtest input order
+
+
+def _key_bytes(key: Hashable) -> bytes:
+    return "\x1f".join(key).encode() if isinstance(key, tuple) else str(key).encode()
+
+
+@dataclass(frozen=True)
+class _Spec:
+    """What a worker needs to attach: shared block name and the layout inside it."""
+    shm_name: str
+    layout: dict[str, tuple[str, int, int]]  # column -> (typecode, byte offset, length)
+    buckets: list[tuple[str, str]]  # (symbol, side) per bucket, in position order
+    starts: list[int]  # first position of every bucket
+    id_key: str
+
+
+class SharedBacktest:
+    """
+    Read-only columnar copy of a BacktestIndex in one shared-memory block, for
+    matching many live sets in worker processes without copying the backtest.
+
+    Trades are numbered by position in (symbol, side, open_time) bucket order.
+    The block holds their open times and prices, and the pass-1 ids as UTF-8
+    (a blob plus offsets, grouped by id) with the position of each, under an
+    open-addressing hash table keyed by crc32, so a worker looks an id up
+    without building a dict of its own. Workers attach by name (see _View); the
+    parent keeps the Trade objects and turns positions back into them.
+    """
+
+    def __init__(self, index: BacktestIndex, id_key: str = "trade_id"):
+        self.index = index
+        self.id_key = id_key
+        keys = list(index.buckets)
+        self.order: list[Trade] = [t for k in keys for t in index.buckets[k]]
+        starts = []
+        n = 0
+        for k in keys:
+            starts.append(n)
+            n += len(index.buckets[k])
+
+        key = id_key_func(id_key)
+        pairs = sorted(
+            (_key_bytes(k), p) for p, t in enumerate(self.order) if (k := key(t)) is not None
+        )
+        offsets = array("q", [0])
+        for kb, _ in pairs:
+            offsets.append(offsets[-1] + len(kb))
+        # Slot -> 1 + first pair of an id (0 = empty), linear probing, load <= 1/2.
+        mask = (1 << max(2 * len(pairs), 1).bit_length()) - 1
+        table = array("q", bytes(8 * (mask + 1)))
+        for i, (kb, _) in enumerate(pairs):
+            if i and pairs[i - 1][0] == kb:
+                continue
+            h = crc32(kb) & mask
+            while table[h]:
+                h = (h + 1) & mask
+            table[h] = i + 1
+        columns = {
+            "times": array("q", (x for k in keys for x in index.columns[k][0])),
+            "prices": array("d", (x for k in keys for x in index.columns[k][1])),
+            "key_table": table,
+            "key_off": offsets,
+            "key_pos": array("q", (p for _, p in pairs)),
+            "key_blob": array("B", b"".join(kb for kb, _ in pairs)),
+        }
+
+        layout = {}
+        size = 0
+        for name, col in columns.items():
+            layout[name] = (col.typecode, size, len(col))
+            size += -(-len(col) * col.itemsize // 8) * 8  # keep every column 8-byte aligned
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 8))
+        for name, col in columns.items():
+            _, off, _ = layout[name]
+            raw = col.tobytes()
+            self.shm.buf[off : off + len(raw)] = raw
+        self.spec = _Spec(self.shm.name, layout, keys, starts, id_key)
+
+        # Backtest-only duplicate ids (reported for every account) and the input
+        # order of every position (IdConflict lists trades in input order).
+        self.bt_dups = [
+            (_fmt_key(k), tuple(index.trades[i] for i in idxs))
+            for k, idxs in index.ids(id_key).items()
+            if len(idxs) > 1
+        ]
+        rank = {id(t): i for i, t in enumerate(index.trades)}
+        self.rank = [rank[id(t)] for t in self.order]
+
+    def close(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> SharedBacktest:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class _View:
+    """Typed zero-copy views of a SharedBacktest block."""
+
+    def __init__(self, spec: _Spec, buf: memoryview):
+        self.spec = spec
+        self._views = []
+        for name, (code, off, n) in spec.layout.items():
+            view = buf[off : off + n * array(code).itemsize].cast(code)
+            self._views.append(view)
+            setattr(self, name, view)
+        ends = [*spec.starts[1:], len(self.times)]
+        self.bucket_span = {k: (a, b) for k, a, b in zip(spec.buckets, spec.starts, ends)}
+
+    def release(self) -> None:
+        for view in self._views:
+            view.release()
+
+    def lookup(self, key: bytes) -> list[int]:
+        """Positions of the trades carrying this id (in position order)."""
+        table, off, pos, blob = self.key_table, self.key_off, self.key_pos, self.key_blob
+        mask = len(table) - 1
+        h = crc32(key) & mask
+        while table[h]:
+            i = table[h] - 1
+            if blob[off[i] : off[i + 1]] == key:
+                out = []
+                while i < len(pos) and blob[off[i] : off[i + 1]] == key:
+                    out.append(pos[i])
+                    i += 1
+                return out
+            h = (h + 1) & mask
+        return []
+
+    def bucket_of(self, p: int) -> tuple[str, str]:
+        return self.spec.buckets[bisect_right(self.spec.starts, p) - 1]
+
+
+@dataclass
+class _AccountOut:
+    live: list[Trade]
+    links: list[tuple[int, int]]  # pass 1: (position, live index)
+    conflicts: list[tuple[str, str, list[int], list[int]]]  # key, reason, positions, live idxs
+    pairs: list[tuple[int, int]]  # pass 2: (position, live index)
+    extra: list[int]
+
+
+# Per worker process: the attached block (kept open for the worker's lifetime) and its view.
+_WORKER: Optional[tuple[shared_memory.SharedMemory, _View]] = None
+
+
+def _attach(spec: _Spec) -> None:
+    global _WORKER
+    shm = shared_memory.SharedMemory(name=spec.shm_name)
+    _WORKER = (shm, _View(spec, shm.buf))
+
+
+def _audit_worker(args: tuple) -> _AccountOut:
+    return _audit_account(_WORKER[1], *args)
+
+
+def _audit_account(
+    view: _View,
+    path: str,
+    time_tolerance_s: int,
+    price_tolerance: Optional[float],
+    symbols: Optional[Callable[[str], str]],
+) -> _AccountOut:
+    """Read one live file and match it against the shared backtest (as _audit_indexed)."""
+    live = read_trades_csv(path, source="live", symbols=symbols)
+
+    # --- PASS 1: ids, same rules as match.link_ids ---
+    links: list[tuple[int, int]] = []
+    conflicts = []
+    for k, lvs in _id_index(live, id_key_func(view.spec.id_key)).items():
+        bts = view.lookup(_key_bytes(k))
+        dup_bt = len(bts) > 1
+        dup_lv = len(lvs) > 1
+        if dup_bt or dup_lv:
+            reason = "duplicate_both" if dup_bt and dup_lv else (
+                "duplicate_backtest" if dup_bt else "duplicate_live"
+            )
+        elif not bts:
+            continue
+        else:
+            symbol, side = view.bucket_of(bts[0])
+            lt = live[lvs[0]]
+            if lt.symbol == symbol and lt.side.value == side:
+                links.append((bts[0], lvs[0]))
+                continue
+            reason = "symbol_side_mismatch"
+        conflicts.append((_fmt_key(k), reason, bts, lvs))
+
+    # --- PASS 2: greedy time matching inside the shared buckets ---
+    linked = {i for _, i in links}
+    taken: dict[tuple[str, str], set[int]] = {}
+    for p, _ in links:
+        key = view.bucket_of(p)
+        taken.setdefault(key, set()).add(p - view.bucket_span[key][0])
+    remaining = sorted(
+        (i for i in range(len(live)) if i not in linked),
+        key=lambda i: (live[i].symbol, live[i].side.value, live[i].open_time),
+    )
+    by_bucket: dict[tuple[str, str], list[int]] = {}
+    for i in remaining:
+        by_bucket.setdefault((live[i].symbol, live[i].side.value), []).append(i)
+
+    tol_us = time_tolerance_s * 1_000_000
+    pairs: list[tuple[int, int]] = []
+    extra: list[int] = []
+    for key, idxs in by_bucket.items():
+        span = view.bucket_span.get(key)
+        if span is None:
+            extra.extend(idxs)
+            continue
+        a, b = span
+        lvs = [live[i] for i in idxs]
+        picks = greedy_match(
+            view.times[a:b],
+            view.prices[a:b],
+            _times(lvs),
+            _prices(lvs),
+            tol_us,
+            price_tolerance,
+            taken.get(key, ()),
+        )
+        for i, j in zip(idxs, picks):
+            if j < 0:
+                extra.append(i)
+            else:
+                pairs.append((a + j, i))
+    return _AccountOut(live, links, conflicts, pairs, extra)
+
+
+def _to_result(shared: SharedBacktest, out: _AccountOut) -> AuditResult:
+    """Positions back to Trades, in the order _audit_indexed produces them."""
+    order, live = shared.order, out.live
+    matched = [_id_match(order[p], live[i]) for p, i in out.links]
+    for p, i in out.pairs:
+        bt, lv = order[p], live[i]
+        matched.append(
+            TradeMatch(
+                backtest=bt,
+                live=lv,
+                open_time_diff_s=abs(epoch_us(bt.open_time) - epoch_us(lv.open_time)) / 1_000_000,
+                open_price_diff=(lv.open_price - bt.open_price),
+            )
+        )
+    conflicts = [
+        IdConflict(
+            key,
+            reason,
+            tuple(order[p] for p in sorted(ps, key=shared.rank.__getitem__)),
+            tuple(live[i] for i in lvs),
+        )
+        for key, reason, ps, lvs in out.conflicts
+    ]
+    seen = {c.key for c in conflicts}
+    for key, ts in shared.bt_dups:
+        if key not in seen:
+            conflicts.append(IdConflict(key, "duplicate_backtest", ts, ()))
+
+    used = {p for p, _ in out.links} | {p for p, _ in out.pairs}
+    missing = [t for p, t in enumerate(order) if p not in used]
+    return AuditResult(matched, missing, [live[i] for i in out.extra], conflicts)
+
+
+def _divergence(shared: SharedBacktest, results: Mapping[str, AuditResult]) -> list[Divergence]:
+    lives: dict[int, list[Trade]] = {}
+    missing: dict[int, list[str]] = {}
+    for account, res in results.items():
+        for m in res.matched:
+            lives.setdefault(id(m.backtest), []).append(m.live)
+        for t in res.missing_in_live:
+            missing.setdefault(id(t), []).append(account)
+
+    out = []
+    for bt in shared.index.trades:
+        ls = lives.get(id(bt), [])
+        prices = [t.open_price for t in ls]
+        times = [epoch_us(t.open_time) for t in ls]
+        out.append(
+            Divergence(
+                backtest=bt,
+                matched=len(ls),
+                missing_accounts=tuple(missing.get(id(bt), ())),
+                price_spread=max(prices) - min(prices) if len(ls) > 1 else 0.0,
+                time_spread_s=(max(times) - min(times)) / 1_000_000 if len(ls) > 1 else 0.0,
+            )
+        )
+    return out
+
+
+def audit_fanout(
+    backtest: list[Trade] | BacktestIndex,
+    live_paths: Mapping[str, str | Path],
+    time_tolerance_s: int = 120,
+    price_tolerance: float | None = None,
+    id_key: str = "trade_id",
+    workers: int = 1,
+    symbols: Optional[Callable[[str], str]] = None,
+) -> FanoutResult:
+    """
+    Audit one backtest against many live accounts ({account: live CSV path}).
+
+    The backtest is indexed once and copied into shared memory (SharedBacktest);
+    with workers > 1 each worker process attaches to it once and reads and
+    matches whole accounts. Every account's AuditResult equals
+    audit_trades(BacktestIndex(backtest), live, ...) for that account, whatever
+    the number of workers. The divergence list compares the accounts per
+    backtest trade.
+    """
+    index = backtest if isinstance(backtest, BacktestIndex) else BacktestIndex(backtest)
+    id_key_func(id_key)  # validate before starting workers
+    jobs = [(str(p), time_tolerance_s, price_tolerance, symbols) for p in live_paths.values()]
+
+    with SharedBacktest(index, id_key) as shared:
+        if workers > 1 and len(jobs) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(jobs)), initializer=_attach, initargs=(shared.spec,)
+            ) as ex:
+                outs = list(ex.map(_audit_worker, jobs))
+        else:
+            view = _View(shared.spec, shared.shm.buf)
+            try:
+                outs = [_audit_account(view, *job) for job in jobs]
+            finally:
+                view.release()
+        results = {acc: _to_result(shared, out) for acc, out in zip(live_paths, outs)}
+        return FanoutResult(results, _divergence(shared, results))
+
+
+def fanout_summary(fr: FanoutResult) -> dict[str, Any]:
+    """Cross-account counts: backtest trades missing everywhere / somewhere, widest spreads."""
+    n_accounts = len(fr.results)
+    missing_all = sum(
+        1 for d in fr.divergence if n_accounts and len(d.missing_accounts) == n_accounts
+    )
+    missing_some = sum(1 for d in fr.divergence if 0 < len(d.missing_accounts) < n_accounts)
+    return {
+        "accounts": n_accounts,
+        "backtest_trades": len(fr.divergence),
+        "missing_in_all": missing_all,
+        "missing_in_some": missing_some,
+        "max_price_spread": max((d.price_spread for d in fr.divergence), default=0.0),
+        "max_time_spread_s": max((d.time_spread_s for d in fr.divergence), default=0.0),
+    }
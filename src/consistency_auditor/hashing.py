@@ -2,7 +2,11 @@
 
 import hashlib
 import json
-from typing import Any
+import math
+from datetime import datetime
+from typing import Any, Callable
+
+from .models import epoch_us
 
 
 def stable_hash(obj: Any) -> str:
@@ -12,6 +16,10 @@ def stable_hash(obj: Any) -> str:
     - Normalizes floats to 8 decimals to avoid precision drift.
     - Converts all values to strings consistently.
     """
+    return hashlib.sha256(_canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+def _canonical_json(obj: Any) -> str:
     def default(o):
         if isinstance(o, float):
             # Normalize floats to prevent 1.0000001 != 1.0 mismatch
@@ -19,21 +27,18 @@ def stable_hash(obj: Any) -> str:
         return str(o)
 
     # sort_keys=True is critical for dict consistency
-    s = json.dumps(obj, default=default, sort_keys=True, separators=(",", ":"))
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+    return json.dumps(obj, default=default, sort_keys=True, separators=(",", ":"))
 
 
-def compute_signal_id(
-    symbol: str,
-    decision_time: Any,
-    side: str,
-    strategy_tag: str,
-    bars_hash: str
-) -> str:
-    """
-    Generate a unique ID for a trade signal (Step 23).
-    Format: hash(symbol + time + side + strategy + inputs)
-    """
+SIGNAL_ID_VERSIONS = (1, 2)
+SIGNAL_ID_VERSION = 2  # default for new runs; pass 1 to reproduce pre-v2 IDs
+
+_SIGNAL_ID_PERSON = b"ca-signal-id-v2"  # blake2b personalization (domain separation)
+_SIGNAL_ID_PERSON_LP = b"ca-signal-id-v2L"  # length-prefixed fallback payloads
+_SEP = "\x1f"
+
+
+def _signal_id_v1(symbol, decision_time, side, strategy_tag, bars_hash) -> str:
     payload = {
         "sym": str(symbol),
         "dt": str(decision_time),
@@ -45,8 +50,119 @@ def compute_signal_id(
     return stable_hash(payload)[:12]
 
 
+def _signal_id_v2(symbol, decision_time, side, strategy_tag, bars_hash) -> str:
+    # Time as integer epoch microseconds: canonical across tz offsets and much
+    # cheaper than str(datetime).
+    t = epoch_us(decision_time) if isinstance(decision_time, datetime) else decision_time
+    fields = (str(symbol), str(t), str(side), str(strategy_tag), str(bars_hash))
+    payload = _SEP.join(fields)
+    person = _SIGNAL_ID_PERSON
+    if payload.count(_SEP) != len(fields) - 1:
+        # A field contains the separator: fall back to length-prefixed fields,
+        # hashed in their own domain so they cannot equal a joined payload.
+        payload = "".join(f"{len(f)}:{f}" for f in fields)
+        person = _SIGNAL_ID_PERSON_LP
+    h = hashlib.blake2b(payload.encode("utf-8"), digest_size=6, person=person)
+    return h.hexdigest()
+
+
+def compute_signal_id(
+    symbol: str,
+    decision_time: Any,
+    side: str,
+    strategy_tag: str,
+    bars_hash: str,
+    version: int = SIGNAL_ID_VERSION,
+) -> str:
+    """
+    Generate a unique ID for a trade signal (Step 23).
+    Format: hash(symbol + time + side + strategy + inputs), 12 hex chars.
+
+    version=2 (default): fixed-order fields hashed with blake2b (48-bit digest).
+    version=1: the original sorted-key JSON + SHA-256 scheme; use it to keep
+    IDs comparable with runs recorded before v2.
+    """
+    if version == 2:
+        return _signal_id_v2(symbol, decision_time, side, strategy_tag, bars_hash)
+    if version == 1:
+        return _signal_id_v1(symbol, decision_time, side, strategy_tag, bars_hash)
+    raise ValueError(
+        f"unsupported signal_id version: {version!r} (expected one of {SIGNAL_ID_VERSIONS})"
+    )
+
+
 def compute_config_fingerprint(config: dict) -> str:
     """
     Hash only the subset of config that affects logic (Step 13).
     """
     return stable_hash(config)[:8]
+
+
+_PARAMS_KEY_PERSON = b"ca-params-key"
+
+
+def compute_params_key(params: dict) -> str:
+    """
+    Identity of a params dict for interning: 32 hex chars (128-bit blake2b) of
+    the same canonical form as stable_hash. The 8-char config fingerprint is
+    for display only; at that length distinct dicts collide too easily to be
+    used as a reference.
+    """
+    data = _canonical_json(params).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16, person=_PARAMS_KEY_PERSON).hexdigest()
+
+
+def _identical(a: Any, b: Any) -> bool:
+    # Like ==, but 1 vs 1.0 vs True differ (they serialize differently).
+    if type(a) is not type(b):
+        return False
+    if type(a) is dict:
+        return (
+            len(a) == len(b)
+            and list(a) == list(b)
+            and all(_identical(v, b[k]) for k, v in a.items())
+        )
+    if type(a) is list:
+        return len(a) == len(b) and all(_identical(x, y) for x, y in zip(a, b))
+    return a == b or (type(a) is float and math.isnan(a) and math.isnan(b))
+
+
+def _deep_copy(v: Any) -> Any:
+    if type(v) is dict:
+        return {k: _deep_copy(x) for k, x in v.items()}
+    if type(v) is list:
+        return [_deep_copy(x) for x in v]
+    return v
+
+
+class FingerprintCache:
+    """
+    Memoizes fingerprints of config/params dicts that rarely change.
+
+    A dict seen before (same object, unchanged contents) is answered from the
+    cache after a cheap structural comparison instead of re-serializing and
+    re-hashing it. Mutating the dict in place, or passing an equal dict with
+    different value types, is detected and re-hashed.
+    """
+
+    def __init__(
+        self, fn: Callable[[dict], str] = compute_config_fingerprint, max_entries: int = 64
+    ):
+        self.fn = fn
+        self.max_entries = max_entries
+        self._by_id: dict[int, tuple[Any, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, obj: dict) -> str:
+        hit = self._by_id.get(id(obj))
+        if hit is not None and _identical(hit[0], obj):
+            self.hits += 1
+            return hit[1]
+        self.misses += 1
+        fp = self.fn(obj)
+        if len(self._by_id) >= self.max_entries:
+            self._by_id.clear()
+        # Keep a copy: comparing against the live object would miss in-place edits.
+        self._by_id[id(obj)] = (_deep_copy(obj), fp)
+        return fp
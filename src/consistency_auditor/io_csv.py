@@ -1,12 +1,32 @@
 from __future__ import annotations
 
 import csv
+import io
+import sys
+from collections.abc import Callable, Iterator
 from datetime import datetime, timezone
+from itertools import chain
 from pathlib import Path
 from typing import Optional
 
+from .compression import open_text
 from .models import Side, Trade
 
+# Canonical field -> accepted header aliases (case-insensitive), in lookup order.
+_ALIASES: dict[str, tuple[str, ...]] = {
+    "trade_id": ("trade_id", "ticket", "order", "position_id", "id"),
+    "signal_id": ("signal_id", "signalid"),
+    "symbol": ("symbol", "sym"),
+    "side": ("side", "type", "direction"),
+    "open_time": ("open_time", "time", "time_open", "timeopen"),
+    "open_price": ("open_price", "price", "price_open", "priceopen"),
+    "close_time": ("close_time", "time_close", "timeclose", "closetime"),
+    "close_price": ("close_price", "price_close", "closeprice", "priceclose"),
+    "volume": ("volume", "lots", "vol"),
+    "sl": ("sl", "stoploss", "stop_loss"),
+    "tp": ("tp", "takeprofit", "take_profit"),
+}
+
 
 def _parse_dt(s: str) -> datetime:
     s = str(s).strip()
@@ -80,7 +100,134 @@ def _get(row: dict, keymap: dict[str, str], *keys: str) -> str:
     return ""
 
 
-def read_trades_csv(path: str | Path, source: str) -> list[Trade]:
+def _row_to_trade(
+    row: dict,
+    source: str,
+    name: str,
+    symbols: Callable[[str], str] = sys.intern,
+) -> Trade:
+    """
+    Normalize one parsed CSV row (header -> value) into a Trade.
+    `symbols` maps the raw symbol (default: interned as is, see symbols.SymbolMapper).
+    """
+    # case-insensitive header map
+    keymap = {str(k).strip().lower(): k for k in row.keys() if k is not None}
+
+    symbol = _get(row, keymap, *_ALIASES["symbol"])
+    side_raw = _get(row, keymap, *_ALIASES["side"])
+    open_time_raw = _get(row, keymap, *_ALIASES["open_time"])
+    open_price_raw = _get(row, keymap, *_ALIASES["open_price"])
+
+    if not symbol or not side_raw or not open_time_raw or not open_price_raw:
+        raise ValueError(
+            f"missing required fields in {name}: "
+            f"symbol={bool(symbol)} side/type={bool(side_raw)} "
+            f"time={bool(open_time_raw)} price={bool(open_price_raw)}"
+        )
+
+    side = _parse_side(side_raw)
+    open_time = _parse_dt(open_time_raw)
+    open_price = float(open_price_raw)
+
+    def fopt(field: str) -> Optional[float]:
+        v = _get(row, keymap, *_ALIASES[field])
+        return float(v) if v else None
+
+    def dtopt(field: str) -> Optional[datetime]:
+        v = _get(row, keymap, *_ALIASES[field])
+        return _parse_dt(v) if v else None
+
+    trade_id = _get(row, keymap, *_ALIASES["trade_id"]) or None
+    signal_id = _get(row, keymap, *_ALIASES["signal_id"]) or None
+
+    return Trade(
+        source=source,
+        symbol=symbols(symbol),
+        side=side,
+        open_time=open_time,
+        open_price=open_price,
+        close_time=dtopt("close_time"),
+        close_price=fopt("close_price"),
+        volume=fopt("volume"),
+        sl=fopt("sl"),
+        tp=fopt("tp"),
+        trade_id=trade_id,
+        signal_id=signal_id,
+    )
+
+
+BAD_ROW_MODES = ("fail", "skip", "quarantine")
+
+
+class BadRowPolicy:
+    """
+    What to do with rows that fail to parse (missing field, bad side/time/number).
+
+    - fail: raise ValueError on the first bad row (default, historical behavior)
+    - skip: drop the row and keep going
+    - quarantine: drop the row and append it to `quarantine_path` as
+      line,reason,row (CSV), written as rows are rejected
+
+    `max_bad_rows` is a per-file error budget: exceeding it aborts the load
+    with ValueError even in skip/quarantine mode.
+    """
+
+    def __init__(
+        self,
+        mode: str = "fail",
+        max_bad_rows: Optional[int] = None,
+        quarantine_path: str | Path | None = None,
+    ):
+        if mode not in BAD_ROW_MODES:
+            raise ValueError(f"invalid bad-row mode: {mode!r} (expected one of {BAD_ROW_MODES})")
+        if mode == "quarantine" and quarantine_path is None:
+            raise ValueError("quarantine mode requires a quarantine_path")
+        self.mode = mode
+        self.max_bad_rows = max_bad_rows
+        self.quarantine_path = Path(quarantine_path) if quarantine_path is not None else None
+        self.count = 0
+        self._f = None
+        self._w = None
+
+    def reject(self, name: str, line_no: int, reason: str, raw: str) -> None:
+        if self.mode == "fail":
+            raise ValueError(f"{reason} (line {line_no})")
+
+        self.count += 1
+        if self.mode == "quarantine":
+            if self._w is None:
+                self.quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+                self._f = self.quarantine_path.open("w", encoding="utf-8", newline="")
+                self._w = csv.writer(self._f)
+                self._w.writerow(["line", "reason", "row"])
+            self._w.writerow([line_no, reason, raw])
+
+        if self.max_bad_rows is not None and self.count > self.max_bad_rows:
+            self.close()
+            raise ValueError(
+                f"too many bad rows in {name}: {self.count} > max_bad_rows={self.max_bad_rows} "
+                f"(last at line {line_no}: {reason})"
+            )
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+            self._w = None
+
+
+def _raw_row(row: dict, delimiter: str) -> str:
+    values = [v for k, v in row.items() if k is not None]
+    values.extend(row.get(None) or [])
+    return delimiter.join("" if v is None else str(v) for v in values)
+
+
+def read_trades_csv(
+    path: str | Path,
+    source: str,
+    bad_rows: Optional[BadRowPolicy] = None,
+    symbols: Optional[Callable[[str], str]] = None,
+) -> list[Trade]:
     """
     Supported header styles:
 
@@ -93,63 +240,51 @@ def read_trades_csv(path: str | Path, source: str) -> list[Trade]:
 
     Minimal required (after aliasing):
       symbol, side/type, open_time/time, open_price/price
+
+    Compressed files (.gz, .zst, .bz2, .xz, or detected by magic bytes) are
+    decompressed while streaming.
+
+    Bad rows raise ValueError unless a BadRowPolicy says otherwise.
+
+    Symbols are interned; `symbols` (e.g. a SymbolMapper) also maps broker
+    names onto canonical ones while reading.
+    """
+    return list(iter_trades_csv(path, source, bad_rows=bad_rows, symbols=symbols))
+
+
+def iter_trades_csv(
+    path: str | Path,
+    source: str,
+    bad_rows: Optional[BadRowPolicy] = None,
+    symbols: Optional[Callable[[str], str]] = None,
+) -> Iterator[Trade]:
+    """
+    Streaming read_trades_csv: yields trades one at a time, in file order, so a
+    consumer (e.g. extsort.external_sort) never needs the whole file in memory.
     """
     p = Path(path)
-    trades: list[Trade] = []
+    policy = bad_rows or BadRowPolicy()
+    symbols = symbols or sys.intern
 
-    with p.open("r", encoding="utf-8-sig", newline="") as f:
+    with open_text(p, "r", encoding="utf-8-sig", newline="") as f:
+        # Sniff on a decompressed sample and replay it instead of seeking back,
+        # so streaming decompressors (which cannot seek) work too.
         sample = f.read(4096)
-        f.seek(0)
+        if sample and not sample.endswith("\n"):
+            sample += f.readline()
         dialect = _sniff_dialect(sample)
 
-        reader = csv.DictReader(f, dialect=dialect)
+        reader = csv.DictReader(chain(io.StringIO(sample, newline=""), f), dialect=dialect)
         if reader.fieldnames is None:
             raise ValueError("CSV has no header row")
 
-        for row in reader:
-            # case-insensitive header map
-            keymap = {str(k).strip().lower(): k for k in row.keys() if k is not None}
-
-            symbol = _get(row, keymap, "symbol", "sym")
-            side_raw = _get(row, keymap, "side", "type", "direction")
-            open_time_raw = _get(row, keymap, "open_time", "time", "time_open", "timeopen")
-            open_price_raw = _get(row, keymap, "open_price", "price", "price_open", "priceopen")
-
-            if not symbol or not side_raw or not open_time_raw or not open_price_raw:
-                raise ValueError(
-                    f"missing required fields in {p.name}: "
-                    f"symbol={bool(symbol)} side/type={bool(side_raw)} "
-                    f"time={bool(open_time_raw)} price={bool(open_price_raw)}"
-                )
-
-            side = _parse_side(side_raw)
-            open_time = _parse_dt(open_time_raw)
-            open_price = float(open_price_raw)
-
-            def fopt(*keys: str) -> Optional[float]:
-                v = _get(row, keymap, *keys)
-                return float(v) if v else None
-
-            def dtopt(*keys: str) -> Optional[datetime]:
-                v = _get(row, keymap, *keys)
-                return _parse_dt(v) if v else None
-
-            trade_id = _get(row, keymap, "trade_id", "ticket", "order", "position_id", "id") or None
-
-            trades.append(
-                Trade(
-                    source=source,
-                    symbol=symbol,
-                    side=side,
-                    open_time=open_time,
-                    open_price=open_price,
-                    close_time=dtopt("close_time", "time_close", "timeclose", "closetime"),
-                    close_price=fopt("close_price", "price_close", "closeprice", "priceclose"),
-                    volume=fopt("volume", "lots", "vol"),
-                    sl=fopt("sl", "stoploss", "stop_loss"),
-                    tp=fopt("tp", "takeprofit", "take_profit"),
-                    trade_id=trade_id,
-                )
-            )
-
-    return trades
\ No newline at end of file
+        try:
+            for row in reader:
+                try:
+                    trade = _row_to_trade(row, source, p.name, symbols)
+                except ValueError as e:
+                    policy.reject(p.name, reader.line_num, str(e), _raw_row(row, dialect.delimiter))
+                    continue
+                yield trade
+        finally:
+            policy.close()
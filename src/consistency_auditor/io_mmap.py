@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import mmap
+import sys
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .compression import detect_compression
+from .io_csv import (
+    _ALIASES,
+    BadRowPolicy,
+    _parse_dt,
+    _parse_side,
+    _sniff_dialect,
+    read_trades_csv,
+)
+from .models import Side, Trade, epoch_us, from_epoch_us
+
+# Sentinel for a missing optional time in an int64 column (floats use NaN).
+NA_TIME = -(2**63)
+
+_SIDE_CODES = {Side.BUY: 0, Side.SELL: 1}
+_SIDES = (Side.BUY, Side.SELL)
+
+
+@dataclass
+class TradeColumns:
+    """
+    Columnar trade table produced by the mmap reader.
+
+    Times are epoch microseconds (int64), prices/volumes are float64 with NaN for
+    missing values, side is 0=BUY / 1=SELL. Symbols are interned per file.
+    """
+    source: str
+    symbol: list[str] = field(default_factory=list)
+    side: array = field(default_factory=lambda: array("b"))
+    open_time: array = field(default_factory=lambda: array("q"))
+    open_price: array = field(default_factory=lambda: array("d"))
+    close_time: array = field(default_factory=lambda: array("q"))
+    close_price: array = field(default_factory=lambda: array("d"))
+    volume: array = field(default_factory=lambda: array("d"))
+    sl: array = field(default_factory=lambda: array("d"))
+    tp: array = field(default_factory=lambda: array("d"))
+    trade_id: list[str | None] = field(default_factory=list)
+    signal_id: list[str | None] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.open_time)
+
+    def extend(self, other: TradeColumns) -> None:
+        self.symbol.extend(other.symbol)
+        self.side.extend(other.side)
+        self.open_time.extend(other.open_time)
+        self.open_price.extend(other.open_price)
+        self.close_time.extend(other.close_time)
+        self.close_price.extend(other.close_price)
+        self.volume.extend(other.volume)
+        self.sl.extend(other.sl)
+        self.tp.extend(other.tp)
+        self.trade_id.extend(other.trade_id)
+        self.signal_id.extend(other.signal_id)
+
+    def row(self, i: int) -> Trade:
+        """Materialize row i as a Trade."""
+        ct = self.close_time[i]
+        return Trade(
+            source=self.source,
+            symbol=self.symbol[i],
+            side=_SIDES[self.side[i]],
+            open_time=from_epoch_us(self.open_time[i]),
+            open_price=self.open_price[i],
+            close_time=None if ct == NA_TIME else from_epoch_us(ct),
+            close_price=_opt(self.close_price[i]),
+            volume=_opt(self.volume[i]),
+            sl=_opt(self.sl[i]),
+            tp=_opt(self.tp[i]),
+            trade_id=self.trade_id[i],
+            signal_id=self.signal_id[i],
+        )
+
+    def to_trades(self) -> list[Trade]:
+        """
+        Materialize Trade objects (what audit_trades consumes). match.audit_columns
+        audits the columns directly and only builds the Trades it reports.
+        """
+        return [self.row(i) for i in range(len(self))]
+
+    @classmethod
+    def from_trades(cls, trades: list[Trade], source: str) -> TradeColumns:
+        nan = float("nan")
+        cols = cls(source=source)
+        for t in trades:
+            cols.symbol.append(t.symbol)
+            cols.side.append(_SIDE_CODES[t.side])
+            cols.open_time.append(epoch_us(t.open_time))
+            cols.open_price.append(t.open_price)
+            cols.close_time.append(NA_TIME if t.close_time is None else epoch_us(t.close_time))
+            cols.close_price.append(nan if t.close_price is None else t.close_price)
+            cols.volume.append(nan if t.volume is None else t.volume)
+            cols.sl.append(nan if t.sl is None else t.sl)
+            cols.tp.append(nan if t.tp is None else t.tp)
+            cols.trade_id.append(t.trade_id)
+            cols.signal_id.append(t.signal_id)
+        return cols
+
+
+def _opt(v: float) -> float | None:
+    return None if v != v else v
+
+
+# --- byte-level field parsing (no per-row dicts, numerics parsed from bytes) ---
+
+
+def _field(parts: list[bytes], idxs: tuple[int, ...]) -> bytes:
+    # First non-empty aliased column, like io_csv._get
+    for i in idxs:
+        if i < len(parts):
+            v = parts[i].strip()
+            if v:
+                return v
+    return b""
+
+
+def _parse_time_us(b: bytes, day_cache: dict[bytes, int]) -> int:
+    """
+    Fast path for the common fixed-width layouts accepted by io_csv._parse_dt:
+      unix seconds, YYYY-MM-DD[T ]HH:MM:SS[Z|+HH:MM], YYYY.MM.DD HH:MM:SS
+    Anything else goes through _parse_dt.
+    """
+    if b.isdigit():
+        return int(b) * 1_000_000
+
+    n = len(b)
+    if n >= 19 and b[13] == 58 and b[16] == 58:  # ':'
+        sep = b[4]
+        dt_sep = b[10]
+        iso = sep == 45 and b[7] == 45 and dt_sep in (84, 32)  # '-' and 'T'/' '
+        mt5 = sep == 46 and b[7] == 46 and dt_sep == 32 and n == 19  # '.' and ' '
+        tail = b[19:]
+        offset_us = 0
+        ok = iso or mt5
+        if ok and iso and tail:
+            if tail == b"Z":
+                pass
+            elif (
+                len(tail) == 6
+                and tail[0] in (43, 45)  # '+' / '-'
+                and tail[3] == 58
+                and (tail[1:3] + tail[4:6]).isdigit()
+            ):
+                offset_us = (int(tail[1:3]) * 3600 + int(tail[4:6]) * 60) * 1_000_000
+                if tail[0] == 43:
+                    offset_us = -offset_us
+            else:
+                ok = False
+        if ok and (b[:4] + b[5:7] + b[8:10] + b[11:13] + b[14:16] + b[17:19]).isdigit():
+            hh, mi, ss = int(b[11:13]), int(b[14:16]), int(b[17:19])
+            if hh < 24 and mi < 60 and ss < 60:
+                key = b[:10]
+                day_us = day_cache.get(key)
+                if day_us is None:
+                    try:
+                        d = datetime(int(b[:4]), int(b[5:7]), int(b[8:10]), tzinfo=timezone.utc)
+                    except ValueError:
+                        raw = b.decode("utf-8", "replace")
+                        raise ValueError(f"invalid datetime: {raw!r}") from None
+                    day_us = epoch_us(d)
+                    day_cache[key] = day_us
+                return day_us + (hh * 3600 + mi * 60 + ss) * 1_000_000 + offset_us
+
+    return epoch_us(_parse_dt(b.decode("utf-8")))
+
+
+def _parse_side_code(b: bytes, cache: dict[bytes, int]) -> int:
+    code = cache.get(b)
+    if code is None:
+        code = _SIDE_CODES[_parse_side(b.decode("utf-8"))]
+        cache[b] = code
+    return code
+
+
+def _parse_chunk(
+    path: str,
+    start: int,
+    end: int,
+    layout: dict[str, tuple[int, ...]],
+    delimiter: bytes,
+    source: str,
+    max_errors: int | None = None,
+) -> tuple[TradeColumns, int, list[tuple[int, str, str]]]:
+    """
+    Parse the line-aligned byte range [start, end) of `path` into columns.
+    The file is mapped again in each worker, so only offsets cross process boundaries.
+
+    Returns (columns, lines in the range, bad rows as (line index, reason, raw row)).
+    Stops early once `max_errors` bad rows were collected (the line count then
+    ends at the last line read).
+    """
+    name = Path(path).name
+    cols = TradeColumns(source=source)
+    nan = float("nan")
+    symbols: dict[bytes, str] = {}
+    sides: dict[bytes, int] = {}
+    days: dict[bytes, int] = {}
+
+    sym_i = layout["symbol"]
+    side_i = layout["side"]
+    ot_i = layout["open_time"]
+    op_i = layout["open_price"]
+    ct_i = layout["close_time"]
+    cp_i = layout["close_price"]
+    vol_i = layout["volume"]
+    sl_i = layout["sl"]
+    tp_i = layout["tp"]
+    id_i = layout["trade_id"]
+    sig_i = layout["signal_id"]
+
+    errors: list[tuple[int, str, str]] = []
+    n_lines = 0
+    pos = start
+    # Lines are cut from a view of the mapping: unlike mm[start:end], that never
+    # copies the whole chunk, only the current line.
+    with (
+        open(path, "rb") as f,
+        mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+        memoryview(mm) as view,
+    ):
+        while pos < end:
+            nl = mm.find(b"\n", pos, end)
+            stop = end if nl == -1 else nl
+            line = view[pos:stop].tobytes()
+            k = n_lines
+            n_lines += 1
+            pos = stop + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if not line:
+                continue
+            parts = line.split(delimiter)
+
+            try:
+                sym = _field(parts, sym_i)
+                side_raw = _field(parts, side_i)
+                ot = _field(parts, ot_i)
+                op = _field(parts, op_i)
+                if not sym or not side_raw or not ot or not op:
+                    raise ValueError(
+                        f"missing required fields in {name}: "
+                        f"symbol={bool(sym)} side/type={bool(side_raw)} "
+                        f"time={bool(ot)} price={bool(op)}"
+                    )
+
+                # Parse the whole row before appending so a bad row leaves no partial columns.
+                side = _parse_side_code(side_raw, sides)
+                open_time = _parse_time_us(ot, days)
+                open_price = float(op)
+                v = _field(parts, ct_i)
+                close_time = _parse_time_us(v, days) if v else NA_TIME
+                v = _field(parts, cp_i)
+                close_price = float(v) if v else nan
+                v = _field(parts, vol_i)
+                volume = float(v) if v else nan
+                v = _field(parts, sl_i)
+                sl = float(v) if v else nan
+                v = _field(parts, tp_i)
+                tp = float(v) if v else nan
+            except ValueError as e:
+                errors.append((k, str(e), line.decode("utf-8", "replace")))
+                if max_errors is not None and len(errors) >= max_errors:
+                    break
+                continue
+
+            s = symbols.get(sym)
+            if s is None:
+                s = symbols[sym] = sym.decode("utf-8")
+            cols.symbol.append(s)
+            cols.side.append(side)
+            cols.open_time.append(open_time)
+            cols.open_price.append(open_price)
+            cols.close_time.append(close_time)
+            cols.close_price.append(close_price)
+            cols.volume.append(volume)
+            cols.sl.append(sl)
+            cols.tp.append(tp)
+            v = _field(parts, id_i)
+            cols.trade_id.append(v.decode("utf-8") if v else None)
+            v = _field(parts, sig_i)
+            cols.signal_id.append(v.decode("utf-8") if v else None)
+
+    return cols, n_lines, errors
+
+
+def _layout(header: list[str]) -> dict[str, tuple[int, ...]]:
+    # Later duplicate headers win, as with csv.DictReader.
+    pos = {h.strip().lower(): i for i, h in enumerate(header)}
+    return {
+        name: tuple(pos[a] for a in aliases if a in pos) for name, aliases in _ALIASES.items()
+    }
+
+
+def _chunk_bounds(mm: mmap.mmap, start: int, size: int, chunk_size: int) -> list[tuple[int, int]]:
+    bounds = []
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            nl = mm.find(b"\n", end)
+            end = size if nl == -1 else nl + 1
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def read_trades_columns(
+    path: str | Path,
+    source: str,
+    workers: int = 1,
+    chunk_size: int = 32 * 1024 * 1024,
+    bad_rows: BadRowPolicy | None = None,
+    symbols: Callable[[str], str] | None = None,
+) -> TradeColumns:
+    """
+    Memory-mapped CSV reader for very large exports.
+
+    The file is split into line-aligned chunks that are parsed (optionally in
+    `workers` processes) straight into columns. Accepts the same headers, aliases,
+    side and datetime formats as read_trades_csv. Compressed files, and files that
+    use quoting (quoted fields may span lines), fall back to read_trades_csv.
+
+    Bad rows follow `bad_rows` (default: fail). Chunks collect their bad rows and
+    the policy is applied in file order, so line numbers and the quarantine file
+    are the same as with read_trades_csv.
+
+    `symbols` maps raw symbol names as in read_trades_csv (applied once per
+    distinct name after parsing).
+    """
+    p = Path(path)
+    policy = bad_rows or BadRowPolicy()
+
+    def fallback() -> TradeColumns:
+        trades = read_trades_csv(p, source=source, bad_rows=policy, symbols=symbols)
+        return TradeColumns.from_trades(trades, source)
+
+    if detect_compression(p) is not None:
+        # Compressed input cannot be mapped; stream-decompress instead.
+        return fallback()
+
+    size = p.stat().st_size
+    if size == 0:
+        raise ValueError("CSV has no header row")
+
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        sample = mm[:4096].decode("utf-8-sig", errors="replace")
+        dialect = _sniff_dialect(sample)
+        quote = (dialect.quotechar or '"').encode("utf-8")
+        if mm.find(quote) != -1 or len(dialect.delimiter) != 1:
+            return fallback()
+
+        nl = mm.find(b"\n")
+        header_end = size if nl == -1 else nl + 1
+        header = mm[:header_end].decode("utf-8-sig").rstrip("\r\n").split(dialect.delimiter)
+
+        if workers > 1:
+            chunk_size = max(1 << 20, min(chunk_size, size // (workers * 4) + 1))
+        bounds = _chunk_bounds(mm, header_end, size, chunk_size)
+
+    layout = _layout(header)
+    delimiter = dialect.delimiter.encode("utf-8")
+    # A chunk never needs more bad rows than it takes to exhaust the budget.
+    if policy.mode == "fail":
+        max_errors: int | None = 1
+    elif policy.max_bad_rows is not None:
+        max_errors = policy.max_bad_rows + 1
+    else:
+        max_errors = None
+    args = [(str(p), a, b, layout, delimiter, source, max_errors) for a, b in bounds]
+
+    out = TradeColumns(source=source)
+    line_base = 1  # the header is line 1
+
+    def consume(result: tuple[TradeColumns, int, list[tuple[int, str, str]]]) -> None:
+        nonlocal line_base
+        cols, n_lines, errors = result
+        for k, reason, raw in errors:
+            policy.reject(p.name, line_base + k + 1, reason, raw)
+        out.extend(cols)
+        line_base += n_lines
+
+    try:
+        if workers > 1 and len(args) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            ex = ProcessPoolExecutor(max_workers=workers)
+            try:
+                for result in ex.map(_parse_chunk, *zip(*args)):
+                    consume(result)
+            finally:
+                # An aborting policy should not wait for the remaining chunks.
+                ex.shutdown(cancel_futures=True)
+        else:
+            for a in args:
+                consume(_parse_chunk(*a))
+    finally:
+        policy.close()
+
+    # Re-intern (and map) symbols across chunks so equal names share one object.
+    mapped: dict[str, str] = {}
+    to_symbol = symbols or sys.intern
+    out.symbol = [mapped.get(s) or mapped.setdefault(s, to_symbol(s)) for s in out.symbol]
+    return out
@@ -1,18 +1,50 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import timedelta
-from typing import Optional
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Hashable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
-from .models import Trade
+from .models import Trade, epoch_us
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from .io_mmap import TradeColumns
 
 
 @dataclass(frozen=True)
 class TradeMatch:
+    """
+    One backtest trade and its live counterpart. With partial-fill matching,
+    `live` aggregates all fills (first fill time, VWAP open price, summed
+    volume) and `fills` holds the individual live trades; for 1-to-1 matches
+    fills is empty and fill_count is 1. under_filled marks a partial-fill match
+    whose fills cover less than the backtest volume (no more fills in the window).
+    """
     backtest: Trade
     live: Trade
     open_time_diff_s: float
     open_price_diff: float
+    fill_count: int = 1
+    fills: tuple[Trade, ...] = ()
+    under_filled: bool = False
+
+
+@dataclass(frozen=True)
+class IdConflict:
+    """
+    An id that cannot link trades 1-to-1 in pass 1. Its trades are left to the
+    time-based pass instead (and so also show up as matched, missing or extra).
+    reason: duplicate_backtest, duplicate_live, duplicate_both, or
+    symbol_side_mismatch (unique on both sides but a different instrument/side).
+    """
+    key: str
+    reason: str
+    backtest: tuple[Trade, ...]
+    live: tuple[Trade, ...]
 
 
 @dataclass(frozen=True)
@@ -20,105 +52,1010 @@ class AuditResult:
     matched: list[TradeMatch]
     missing_in_live: list[Trade]
     extra_in_live: list[Trade]
+    id_conflicts: list[IdConflict] = field(default_factory=list)
+
+
+# Pass-1 keys: which field(s) link a backtest trade to its live counterpart.
+ID_KEYS = ("trade_id", "trade_id+symbol", "signal_id")
+
+
+def id_key_func(id_key: str) -> Callable[[Trade], Optional[Hashable]]:
+    """Key function for one of ID_KEYS (None = trade takes no part in pass 1)."""
+    if id_key == "trade_id":
+        return lambda t: t.trade_id or None
+    if id_key == "trade_id+symbol":
+        return lambda t: (t.trade_id, t.symbol) if t.trade_id else None
+    if id_key == "signal_id":
+        return lambda t: t.signal_id or None
+    raise ValueError(f"invalid id key: {id_key!r} (expected one of {ID_KEYS})")
+
+
+def _fmt_key(key: Hashable) -> str:
+    return "|".join(key) if isinstance(key, tuple) else str(key)
+
+
+def _id_index(trades: Sequence[Trade], key: Callable[[Trade], Optional[Hashable]]) -> dict:
+    """One hashing pass: id -> indices of the trades carrying it, in input order."""
+    out: dict[Hashable, list[int]] = {}
+    for i, t in enumerate(trades):
+        k = key(t)
+        if k is not None:
+            out.setdefault(k, []).append(i)
+    return out
+
+
+def link_ids(
+    backtest: Sequence[Trade],
+    live: Sequence[Trade],
+    id_key: str = "trade_id",
+    fills: bool = False,
+    bt_ids: Optional[dict] = None,
+    lv_ids: Optional[dict] = None,
+) -> tuple[dict[int, list[int]], list[IdConflict]]:
+    """
+    Pass 1 of audit_trades: link trades with equal ids, in O(N) time and memory.
+
+    Returns ({backtest index: [live indices]}, conflicts). An id links only when
+    exactly one backtest trade and one live trade (any number of live fills
+    with fills=True) carry it and their symbol and side agree; every other id
+    shared or duplicated is reported as an IdConflict and links nothing.
+    bt_ids / lv_ids are precomputed _id_index results (see BacktestIndex,
+    audit_columns).
+    """
+    key = id_key_func(id_key)
+    if bt_ids is None:
+        bt_ids = _id_index(backtest, key)
+    if lv_ids is None:
+        lv_ids = _id_index(live, key)
+
+    links: dict[int, list[int]] = {}
+    conflicts: list[IdConflict] = []
+    for k, lvs in lv_ids.items():
+        bts = bt_ids.get(k, ())
+        dup_bt = len(bts) > 1
+        dup_lv = len(lvs) > 1 and not fills
+        if dup_bt or dup_lv:
+            reason = "duplicate_both" if dup_bt and dup_lv else (
+                "duplicate_backtest" if dup_bt else "duplicate_live"
+            )
+        elif not bts:
+            continue
+        else:
+            bt = backtest[bts[0]]
+            if all(live[i].symbol == bt.symbol and live[i].side == bt.side for i in lvs):
+                links[bts[0]] = lvs
+                continue
+            reason = "symbol_side_mismatch"
+        conflicts.append(
+            IdConflict(
+                _fmt_key(k),
+                reason,
+                tuple(backtest[j] for j in bts),
+                tuple(live[i] for i in lvs),
+            )
+        )
+    for k, bts in bt_ids.items():
+        if len(bts) > 1 and k not in lv_ids:
+            conflicts.append(
+                IdConflict(_fmt_key(k), "duplicate_backtest", tuple(backtest[j] for j in bts), ())
+            )
+    return links, conflicts
+
+
+# Pass-2 keys of the weighted distance (see weighted_match); time is always gated.
+MATCH_KEYS = ("time", "price", "volume", "close_time")
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """'time=1,price=0.5' -> {"time": 1.0, "price": 0.5} (keys from MATCH_KEYS)."""
+    out: dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, value = part.partition("=")
+        try:
+            w = float(value) if sep else -1.0
+        except ValueError:
+            w = -1.0
+        if not w >= 0:
+            raise ValueError(f"invalid weight {part!r} (expected KEY=NUMBER >= 0)")
+        out[name.strip()] = w
+    return out
+
+
+def match_dims(
+    price_tolerance: float | None = None,
+    max_volume_diff: float | None = None,
+    close_tolerance_s: float | None = None,
+    weights: Optional[Mapping[str, float]] = None,
+) -> Optional[list[tuple[str, float, float]]]:
+    """
+    Pass-2 keys besides open_time as (key, tolerance, weight), or None when only
+    open_time (and the plain price gate) takes part, i.e. the greedy matcher applies.
+    A key with a tolerance gates candidate pairs; a weighted key also needs one,
+    as its distance term is abs(diff) / tolerance.
+    """
+    weights = dict(weights or {})
+    unknown = set(weights) - set(MATCH_KEYS)
+    if unknown:
+        raise ValueError(f"unknown match keys: {sorted(unknown)} (expected {MATCH_KEYS})")
+    if any(not w >= 0 for w in weights.values()):
+        raise ValueError("match weights must be >= 0")
+    tolerances = {
+        "price": price_tolerance,
+        "volume": max_volume_diff,
+        "close_time": close_tolerance_s,
+    }
+    dims = []
+    for key, tol in tolerances.items():
+        w = weights.get(key, 0.0)
+        if tol is None:
+            if w:
+                raise ValueError(f"weight for {key} needs a {key} tolerance")
+            continue
+        dims.append((key, float(tol), w))
+    if all(key == "price" and not w for key, _, w in dims):
+        return None
+    return dims
+
+
+class BacktestIndex:
+    """
+    Backtest trades prepared once for many audits: the id indexes of pass 1
+    and the time-sorted (symbol, side) buckets with their time/price columns of
+    pass 2. Pass it to audit_trades instead of the list; the result is the same.
+    """
+
+    def __init__(self, trades: Iterable[Trade]):
+        self.trades = list(trades)
+        self._ids: dict[str, dict] = {}
+        self._keys: dict[tuple[tuple[str, str], str], array] = {}
+        ordered = sorted(self.trades, key=lambda t: (t.symbol, t.side.value, t.open_time))
+        self.buckets = _group(ordered)
+        self.columns = {key: (_times(ts), _prices(ts)) for key, ts in self.buckets.items()}
+        # (bucket key, index in bucket) of every trade, to mark pass-1 matches as taken.
+        self._pos = {id(t): (key, j) for key, ts in self.buckets.items() for j, t in enumerate(ts)}
+
+    def __len__(self) -> int:
+        return len(self.trades)
+
+    def ids(self, id_key: str) -> dict:
+        """id -> trade indices for one of ID_KEYS (built on first use)."""
+        out = self._ids.get(id_key)
+        if out is None:
+            out = self._ids[id_key] = _id_index(self.trades, id_key_func(id_key))
+        return out
+
+    def key_column(self, bucket: tuple[str, str], key: str) -> array:
+        """One bucket's column of a MATCH_KEYS key (built on first use)."""
+        out = self._keys.get((bucket, key))
+        if out is None:
+            out = self._keys[(bucket, key)] = _key_column(self.buckets[bucket], key)
+        return out
 
 
 def audit_trades(
-    backtest: list[Trade],
+    backtest: list[Trade] | BacktestIndex,
     live: list[Trade],
     time_tolerance_s: int = 120,
     price_tolerance: float | None = None,
+    workers: int = 1,
+    partition_size: int = 50_000,
+    partial_fills: bool = False,
+    volume_tolerance: float = 1e-9,
+    id_key: str = "trade_id",
+    max_volume_diff: float | None = None,
+    close_tolerance_s: float | None = None,
+    weights: Optional[Mapping[str, float]] = None,
+    executor: Executor | None = None,
 ) -> AuditResult:
     """
     Two-pass matcher:
-    1. Exact Match: Link trades sharing the same 	rade_id (or signal_id).
+    1. Exact Match: Link trades sharing the same id (id_key: trade_id,
+       trade_id+symbol or signal_id). Duplicated or conflicting ids link
+       nothing and are reported in AuditResult.id_conflicts (see link_ids).
     2. Fuzzy Match: Link remaining trades by (symbol, side, time) within tolerance.
+
+    Pass 2 takes the nearest open_time by default. With max_volume_diff,
+    close_tolerance_s or non-zero weights for price/volume/close_time it takes
+    the lowest weighted distance over those keys instead (see weighted_match);
+    weights default to {"time": 1}. This mode runs sequentially and does not
+    combine with partial_fills.
+
+    With workers > 1, each (symbol, side) stream is split into time partitions of
+    partition_size live trades that are matched in worker processes; the result is
+    identical to the sequential greedy pass. Passing an executor reuses that
+    pool (e.g. across many calls) instead of starting one per call.
+
+    With partial_fills=True a backtest trade may match several live fills: in
+    pass 1 all live trades sharing its id, in pass 2 the unused fills of its
+    (symbol, side) within tolerance, earliest first, until its volume is covered
+    (see match_fills). Time partitioning does not apply to this mode.
+
+    `backtest` may be a BacktestIndex built earlier (see server); its buckets are
+    reused as is (sequential pass 2; partial_fills re-sorts its trades).
     """
-    tol = timedelta(seconds=time_tolerance_s)
+    dims = match_dims(price_tolerance, max_volume_diff, close_tolerance_s, weights)
+    time_weight = (weights or {}).get("time", 1.0)
+    if dims is not None and partial_fills:
+        raise ValueError("weighted multi-key matching does not apply to partial_fills")
+    if isinstance(backtest, BacktestIndex):
+        if not partial_fills:
+            return _audit_indexed(
+                backtest, live, time_tolerance_s, price_tolerance, id_key, dims, time_weight
+            )
+        backtest = backtest.trades
+    if partial_fills:
+        return _audit_fills(
+            backtest, live, time_tolerance_s, price_tolerance, volume_tolerance, id_key
+        )
 
-    # Buckets for results
-    matched: list[TradeMatch] = []
+    # --- PASS 1: Exact ID Matching (see link_ids) ---
+    links, conflicts = link_ids(backtest, live, id_key)
+    matched = [_id_match(backtest[j], live[i]) for j, (i,) in links.items()]
+    lv_linked = {i for (i,) in links.values()}
+    bt_remaining = [t for j, t in enumerate(backtest) if j not in links]
+    lv_remaining = [t for i, t in enumerate(live) if i not in lv_linked]
+
+    # --- PASS 2: Fuzzy Time Matching (per (symbol, side) bucket) ---
+    extra_in_live: list[Trade] = []
+
+    # Sort remaining for greedy time matching
+    bt_remaining.sort(key=lambda t: (t.symbol, t.side.value, t.open_time))
+    # lv_remaining is already roughly sorted, but let's be safe
+    lv_remaining.sort(key=lambda t: (t.symbol, t.side.value, t.open_time))
+
+    bt_buckets = _group(bt_remaining)
+    lv_buckets = _group(lv_remaining)
+    tol_us = time_tolerance_s * 1_000_000
+
+    own_executor = executor is None and workers > 1 and dims is None
+    if own_executor:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
 
-    # Working lists (mutable copies)
-    bt_remaining = backtest[:]
-    lv_remaining = live[:]
+    columns = {}
+    for key, lvs in lv_buckets.items():
+        bts = bt_buckets.get(key, [])
+        columns[key] = (_times(bts), _prices(bts), _times(lvs), _prices(lvs))
+
+    try:
+        if dims is None:
+            picks_by_key = {
+                key: match_bucket(
+                    *columns[key],
+                    tol_us,
+                    price_tolerance,
+                    executor=executor,
+                    partition_size=partition_size,
+                )
+                for key in lv_buckets
+            }
+        else:
+            picks_by_key = {
+                key: weighted_match(
+                    columns[key][0],
+                    columns[key][2],
+                    [
+                        (_key_column(bt_buckets.get(key, []), k), _key_column(lvs, k), tol, w)
+                        for k, tol, w in dims
+                    ],
+                    tol_us,
+                    time_weight,
+                )
+                for key, lvs in lv_buckets.items()
+            }
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    taken: set[int] = set()
+    for key, lvs in lv_buckets.items():
+        bts = bt_buckets.get(key, [])
+        bt_t, bt_p, lv_t, lv_p = columns[key]
+        for i, j in enumerate(picks_by_key[key]):
+            if j < 0:
+                extra_in_live.append(lvs[i])
+                continue
+            taken.add(id(bts[j]))
+            matched.append(
+                TradeMatch(
+                    backtest=bts[j],
+                    live=lvs[i],
+                    open_time_diff_s=abs(bt_t[j] - lv_t[i]) / 1_000_000,
+                    open_price_diff=(lv_p[i] - bt_p[j]),
+                )
+            )
+
+    missing_in_live = [t for t in bt_remaining if id(t) not in taken]
+
+    return AuditResult(matched, missing_in_live, extra_in_live, conflicts)
+
+
+def audit_sorted(
+    backtest: Iterable[Trade],
+    live: Iterable[Trade],
+    **audit_kwargs: Any,
+) -> Iterator[tuple[tuple[str, str], AuditResult]]:
+    """
+    Sorted-stream audit: both inputs sorted by (symbol, side, open_time) (e.g.
+    by extsort.external_sort) are consumed one (symbol, side) bucket at a time,
+    and each pair of buckets is audited with audit_trades(**audit_kwargs).
+    Yields ((symbol, side), result) in bucket order; only the current bucket of
+    each input is held in memory. Raises ValueError if an input is not sorted.
+    With workers > 1 one process pool serves all buckets.
+
+    Pass 1 links ids within a bucket only: an id carried by trades of different
+    buckets is neither linked nor reported (as symbol_side_mismatch or
+    duplicate); those trades are time-matched in their own buckets. Apart from
+    that the result equals audit_trades on the whole lists.
+    """
+    executor = None
+    if audit_kwargs.get("workers", 1) > 1 and audit_kwargs.get("executor") is None:
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=audit_kwargs["workers"])
+        audit_kwargs = {**audit_kwargs, "executor": executor}
+
+    bt_groups = groupby(_checked_sorted(backtest, "backtest"), key=_bucket)
+    lv_groups = groupby(_checked_sorted(live, "live"), key=_bucket)
+    try:
+        b = next(bt_groups, None)
+        lv = next(lv_groups, None)
+        while b is not None or lv is not None:
+            if lv is None or (b is not None and b[0] < lv[0]):
+                key, bts, lvs = b[0], list(b[1]), []
+            elif b is None or lv[0] < b[0]:
+                key, bts, lvs = lv[0], [], list(lv[1])
+            else:
+                key, bts, lvs = b[0], list(b[1]), list(lv[1])
+            if bts:
+                b = next(bt_groups, None)
+            if lvs:
+                lv = next(lv_groups, None)
+            yield key, audit_trades(bts, lvs, **audit_kwargs)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+class _Rows(Sequence):
+    """Trades of a TradeColumns, each built on first access and then reused."""
+
+    def __init__(self, cols: TradeColumns):
+        self.cols = cols
+        self._rows: list[Optional[Trade]] = [None] * len(cols)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        t = self._rows[i]
+        if t is None:
+            t = self._rows[i] = self.cols.row(i)
+        return t
+
+
+def _column_ids(cols: TradeColumns, id_key: str) -> dict:
+    """_id_index straight from the id columns."""
+    if id_key == "trade_id":
+        keys: Iterable = cols.trade_id
+    elif id_key == "trade_id+symbol":
+        keys = ((t, s) if t else None for t, s in zip(cols.trade_id, cols.symbol))
+    elif id_key == "signal_id":
+        keys = cols.signal_id
+    else:
+        raise ValueError(f"invalid id key: {id_key!r} (expected one of {ID_KEYS})")
+    out: dict[Hashable, list[int]] = {}
+    for i, k in enumerate(keys):
+        if k:
+            out.setdefault(k, []).append(i)
+    return out
+
+
+def _column_buckets(cols: TradeColumns, skip: Iterable[int]) -> dict[tuple[str, int], list[int]]:
+    # Row indices per (symbol, side code) in _group order, each sorted by
+    # open_time (stable, like the sort in audit_trades).
+    skipped = set(skip)
+    out: dict[tuple[str, int], list[int]] = {}
+    for i, (sym, side) in enumerate(zip(cols.symbol, cols.side)):
+        if i not in skipped:
+            out.setdefault((sym, side), []).append(i)
+    t = cols.open_time
+    return {k: sorted(out[k], key=t.__getitem__) for k in sorted(out)}
+
+
+def audit_columns(
+    backtest: TradeColumns,
+    live: TradeColumns,
+    time_tolerance_s: int = 120,
+    price_tolerance: float | None = None,
+    workers: int = 1,
+    partition_size: int = 50_000,
+    id_key: str = "trade_id",
+    executor: Executor | None = None,
+) -> AuditResult:
+    """
+    audit_trades for columnar input (io_mmap.read_trades_columns): ids and the
+    time/price arrays of pass 2 come straight from the columns, and Trade
+    objects are built only for the trades the result holds. The result equals
+    audit_trades(backtest.to_trades(), live.to_trades(), ...). Default
+    (nearest-time) matching only; partial fills and weighted keys need Trades.
+    """
+    bt_rows, lv_rows = _Rows(backtest), _Rows(live)
 
-    # --- PASS 1: Exact ID Matching ---
-    # Create a lookup for backtest trades that HAVE an ID
-    bt_map = {t.trade_id: i for i, t in enumerate(bt_remaining) if t.trade_id}
+    # --- PASS 1: Exact ID Matching (see link_ids) ---
+    links, conflicts = link_ids(
+        bt_rows,
+        lv_rows,
+        id_key,
+        bt_ids=_column_ids(backtest, id_key),
+        lv_ids=_column_ids(live, id_key),
+    )
+    matched = [_id_match(bt_rows[j], lv_rows[i]) for j, (i,) in links.items()]
+    bt_buckets = _column_buckets(backtest, links)
+    lv_buckets = _column_buckets(live, (i for (i,) in links.values()))
 
-    # INDICES to remove from lv_remaining and bt_remaining after Pass 1
-    lv_matched_indices = []
-    bt_matched_indices = []
+    # --- PASS 2: Fuzzy Time Matching (per (symbol, side) bucket) ---
+    tol_us = time_tolerance_s * 1_000_000
+    own_executor = executor is None and workers > 1
+    if own_executor:
+        from concurrent.futures import ProcessPoolExecutor
 
-    for i, lt in enumerate(lv_remaining):
-        if lt.trade_id and lt.trade_id in bt_map:
-            bt_idx = bt_map[lt.trade_id]
+        executor = ProcessPoolExecutor(max_workers=workers)
 
-            # Safety check: ensure symbol/side actually match (prevent ID collisions)
-            bt = bt_remaining[bt_idx]
-            if bt.symbol == lt.symbol and bt.side == lt.side:
-                # We have a match!
+    extra_in_live: list[Trade] = []
+    taken: set[int] = set()
+    try:
+        for key, lvs in lv_buckets.items():
+            bts = bt_buckets.get(key, [])
+            bt_t = array("q", (backtest.open_time[j] for j in bts))
+            bt_p = array("d", (backtest.open_price[j] for j in bts))
+            lv_t = array("q", (live.open_time[i] for i in lvs))
+            lv_p = array("d", (live.open_price[i] for i in lvs))
+            picks = match_bucket(
+                bt_t,
+                bt_p,
+                lv_t,
+                lv_p,
+                tol_us,
+                price_tolerance,
+                executor=executor,
+                partition_size=partition_size,
+            )
+            for i, j in enumerate(picks):
+                if j < 0:
+                    extra_in_live.append(lv_rows[lvs[i]])
+                    continue
+                taken.add(bts[j])
                 matched.append(
                     TradeMatch(
-                        backtest=bt,
-                        live=lt,
-                        open_time_diff_s=abs((bt.open_time - lt.open_time).total_seconds()),
-                        open_price_diff=(lt.open_price - bt.open_price),
+                        backtest=bt_rows[bts[j]],
+                        live=lv_rows[lvs[i]],
+                        open_time_diff_s=abs(bt_t[j] - lv_t[i]) / 1_000_000,
+                        open_price_diff=(lv_p[i] - bt_p[j]),
                     )
                 )
-                lv_matched_indices.append(i)
-                bt_matched_indices.append(bt_idx)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    missing_in_live = [bt_rows[j] for bts in bt_buckets.values() for j in bts if j not in taken]
+    return AuditResult(matched, missing_in_live, extra_in_live, conflicts)
+
+
+def merge_results(results: Iterable[AuditResult]) -> AuditResult:
+    """Concatenate per-bucket results (e.g. of audit_sorted) into one."""
+    out = AuditResult([], [], [], [])
+    for r in results:
+        out.matched.extend(r.matched)
+        out.missing_in_live.extend(r.missing_in_live)
+        out.extra_in_live.extend(r.extra_in_live)
+        out.id_conflicts.extend(r.id_conflicts)
+    return out
+
+
+def _bucket(t: Trade) -> tuple[str, str]:
+    return (t.symbol, t.side.value)
+
 
-    # Remove matched trades from the pool (in reverse order to preserve indices)
-    for i in sorted(lv_matched_indices, reverse=True):
-        lv_remaining.pop(i)
+def _checked_sorted(trades: Iterable[Trade], name: str) -> Iterator[Trade]:
+    prev = None
+    for t in trades:
+        key = (t.symbol, t.side.value, t.open_time)
+        if prev is not None and key < prev:
+            raise ValueError(
+                f"{name} trades are not sorted by (symbol, side, open_time): "
+                f"{' '.join(map(str, key))} after {' '.join(map(str, prev))}"
+            )
+        prev = key
+        yield t
+
+
+def _id_match(bt: Trade, lt: Trade) -> TradeMatch:
+    return TradeMatch(
+        backtest=bt,
+        live=lt,
+        open_time_diff_s=abs((bt.open_time - lt.open_time).total_seconds()),
+        open_price_diff=(lt.open_price - bt.open_price),
+    )
 
-    for i in sorted(bt_matched_indices, reverse=True):
-        bt_remaining.pop(i)
 
-    # --- PASS 2: Fuzzy Time Matching (Existing Logic) ---
+def _audit_indexed(
+    index: BacktestIndex,
+    live: list[Trade],
+    time_tolerance_s: int,
+    price_tolerance: float | None,
+    id_key: str,
+    dims: Optional[list[tuple[str, float, float]]] = None,
+    time_weight: float = 1.0,
+) -> AuditResult:
+    # --- PASS 1: exact ID matching; matched backtest trades stay in their bucket as taken ---
+    bt_all = index.trades
+    links, conflicts = link_ids(bt_all, live, id_key, bt_ids=index.ids(id_key))
+    matched = [_id_match(bt_all[j], live[i]) for j, (i,) in links.items()]
+    taken: dict[tuple[str, str], set[int]] = {}
+    for j in links:
+        key, k = index._pos[id(bt_all[j])]
+        taken.setdefault(key, set()).add(k)
+    lv_linked = {i for (i,) in links.values()}
+    lv_remaining = [t for i, t in enumerate(live) if i not in lv_linked]
+
+    # --- PASS 2: greedy time matching against the prebuilt buckets ---
+    lv_remaining.sort(key=lambda t: (t.symbol, t.side.value, t.open_time))
+    tol_us = time_tolerance_s * 1_000_000
     extra_in_live: list[Trade] = []
+    for key, lvs in _group(lv_remaining).items():
+        bts = index.buckets.get(key)
+        if bts is None:
+            extra_in_live.extend(lvs)
+            continue
+        bt_t, bt_p = index.columns[key]
+        lv_t, lv_p = _times(lvs), _prices(lvs)
+        if dims is None:
+            picks = greedy_match(
+                bt_t, bt_p, lv_t, lv_p, tol_us, price_tolerance, taken.get(key, ())
+            )
+        else:
+            cols = [(index.key_column(key, k), _key_column(lvs, k), tol, w) for k, tol, w in dims]
+            picks = weighted_match(bt_t, lv_t, cols, tol_us, time_weight, taken.get(key, ()))
+        for i, j in enumerate(picks):
+            if j < 0:
+                extra_in_live.append(lvs[i])
+                continue
+            taken.setdefault(key, set()).add(j)
+            matched.append(
+                TradeMatch(
+                    backtest=bts[j],
+                    live=lvs[i],
+                    open_time_diff_s=abs(bt_t[j] - lv_t[i]) / 1_000_000,
+                    open_price_diff=(lv_p[i] - bt_p[j]),
+                )
+            )
 
-    # Sort remaining for greedy time matching
+    missing_in_live = []
+    for key, bts in index.buckets.items():
+        used = taken.get(key, set())
+        missing_in_live.extend(t for j, t in enumerate(bts) if j not in used)
+
+    return AuditResult(matched, missing_in_live, extra_in_live, conflicts)
+
+
+def _audit_fills(
+    backtest: list[Trade],
+    live: list[Trade],
+    time_tolerance_s: int,
+    price_tolerance: float | None,
+    volume_tolerance: float,
+    id_key: str,
+) -> AuditResult:
+    # --- PASS 1: every live fill carrying a backtest trade's id belongs to it ---
+    links, conflicts = link_ids(backtest, live, id_key, fills=True)
+    matched: list[TradeMatch] = []
+    lv_linked: set[int] = set()
+    for j, idxs in links.items():
+        fills = sorted((live[i] for i in idxs), key=lambda t: t.open_time)
+        matched.append(_fill_match(backtest[j], fills, volume_tolerance))
+        lv_linked.update(idxs)
+    bt_remaining = [t for i, t in enumerate(backtest) if i not in links]
+    lv_remaining = [t for i, t in enumerate(live) if i not in lv_linked]
+
+    # --- PASS 2: volume-aware window aggregation per (symbol, side) bucket ---
     bt_remaining.sort(key=lambda t: (t.symbol, t.side.value, t.open_time))
-    # lv_remaining is already roughly sorted, but let's be safe
     lv_remaining.sort(key=lambda t: (t.symbol, t.side.value, t.open_time))
+    bt_buckets = _group(bt_remaining)
+    lv_buckets = _group(lv_remaining)
+    tol_us = time_tolerance_s * 1_000_000
+
+    missing_in_live: list[Trade] = []
+    extra_in_live: list[Trade] = []
+    for key in sorted(bt_buckets.keys() | lv_buckets.keys()):
+        bts = bt_buckets.get(key, [])
+        lvs = lv_buckets.get(key, [])
+        groups = match_fills(
+            _times(bts),
+            _prices(bts),
+            _volumes(bts),
+            _times(lvs),
+            _prices(lvs),
+            _volumes(lvs),
+            tol_us,
+            price_tolerance,
+            volume_tolerance,
+        )
+        used = bytearray(len(lvs))
+        for bt, idxs in zip(bts, groups):
+            if not idxs:
+                missing_in_live.append(bt)
+                continue
+            for i in idxs:
+                used[i] = 1
+            matched.append(_fill_match(bt, [lvs[i] for i in idxs], volume_tolerance))
+        extra_in_live.extend(lt for lt, u in zip(lvs, used) if not u)
+
+    return AuditResult(matched, missing_in_live, extra_in_live, conflicts)
+
+
+def _fill_match(bt: Trade, fills: list[Trade], volume_tolerance: float) -> TradeMatch:
+    first = fills[0]
+    if len(fills) == 1:
+        lv = first
+    else:
+        vols = [f.volume for f in fills]
+        if all(v is not None and v > 0 for v in vols):
+            total = sum(vols)
+            vwap = sum(f.open_price * v for f, v in zip(fills, vols)) / total
+        else:
+            total = None
+            vwap = sum(f.open_price for f in fills) / len(fills)
+        ids = [f.trade_id for f in fills if f.trade_id]
+        lv = Trade(
+            source=first.source,
+            symbol=first.symbol,
+            side=first.side,
+            open_time=first.open_time,
+            open_price=vwap,
+            volume=total,
+            trade_id="+".join(dict.fromkeys(ids)) or None,
+        )
+    return TradeMatch(
+        backtest=bt,
+        live=lv,
+        open_time_diff_s=abs((bt.open_time - first.open_time).total_seconds()),
+        open_price_diff=(lv.open_price - bt.open_price),
+        fill_count=len(fills),
+        fills=tuple(fills) if len(fills) > 1 else (),
+        under_filled=(
+            bt.volume is not None
+            and lv.volume is not None
+            and lv.volume < bt.volume - volume_tolerance
+        ),
+    )
 
-    for lt in lv_remaining:
-        best_i: Optional[int] = None
-        best_dt: Optional[timedelta] = None
 
-        for i, bt in enumerate(bt_remaining):
-            if bt.symbol != lt.symbol or bt.side != lt.side:
+def match_fills(
+    bt_times: Sequence[int],
+    bt_prices: Sequence[float],
+    bt_volumes: Sequence[float],
+    lv_times: Sequence[int],
+    lv_prices: Sequence[float],
+    lv_volumes: Sequence[float],
+    tol_us: int,
+    price_tolerance: float | None = None,
+    volume_tolerance: float = 1e-9,
+) -> list[list[int]]:
+    """
+    Many-to-one kernel for one (symbol, side) bucket, both sides sorted by time.
+
+    Backtest trades are visited in time order; each collects unused live fills
+    within tolerance, earliest first, while they fit into its remaining volume,
+    and stops once the volume is covered (within volume_tolerance). A fill that
+    would overfill the order is left for later orders. Volumes are NaN when
+    unknown: such a backtest trade takes a single fill, such a fill covers the
+    whole order. Returns, per backtest trade, the indices of its fills (empty
+    if none). A single pointer sweeps the live side, so the cost is linear in
+    the stream length plus the fills looked at inside each window.
+    """
+    n_lv = len(lv_times)
+    used = bytearray(n_lv)
+    start = 0
+    out: list[list[int]] = []
+    for bt_t, bt_p, bt_v in zip(bt_times, bt_prices, bt_volumes):
+        while start < n_lv and (used[start] or lv_times[start] < bt_t - tol_us):
+            start += 1
+        need = bt_v if bt_v == bt_v and bt_v > 0 else None  # NaN -> one fill
+        got = 0.0
+        picked: list[int] = []
+        i = start
+        while i < n_lv and lv_times[i] <= bt_t + tol_us:
+            if used[i] or (
+                price_tolerance is not None and abs(lv_prices[i] - bt_p) > price_tolerance
+            ):
+                i += 1
+                continue
+            v = lv_volumes[i]
+            if need is None or v != v:
+                if not picked:
+                    picked.append(i)
+                break
+            if got + v > need + volume_tolerance:
+                i += 1
                 continue
+            picked.append(i)
+            got += v
+            if got >= need - volume_tolerance:
+                break
+            i += 1
+        for i in picked:
+            used[i] = 1
+        out.append(picked)
+    return out
 
-            dt = abs(bt.open_time - lt.open_time)
-            if dt > tol:
+
+def _volumes(trades: list[Trade]) -> array:
+    nan = float("nan")
+    return array("d", (nan if t.volume is None else t.volume for t in trades))
+
+
+def _group(trades: list[Trade]) -> dict[tuple[str, str], list[Trade]]:
+    # Input is sorted by (symbol, side, open_time), so buckets come out in that order too.
+    out: dict[tuple[str, str], list[Trade]] = {}
+    for t in trades:
+        out.setdefault((t.symbol, t.side.value), []).append(t)
+    return out
+
+
+def _times(trades: list[Trade]) -> array:
+    return array("q", (epoch_us(t.open_time) for t in trades))
+
+
+def _prices(trades: list[Trade]) -> array:
+    return array("d", (t.open_price for t in trades))
+
+
+def _key_column(trades: list[Trade], key: str) -> array:
+    """Float column of a MATCH_KEYS key; NaN where the trade lacks it."""
+    nan = float("nan")
+    if key == "price":
+        return _prices(trades)
+    if key == "volume":
+        return _volumes(trades)
+    if key == "close_time":
+        return array(
+            "d", (nan if t.close_time is None else epoch_us(t.close_time) / 1e6 for t in trades)
+        )
+    raise ValueError(f"invalid match key: {key!r}")
+
+
+def _pick(
+    bt_times: Sequence[int],
+    bt_prices: Sequence[float],
+    used: bytearray,
+    lt: int,
+    lp: float,
+    tol_us: int,
+    price_tolerance: float | None,
+) -> int:
+    """
+    Index of the nearest unused backtest trade within tolerance, or -1.
+    Ties go to the lower index (earlier open_time), as in a left-to-right scan.
+    """
+    best = -1
+    best_d = tol_us
+    n = len(bt_times)
+    pos = bisect_left(bt_times, lt)
+
+    # Right side (bt >= lt): distance grows, the first usable trade is the nearest.
+    j = pos
+    while j < n:
+        d = bt_times[j] - lt
+        if d > best_d:
+            break
+        if not used[j] and (price_tolerance is None or abs(lp - bt_prices[j]) <= price_tolerance):
+            best, best_d = j, d
+            break
+        j += 1
+
+    # Left side (bt < lt): walking left, <= lets an equally distant earlier trade win.
+    j = pos - 1
+    while j >= 0:
+        d = lt - bt_times[j]
+        if d > best_d:
+            break
+        if not used[j] and (price_tolerance is None or abs(lp - bt_prices[j]) <= price_tolerance):
+            best, best_d = j, d
+        j -= 1
+
+    return best
+
+
+def greedy_match(
+    bt_times: Sequence[int],
+    bt_prices: Sequence[float],
+    lv_times: Sequence[int],
+    lv_prices: Sequence[float],
+    tol_us: int,
+    price_tolerance: float | None = None,
+    taken: Iterable[int] = (),
+) -> list[int]:
+    """
+    Sequential greedy kernel for one (symbol, side) bucket.
+
+    Times are epoch microseconds, both sides sorted by time. Live trades are visited
+    in order and each takes the nearest unused backtest trade within tolerance.
+    Returns, per live trade, the matched backtest index or -1.
+    """
+    used = bytearray(len(bt_times))
+    for j in taken:
+        used[j] = 1
+
+    picks: list[int] = []
+    for lt, lp in zip(lv_times, lv_prices):
+        j = _pick(bt_times, bt_prices, used, lt, lp, tol_us, price_tolerance)
+        if j >= 0:
+            used[j] = 1
+        picks.append(j)
+    return picks
+
+
+def weighted_match(
+    bt_times: Sequence[int],
+    lv_times: Sequence[int],
+    dims: Sequence[tuple[Sequence[float], Sequence[float], float, float]],
+    tol_us: int,
+    time_weight: float = 1.0,
+    taken: Iterable[int] = (),
+) -> list[int]:
+    """
+    Multi-key greedy kernel for one (symbol, side) bucket, both sides sorted by time.
+
+    dims holds (backtest column, live column, tolerance, weight) per extra key.
+    The sorted time column is the interval index: a bisect finds the backtest
+    trades within tol_us of a live trade, so a query costs O(log n + window).
+    A candidate must be within every key's tolerance; among those the live
+    trade takes the unused one with the lowest distance
+        time_weight * |dt| / tol_us + sum(weight * |diff| / tolerance)
+    ties going to the lower index. NaN (unknown volume or close time) skips a
+    key for that pair. With no weighted keys this is greedy_match.
+    Returns, per live trade, the matched backtest index or -1.
+    """
+    used = bytearray(len(bt_times))
+    for j in taken:
+        used[j] = 1
+    scale_t = time_weight / tol_us if tol_us else 0.0
+    cols = [(bc, lc, tol, w / tol if tol else 0.0) for bc, lc, tol, w in dims]
+
+    picks: list[int] = []
+    for i, lt in enumerate(lv_times):
+        best = -1
+        best_d = float("inf")
+        for j in range(bisect_left(bt_times, lt - tol_us), bisect_right(bt_times, lt + tol_us)):
+            if used[j]:
                 continue
+            d = abs(bt_times[j] - lt) * scale_t
+            for bc, lc, tol, scale in cols:
+                diff = abs(bc[j] - lc[i])
+                if diff > tol:
+                    break
+                if diff == diff:
+                    d += diff * scale
+            else:
+                if d < best_d:
+                    best, best_d = j, d
+        if best >= 0:
+            used[best] = 1
+        picks.append(best)
+    return picks
 
-            # price gate (if enabled)
-            if price_tolerance is not None:
-                if abs(lt.open_price - bt.open_price) > price_tolerance:
-                    continue
 
-            if best_dt is None or dt < best_dt:
-                best_dt = dt
-                best_i = i
+def match_bucket(
+    bt_times: Sequence[int],
+    bt_prices: Sequence[float],
+    lv_times: Sequence[int],
+    lv_prices: Sequence[float],
+    tol_us: int,
+    price_tolerance: float | None = None,
+    executor: Executor | None = None,
+    partition_size: int = 50_000,
+) -> list[int]:
+    """
+    Match one bucket, optionally split into time partitions run in parallel.
 
-        if best_i is None:
-            extra_in_live.append(lt)
-            continue
+    Each partition covers a contiguous run of live trades plus every backtest trade
+    within tolerance of it (so neighbouring windows overlap by time_tolerance_s).
+    Partitions are matched speculatively as if nothing was taken before them, then
+    reconciled in time order: where an earlier partition consumed backtest trades
+    inside the window, the partition is replayed from its start until its state
+    agrees with the speculative run again. The result equals greedy_match().
+    """
+    n_lv = len(lv_times)
+    if executor is None or n_lv <= partition_size:
+        return greedy_match(bt_times, bt_prices, lv_times, lv_prices, tol_us, price_tolerance)
 
-        bt = bt_remaining.pop(best_i)
-        matched.append(
-            TradeMatch(
-                backtest=bt,
-                live=lt,
-                open_time_diff_s=abs((bt.open_time - lt.open_time).total_seconds()),
-                open_price_diff=(lt.open_price - bt.open_price),
-            )
+    bounds = [(a, min(a + partition_size, n_lv)) for a in range(0, n_lv, partition_size)]
+    windows = [
+        (
+            bisect_left(bt_times, lv_times[a] - tol_us),
+            bisect_right(bt_times, lv_times[b - 1] + tol_us),
         )
+        for a, b in bounds
+    ]
+    futures = [
+        executor.submit(
+            greedy_match,
+            bt_times[lo:hi],
+            bt_prices[lo:hi],
+            lv_times[a:b],
+            lv_prices[a:b],
+            tol_us,
+            price_tolerance,
+        )
+        for (a, b), (lo, hi) in zip(bounds, windows)
+    ]
+
+    picks: list[int] = []
+    consumed: list[int] = []  # global bt indices taken by earlier partitions
+    for (a, b), (lo, hi), fut in zip(bounds, windows, futures):
+        spec = [j + lo if j >= 0 else -1 for j in fut.result()]
+        consumed = [j for j in consumed if j >= lo]
+        conflicts = [j for j in consumed if j < hi]
+        if conflicts:
+            part = _reconcile(
+                bt_times, bt_prices, lv_times, lv_prices, a, b, lo, hi, spec, conflicts,
+                tol_us, price_tolerance,
+            )
+        else:
+            part = spec
+        picks.extend(part)
+        consumed.extend(j for j in part if j >= 0)
+
+    return picks
+
+
+def _reconcile(
+    bt_times: Sequence[int],
+    bt_prices: Sequence[float],
+    lv_times: Sequence[int],
+    lv_prices: Sequence[float],
+    a: int,
+    b: int,
+    lo: int,
+    hi: int,
+    spec: list[int],
+    conflicts: list[int],
+    tol_us: int,
+    price_tolerance: float | None,
+) -> list[int]:
+    """
+    Replay live trades [a, b) with `conflicts` already taken.
+
+    `diff` is the symmetric difference between the replayed and speculative sets of
+    used backtest indices, restricted to what later live trades can still reach.
+    Once it is empty both runs are in the same state and the rest of `spec` holds.
+    """
+    bt_t = bt_times[lo:hi]
+    bt_p = bt_prices[lo:hi]
+    used = bytearray(hi - lo)
+    for j in conflicts:
+        used[j - lo] = 1
+    diff = set(conflicts)
+
+    out: list[int] = []
+    for i in range(a, b):
+        j = _pick(bt_t, bt_p, used, lv_times[i], lv_prices[i], tol_us, price_tolerance)
+        j = j + lo if j >= 0 else -1
+        if j >= 0:
+            used[j - lo] = 1
+        out.append(j)
+
+        s = spec[i - a]
+        if j != s:
+            diff ^= {x for x in (j, s) if x >= 0}
 
-    missing_in_live = bt_remaining
+        if i + 1 < b:
+            floor = bisect_left(bt_times, lv_times[i + 1] - tol_us)
+            diff = {x for x in diff if x >= floor}
+        if not diff:
+            out.extend(spec[i - a + 1 :])
+            break
 
-    return AuditResult(matched=matched, missing_in_live=missing_in_live, extra_in_live=extra_in_live)
+    return out
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from enum import Enum
 from typing import Optional
 
@@ -16,6 +16,20 @@ def _ensure_tz(dt: datetime) -> datetime:
     return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
 
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+
+def epoch_us(dt: datetime) -> int:
+    """Exact integer microseconds since the Unix epoch (for sorting/bisecting times)."""
+    return (_ensure_tz(dt) - _EPOCH) // _US
+
+
+def from_epoch_us(us: int) -> datetime:
+    """Inverse of epoch_us (UTC-aware)."""
+    return _EPOCH + timedelta(microseconds=us)
+
+
 @dataclass(frozen=True)
 class Trade:
     """
@@ -34,6 +48,7 @@ class Trade:
     tp: Optional[float] = None
 
     trade_id: Optional[str] = None  # ticket / order id (if available)
+    signal_id: Optional[str] = None  # recorder signal_id (if exported)
 
     def __post_init__(self) -> None:
         object.__setattr__(self, "open_time", _ensure_tz(self.open_time))
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Optional
+
+from .match import TradeMatch
+from .models import Side, epoch_us
+from .sketch import LogHistogram
+
+# Metrics scored per match: side-adjusted open price diff (positive = adverse) and
+# absolute open time diff.
+OUTLIER_METRICS = ("slippage", "time_diff_s")
+# 0.6745 = Phi^-1(0.75): scales the MAD to a standard deviation for normal data.
+_MAD_Z = 0.6745
+# sqrt(pi / 2): the same for the mean absolute deviation (the MAD == 0 fallback).
+_MEAN_AD_Z = 1.2533
+
+
+@dataclass(frozen=True)
+class Outlier:
+    match: TradeMatch
+    metric: str
+    value: float
+    median: float
+    mad: float  # the MAD the score used (see RobustWindow.scale)
+    score: float  # robust z-score: 0.6745 * (value - median) / mad
+
+
+class RobustWindow:
+    """
+    Rolling median / MAD of one stream over about the last `window` values, in
+    memory independent of the stream length.
+
+    The window is a ring of `blocks` blocks. Only the current block is kept raw;
+    a closed block becomes two mergeable sketches (sketch.LogHistogram): of
+    its values and of their absolute deviations from the window median at
+    closing time. Median and MAD are re-estimated from the merged sketches
+    whenever a block closes, so they lag by at most one block and are None
+    until the first block is complete.
+
+    When at least half the window sits exactly at the median (slippage of
+    fills at the exact price) the MAD is 0 and would flag every other value;
+    the score then uses the mean absolute deviation instead (see scale).
+    """
+
+    def __init__(self, window: int = 2000, blocks: int = 8, rel_accuracy: float = 0.01):
+        if window < blocks or blocks < 1:
+            raise ValueError("window must be >= blocks >= 1")
+        self.block_size = window // blocks
+        self.rel_accuracy = rel_accuracy
+        self._blocks: deque[tuple[LogHistogram, LogHistogram]] = deque(maxlen=blocks)
+        self._raw = array("d")
+        self.median: Optional[float] = None
+        self.mad: Optional[float] = None
+        self.mean_ad: Optional[float] = None  # mean absolute deviation from the median
+
+    def scale(self) -> Optional[float]:
+        """
+        MAD used for scoring: the window MAD or, when that is 0, the MAD a
+        normal distribution with this mean absolute deviation would have.
+        """
+        if self.median is None or self.mad is None or self.mean_ad is None:
+            return None
+        mad = self.mad if self.mad > 0 else _MAD_Z * _MEAN_AD_Z * self.mean_ad
+        # Sketch quantiles are only resolved to rel_accuracy: a spread below that
+        # is indistinguishable from no spread at all.
+        return max(mad, self.rel_accuracy * abs(self.median), 1e-12)
+
+    def score(self, x: float) -> Optional[float]:
+        """Robust z-score of x against the current window (None while warming up)."""
+        scale = self.scale()
+        if scale is None:
+            return None
+        return _MAD_Z * (x - self.median) / scale
+
+    def add(self, x: float) -> None:
+        self._raw.append(x)
+        if len(self._raw) >= self.block_size:
+            self._close_block()
+
+    def _close_block(self) -> None:
+        values = LogHistogram(self.rel_accuracy)
+        for x in self._raw:
+            values.add(x)
+        merged = LogHistogram(self.rel_accuracy)
+        for block, _ in self._blocks:
+            merged.merge(block)
+        merged.merge(values)
+        median = merged.quantile(0.5)
+
+        deviations = LogHistogram(self.rel_accuracy)
+        for x in self._raw:
+            deviations.add(abs(x - median))
+        self._blocks.append((values, deviations))
+        spread = LogHistogram(self.rel_accuracy)
+        for _, dev in self._blocks:
+            spread.merge(dev)
+
+        self.median = median
+        self.mad = spread.quantile(0.5)
+        self.mean_ad = spread.mean
+        self._raw = array("d")
+
+
+class OutlierDetector:
+    """
+    Streaming robust outlier stage: one RobustWindow per (symbol, metric).
+    Each value is scored against the window of the values before it, then added,
+    so state is bounded by the number of symbols, not of matches.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 3.5,
+        window: int = 2000,
+        blocks: int = 8,
+        rel_accuracy: float = 0.01,
+    ):
+        if threshold <= 0:
+            raise ValueError("outlier threshold must be > 0")
+        if window < blocks or blocks < 1:
+            raise ValueError("window must be >= blocks >= 1")
+        self.threshold = threshold
+        self.window = window
+        self.blocks = blocks
+        self.rel_accuracy = rel_accuracy
+        self.windows: dict[tuple[str, str], RobustWindow] = {}
+
+    def update(self, m: TradeMatch) -> list[Outlier]:
+        slippage = m.open_price_diff if m.backtest.side is Side.BUY else -m.open_price_diff
+        out = []
+        for metric, x in (("slippage", slippage), ("time_diff_s", m.open_time_diff_s)):
+            key = (m.backtest.symbol, metric)
+            w = self.windows.get(key)
+            if w is None:
+                w = self.windows[key] = RobustWindow(self.window, self.blocks, self.rel_accuracy)
+            z = w.score(x)
+            if z is not None and abs(z) > self.threshold:
+                out.append(Outlier(m, metric, x, w.median, w.scale(), z))
+            w.add(x)
+        return out
+
+
+def find_outliers(
+    matches: Iterable[TradeMatch],
+    threshold: float = 3.5,
+    window: int = 2000,
+    blocks: int = 8,
+) -> list[Outlier]:
+    """
+    Matches whose slippage or open time diff is anomalous for their symbol
+    (|robust z| > threshold against the rolling median/MAD of the preceding
+    ~window matches of that symbol, see RobustWindow). Matches are visited in
+    backtest open-time order; a symbol is scored once window / blocks of its
+    matches have been seen.
+    """
+    detector = OutlierDetector(threshold, window, blocks)
+    out: list[Outlier] = []
+    for m in sorted(matches, key=lambda m: epoch_us(m.backtest.open_time)):
+        out.extend(detector.update(m))
+    return out
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+from datetime import date, timedelta
+from typing import Any, Optional
+
+from .match import AuditResult
+from .models import Side, epoch_us
+from .sketch import LogHistogram
+
+GROUP_DIMENSIONS = ("day", "hour", "session", "symbol")
+# Trading sessions by UTC hour (fixed, no DST): Asia 22-07, London 07-13, New York 13-22.
+SESSION_STARTS = ((0, "asia"), (7, "london"), (13, "new_york"), (22, "asia"))
+PIVOT_COLUMNS = (
+    "matched",
+    "missing",
+    "extra",
+    "match_rate",
+    "mean_time_diff_s",
+    "p95_time_diff_s",
+    "mean_slippage",
+    "p50_slippage",
+    "p95_slippage",
+)
+
+_HOUR_US = 3_600_000_000
+_EPOCH_DAY = date(1970, 1, 1)
+_SESSIONS = [
+    next(name for start, name in reversed(SESSION_STARTS) if start <= h) for h in range(24)
+]
+
+# Row kinds in the flattened result columns.
+_MATCHED, _MISSING, _EXTRA = 0, 1, 2
+
+
+def session_of(hour: int) -> str:
+    """Session label of a UTC hour of day (see SESSION_STARTS)."""
+    return _SESSIONS[hour]
+
+
+def parse_group_by(spec: str) -> tuple[str, ...]:
+    """'day,session' -> ("day", "session"); dimensions from GROUP_DIMENSIONS."""
+    return _check_dims(tuple(d.strip() for d in spec.split(",") if d.strip()))
+
+
+def _check_dims(by: tuple[str, ...]) -> tuple[str, ...]:
+    if not by or any(d not in GROUP_DIMENSIONS for d in by) or len(set(by)) != len(by):
+        raise ValueError(
+            f"invalid group-by: {','.join(by)!r} "
+            f"(expected distinct dimensions from {GROUP_DIMENSIONS})"
+        )
+    return by
+
+
+class _Bucket:
+    def __init__(self, rel_accuracy: float):
+        self.counts = [0, 0, 0]  # matched, missing, extra
+        self.time = LogHistogram(rel_accuracy)
+        self.slippage = LogHistogram(rel_accuracy)
+
+    def merge(self, other: _Bucket) -> None:
+        for k in range(3):
+            self.counts[k] += other.counts[k]
+        self.time.merge(other.time)
+        self.slippage.merge(other.slippage)
+
+
+def _columns(res: AuditResult) -> tuple[bytes, list[str], array, array, array]:
+    """
+    Flatten a result into columns: kind, symbol, bucket time (epoch us), time diff
+    and slippage (NaN for unmatched rows). A matched pair and a missing trade are
+    placed at the backtest open time, an extra trade at its live open time.
+    Slippage is the open price diff signed so that positive is adverse
+    (paid more on a BUY, received less on a SELL).
+    """
+    nan = float("nan")
+    kinds = bytearray()
+    symbols: list[str] = []
+    times = array("q")
+    tdiff = array("d")
+    slip = array("d")
+    for m in res.matched:
+        kinds.append(_MATCHED)
+        symbols.append(m.backtest.symbol)
+        times.append(epoch_us(m.backtest.open_time))
+        tdiff.append(m.open_time_diff_s)
+        slip.append(m.open_price_diff if m.backtest.side is Side.BUY else -m.open_price_diff)
+    for kind, trades in ((_MISSING, res.missing_in_live), (_EXTRA, res.extra_in_live)):
+        for t in trades:
+            kinds.append(kind)
+            symbols.append(t.symbol)
+            times.append(epoch_us(t.open_time))
+            tdiff.append(nan)
+            slip.append(nan)
+    return bytes(kinds), symbols, times, tdiff, slip
+
+
+def _aggregate(
+    by: tuple[str, ...],
+    kinds: bytes,
+    symbols: Sequence[str],
+    times: Sequence[int],
+    tdiff: Sequence[float],
+    slip: Sequence[float],
+    rel_accuracy: float,
+) -> dict[tuple, _Bucket]:
+    """
+    One pass over (a slice of) the columns into per-bucket counts and sketches.
+    Every dimension is a function of (symbol, UTC hour), so the bucket is looked
+    up once per such pair and each row costs a single dict hit.
+    """
+    days: dict[int, str] = {}
+    buckets: dict[tuple, _Bucket] = {}
+    by_hour: dict[tuple[str, int], _Bucket] = {}
+    for i, kind in enumerate(kinds):
+        hour = times[i] // _HOUR_US
+        b = by_hour.get((symbols[i], hour))
+        if b is None:
+            key = []
+            for dim in by:
+                if dim == "symbol":
+                    key.append(symbols[i])
+                elif dim == "day":
+                    d = hour // 24
+                    label = days.get(d)
+                    if label is None:
+                        label = days[d] = (_EPOCH_DAY + timedelta(days=d)).isoformat()
+                    key.append(label)
+                elif dim == "hour":
+                    key.append(hour % 24)
+                else:
+                    key.append(_SESSIONS[hour % 24])
+            b = buckets.get(tuple(key))
+            if b is None:
+                b = buckets[tuple(key)] = _Bucket(rel_accuracy)
+            by_hour[(symbols[i], hour)] = b
+        b.counts[kind] += 1
+        if kind == _MATCHED:
+            b.time.add(tdiff[i])
+            b.slippage.add(slip[i])
+    return buckets
+
+
+def pivot_audit(
+    res: AuditResult,
+    by: Sequence[str] = ("day",),
+    workers: int = 1,
+    chunk_size: int = 250_000,
+    rel_accuracy: float = 0.01,
+) -> list[dict[str, Any]]:
+    """
+    Match counts and slippage stats per bucket of an audit result, one row per
+    bucket (sorted by key): the `by` dimensions (day = UTC date, hour = UTC hour
+    of day, session, symbol) followed by PIVOT_COLUMNS. match_rate is
+    matched / (matched + missing); quantiles come from mergeable sketches
+    (relative error rel_accuracy), means are exact.
+
+    With workers > 1, results of more than chunk_size rows are aggregated in
+    chunks in worker processes and the partial buckets merged.
+    """
+    by = _check_dims(tuple(by))
+    kinds, symbols, times, tdiff, slip = _columns(res)
+    n = len(kinds)
+    if workers > 1 and n > chunk_size:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = [
+                ex.submit(
+                    _aggregate,
+                    by,
+                    kinds[a : a + chunk_size],
+                    symbols[a : a + chunk_size],
+                    times[a : a + chunk_size],
+                    tdiff[a : a + chunk_size],
+                    slip[a : a + chunk_size],
+                    rel_accuracy,
+                )
+                for a in range(0, n, chunk_size)
+            ]
+            buckets: dict[tuple, _Bucket] = {}
+            for fut in futures:
+                for k, b in fut.result().items():
+                    if k in buckets:
+                        buckets[k].merge(b)
+                    else:
+                        buckets[k] = b
+    else:
+        buckets = _aggregate(by, kinds, symbols, times, tdiff, slip, rel_accuracy)
+
+    rows = []
+    for k in sorted(buckets):
+        b = buckets[k]
+        matched, missing, extra = b.counts
+        row: dict[str, Any] = dict(zip(by, k))
+        row.update(
+            matched=matched,
+            missing=missing,
+            extra=extra,
+            match_rate=matched / (matched + missing) if matched + missing else None,
+            mean_time_diff_s=b.time.mean,
+            p95_time_diff_s=b.time.quantile(0.95),
+            mean_slippage=b.slippage.mean,
+            p50_slippage=b.slippage.quantile(0.5),
+            p95_slippage=b.slippage.quantile(0.95),
+        )
+        rows.append(row)
+    return rows
+
+
+def format_value(value: Optional[float | int | str]) -> str:
+    """Pivot cell as text: '' for None, 6 decimals for floats."""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6f}"
+    return str(value)
@@ -3,27 +3,34 @@
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-# Conditional import for pandas type hinting
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
-
-from .events import write_jsonl
-from .hashing import compute_config_fingerprint
+from .eventlog import EventLog
+from .hashing import (
+    SIGNAL_ID_VERSION,
+    SIGNAL_ID_VERSIONS,
+    FingerprintCache,
+    compute_params_key,
+)
+from .models import epoch_us, from_epoch_us
 from .schemas import (
     Decision,
     DecisionContext,
+    DecisionSummary,
     ExecutionReport,
     OrderRequest,
+    ParamsSet,
     RunStart,
 )
 from .snapshot import save_bars_snapshot
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+NONE_POLICIES = ("all", "actionable", "sample", "aggregate")
+
 
 class ConsistencyRecorder:
     """
@@ -31,30 +38,134 @@ class ConsistencyRecorder:
     (Aggregates Steps 10, 12, 26, 30-33)
     """
 
-    def __init__(self, root_dir: str | Path, run_id: str):
+    def __init__(
+        self,
+        root_dir: str | Path,
+        run_id: str,
+        rotate_bytes: Optional[int] = None,
+        rotate_interval_s: Optional[float] = None,
+        compress_segments: Optional[str] = None,
+        encoding: str = "jsonl",
+        intern_params: bool = False,
+        signal_id_version: int = SIGNAL_ID_VERSION,
+        none_policy: str = "all",
+        none_sample_every: int = 100,
+        none_summary_interval_s: float = 60.0,
+        writer_id: Optional[str] = None,
+    ):
+        """
+        rotate_bytes / rotate_interval_s: close the active events.jsonl and start a
+        new one once it reaches this size / age. Closed segments are listed in
+        audit/manifest.json (time range, first/last signal_id) and can be
+        compressed with compress_segments ("gz", "zst", ...).
+        encoding="binary" writes the compact binary format (events.bin) instead;
+        binlog.convert_to_jsonl turns it back into JSONL.
+        intern_params=True writes each distinct params dict once as a PARAMS event
+        (again after every rotation) and DECISION events reference it by
+        params_key (a 128-bit digest); iter_events inlines them again on read.
+        signal_id_version=1 keeps generating the original (pre-v2) signal IDs,
+        e.g. to stay comparable with older recordings.
+
+        none_policy controls DECISION events with intent "NONE":
+          all        write every one (default)
+          actionable write none of them
+          sample     write every none_sample_every-th per (symbol, strategy_tag),
+                     tagged sample_weight=N
+          aggregate  write one DECISION_SUMMARY per (symbol, strategy_tag) and
+                     none_summary_interval_s window of decision_time with the count
+        Sampled weights and summary counts keep decision density auditable (see
+        eventlog.decision_counts). Call flush()/close() at shutdown so the last
+        summary window is written.
+
+        writer_id: set a distinct id per process when several processes record
+        into the same run (e.g. one bot per symbol). Each then appends to its own
+        audit/events.<writer_id>.jsonl (own rotation and manifest) and iter_events
+        merges all writers by event time. Without it, processes may still share
+        events.jsonl (appends are single O_APPEND writes) but must not rotate;
+        with encoding="binary" a writer_id per process is required.
+        """
+        if none_policy not in NONE_POLICIES:
+            raise ValueError(
+                f"invalid none_policy: {none_policy!r} (expected one of {NONE_POLICIES})"
+            )
+        if none_sample_every < 1:
+            raise ValueError("none_sample_every must be >= 1")
+        if none_summary_interval_s <= 0:
+            raise ValueError("none_summary_interval_s must be > 0")
+        if signal_id_version not in SIGNAL_ID_VERSIONS:
+            raise ValueError(
+                f"unsupported signal_id version: {signal_id_version!r} "
+                f"(expected one of {SIGNAL_ID_VERSIONS})"
+            )
         self.root = Path(root_dir)
         self.run_id = run_id
+        self.signal_id_version = signal_id_version
         
         # Folder structure (Step 10)
         # output/run_id/audit/events.jsonl
+        # output/run_id/audit/events-000001.jsonl[.gz] + manifest.json (after rotation)
         # output/run_id/audit/snapshots/
         self.audit_dir = self.root / self.run_id / "audit"
-        self.events_path = self.audit_dir / "events.jsonl"
         self.snapshots_dir = self.audit_dir / "snapshots"
 
+        self._log = EventLog(
+            self.audit_dir,
+            max_bytes=rotate_bytes,
+            max_age_s=rotate_interval_s,
+            compress=compress_segments,
+            encoding=encoding,
+            writer_id=writer_id,
+        )
+        self.events_path = self._log.path
+
+        self.intern_params = intern_params
+        self._fingerprint = FingerprintCache()
+        self._params_key = FingerprintCache(compute_params_key)
+        # Params keys already written as PARAMS in the current segment.
+        self._params_written: set[str] = set()
+        self._params_generation = 0
+
+        self.none_policy = none_policy
+        self.none_sample_every = none_sample_every
+        # Sampling counts per (symbol, strategy_tag) so interleaved streams
+        # cannot alias with the sampling period.
+        self._none_seen: dict[tuple[str, str], int] = {}
+        self._summary_us = int(none_summary_interval_s * 1_000_000)
+        # (symbol, strategy_tag) -> [window index, count, first time, last time]
+        self._none_windows: dict[tuple[str, str], list] = {}
+
+    def rotate(self) -> Optional[Path]:
+        """Force a segment boundary (e.g. at session end). Returns the closed segment."""
+        self.flush()
+        return self._log.rotate()
+
+    def flush(self) -> None:
+        """Write pending DECISION_SUMMARY events (none_policy="aggregate")."""
+        try:
+            for key in list(self._none_windows):
+                self._write_summary(key, self._none_windows.pop(key))
+        except Exception:
+            logger.exception("Failed to flush decision summaries")
+
+    def close(self) -> None:
+        """Flush pending summaries and close the event log file."""
+        self.flush()
+        self._log.close()
+
     def log_startup(self, config: dict, app_version: str = "0.0.0") -> None:
         """
         Step 12: Log the RunStart event.
         """
         try:
-            fingerprint = compute_config_fingerprint(config)
+            fingerprint = self._fingerprint(config)
             ev = RunStart(
                 run_id=self.run_id,
                 timestamp=datetime.now(timezone.utc),
                 app_version=app_version,
                 config_fingerprint=fingerprint,
+                signal_id_version=self.signal_id_version,
             )
-            write_jsonl(self.events_path, ev.to_event())
+            self._log.append(ev.to_event(), ts=ev.timestamp)
         except Exception:
             logger.exception("Failed to log startup event")
 
@@ -69,9 +180,24 @@ class ConsistencyRecorder:
     ) -> str:
         """
         Step 19 & 26: Log a decision and optionally snapshot data.
-        Returns: signal_id (Step 23)
+        Returns: signal_id (Step 23), or "" for a NONE decision that none_policy
+        does not write (its ID is never computed).
         """
         try:
+            sample_weight = None
+            if intent == "NONE" and self.none_policy != "all":
+                if self.none_policy == "actionable":
+                    return ""
+                if self.none_policy == "aggregate":
+                    self._count_none(context)
+                    return ""
+                key = (context.symbol, context.strategy_tag)
+                seen = self._none_seen.get(key, 0)
+                self._none_seen[key] = seen + 1
+                if seen % self.none_sample_every:
+                    return ""
+                sample_weight = self.none_sample_every
+
             # 1. Create the Decision object (auto-generates signal_id)
             decision = Decision(
                 context=context,
@@ -79,18 +205,28 @@ class ConsistencyRecorder:
                 suggested_price=suggested_price,
                 suggested_sl=suggested_sl,
                 suggested_tp=suggested_tp,
+                signal_id_version=self.signal_id_version,
             )
 
             # 2. Snapshot logic (Step 26: Snapshot only if actionable)
             # We snapshot if intent is NOT 'NONE' (actionable) AND bars are provided.
             if intent != "NONE" and bars is not None and not bars.empty:
                 fname = save_bars_snapshot(
-                    self.snapshots_dir, decision.signal_id, bars
+                    self.snapshots_dir, decision.signal_id, bars, bars_hash=context.bars_hash
                 )
                 decision.snapshot_path = fname
 
             # 3. Write to log
-            write_jsonl(self.events_path, decision.to_event())
+            params_key = self._params_ref(context) if self.intern_params else None
+            ev = decision.to_event(params_key)
+            if sample_weight is not None:
+                ev["sample_weight"] = sample_weight
+            self._log.append(
+                ev,
+                ts=context.decision_time,
+                signal_id=decision.signal_id,
+                rotate=params_key is None,
+            )
 
             return decision.signal_id
 
@@ -98,16 +234,68 @@ class ConsistencyRecorder:
             logger.exception("Failed to log decision")
             return "error_id"
 
+    def _count_none(self, context: DecisionContext) -> None:
+        key = (context.symbol, context.strategy_tag)
+        t = epoch_us(context.decision_time)
+        window = t // self._summary_us
+        cur = self._none_windows.get(key)
+        if cur is not None and cur[0] != window:
+            self._write_summary(key, cur)
+            cur = None
+        if cur is None:
+            self._none_windows[key] = [window, 1, context.decision_time, context.decision_time]
+            return
+        cur[1] += 1
+        cur[2] = min(cur[2], context.decision_time)
+        cur[3] = max(cur[3], context.decision_time)
+
+    def _write_summary(self, key: tuple[str, str], state: list) -> None:
+        window, count, first, last = state
+        ev = DecisionSummary(
+            symbol=key[0],
+            strategy_tag=key[1],
+            window_start=from_epoch_us(window * self._summary_us),
+            window_end=from_epoch_us((window + 1) * self._summary_us),
+            intent="NONE",
+            count=count,
+            first_decision_time=first,
+            last_decision_time=last,
+        )
+        self._log.append(ev.to_event(), ts=ev.window_start)
+
+    def _params_ref(self, context: DecisionContext) -> str:
+        """
+        params_key of context.params, writing its PARAMS event first if the
+        current segment does not have it yet. The caller must append the
+        DECISION with rotate=False so both land in the same segment.
+        """
+        key = self._params_key(context.params)
+        self._log.maybe_rotate()
+        if self._log.generation != self._params_generation:
+            self._params_written.clear()
+            self._params_generation = self._log.generation
+        if key not in self._params_written:
+            ev = ParamsSet(
+                params_key=key,
+                params_fingerprint=self._fingerprint(context.params),
+                timestamp=context.decision_time,
+                strategy_tag=context.strategy_tag,
+                params=context.params,
+            )
+            self._log.append(ev.to_event(), ts=ev.timestamp, rotate=False)
+            self._params_written.add(key)
+        return key
+
     def log_order_request(self, req: OrderRequest) -> None:
         """Step 30: Log that we tried to send an order."""
         try:
-            write_jsonl(self.events_path, req.to_event())
+            self._log.append(req.to_event(), ts=req.timestamp, signal_id=req.signal_id)
         except Exception:
             logger.exception("Failed to log order request")
 
     def log_execution(self, report: ExecutionReport) -> None:
         """Step 32-33: Log a fill or rejection."""
         try:
-            write_jsonl(self.events_path, report.to_event())
+            self._log.append(report.to_event(), ts=report.timestamp, signal_id=report.signal_id)
         except Exception:
             logger.exception("Failed to log execution report")
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import importlib
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .eventlog import iter_events
+from .events import MismatchReason
+from .hashing import compute_params_key
+from .snapshot import Reader, snapshot_store
+
+# strategy(frames, contexts, params) -> [(intent, suggested_price), ...], one per frame.
+# frames[i] is the loaded snapshot of decision i, contexts[i] its logged context dict.
+Strategy = Callable[[Sequence[Any], Sequence[dict], dict], Sequence[tuple[str, Optional[float]]]]
+
+MATCH = "MATCH"
+MISMATCH = "MISMATCH"
+NO_SNAPSHOT = "NO_SNAPSHOT"
+
+
+def load_strategy(spec: str) -> Strategy:
+    """Resolve "package.module:function" to the strategy callable."""
+    return load_callable(spec, "strategy")
+
+
+def load_callable(spec: str, what: str = "function") -> Callable:
+    """Resolve "package.module:function" to a callable; `what` names it in errors."""
+    mod_name, sep, func_name = spec.partition(":")
+    if not sep or not mod_name or not func_name:
+        raise ValueError(f"invalid {what}: {spec!r} (expected module:function)")
+    try:
+        fn = getattr(importlib.import_module(mod_name), func_name)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"cannot load {what} {spec!r}: {e}") from None
+    if not callable(fn):
+        raise ValueError(f"{what} {spec!r} is not callable")
+    return fn
+
+
+@dataclass
+class ReplayOutcome:
+    signal_id: str
+    symbol: str
+    decision_time: str
+    logged_intent: str
+    replayed_intent: Optional[str]
+    logged_price: Optional[float]
+    replayed_price: Optional[float]
+    status: str  # MATCH, MISMATCH or NO_SNAPSHOT
+    reason: Optional[MismatchReason] = None
+
+
+@dataclass
+class ReplayResult:
+    outcomes: list[ReplayOutcome] = field(default_factory=list)
+
+    @property
+    def mismatches(self) -> list[ReplayOutcome]:
+        return [o for o in self.outcomes if o.status == MISMATCH]
+
+    def counts(self) -> dict[str, int]:
+        """Outcome counts by status, plus one entry per mismatch reason."""
+        out = {MATCH: 0, MISMATCH: 0, NO_SNAPSHOT: 0}
+        for o in self.outcomes:
+            out[o.status] += 1
+            if o.reason is not None:
+                out[o.reason.value] = out.get(o.reason.value, 0) + 1
+        return out
+
+
+@dataclass
+class _Batch:
+    audit_dir: Path
+    files: list[str]
+    contexts: list[dict]
+    logged: list[tuple[str, Optional[float]]]
+    params: dict  # params to replay with
+    logged_params: Optional[dict]
+    strategy: Strategy
+    reader: Optional[Reader]
+    price_tolerance: float
+    cache_size: int
+
+
+def _same(a: tuple[str, Optional[float]], b: tuple[str, Optional[float]], tol: float) -> bool:
+    if a[0] != b[0]:
+        return False
+    if a[1] is None:
+        return True  # nothing logged to compare the price against
+    return b[1] is not None and abs(float(a[1]) - float(b[1])) <= tol
+
+
+def _run(strategy: Strategy, frames: list, contexts: list[dict], params: dict) -> list:
+    out = list(strategy(frames, contexts, params))
+    if len(out) != len(frames):
+        raise ValueError(f"strategy returned {len(out)} results for {len(frames)} decisions")
+    return [(str(intent), None if price is None else float(price)) for intent, price in out]
+
+
+def _replay_batch(b: _Batch) -> list[tuple[tuple[str, Optional[float]], Optional[MismatchReason]]]:
+    """
+    Replay one batch with b.params. Mismatching decisions are re-run with the
+    params that were logged: if that reproduces them the config changed
+    (PARAM_DRIFT), otherwise the inputs did (DATA_DRIFT).
+    """
+    # The process's shared store: worker processes keep its frames across batches.
+    store = snapshot_store(b.audit_dir, reader=b.reader)
+    store.cache_size = b.cache_size
+    frames = [frame for frame, _ in store.read_files(b.files)]
+    replayed = _run(b.strategy, frames, b.contexts, b.params)
+
+    reasons: list[Optional[MismatchReason]] = [None] * len(frames)
+    bad = [i for i, r in enumerate(replayed) if not _same(b.logged[i], r, b.price_tolerance)]
+    if not bad:
+        return list(zip(replayed, reasons))
+
+    if b.logged_params is None:
+        for i in bad:
+            reasons[i] = MismatchReason.UNKNOWN
+    elif compute_params_key(b.logged_params) == compute_params_key(b.params):
+        for i in bad:
+            reasons[i] = MismatchReason.DATA_DRIFT
+    else:
+        again = _run(
+            b.strategy, [frames[i] for i in bad], [b.contexts[i] for i in bad], b.logged_params
+        )
+        for i, r in zip(bad, again):
+            same = _same(b.logged[i], r, b.price_tolerance)
+            reasons[i] = MismatchReason.PARAM_DRIFT if same else MismatchReason.DATA_DRIFT
+    return list(zip(replayed, reasons))
+
+
+def replay_decisions(
+    audit_dir: str | Path,
+    strategy: Strategy,
+    params: Optional[dict] = None,
+    workers: int = 1,
+    batch_size: int = 256,
+    price_tolerance: float = 1e-9,
+    reader: Optional[Reader] = None,
+    cache_size: int = 256,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> ReplayResult:
+    """
+    Re-run `strategy` over the bar snapshots of logged DECISION events and
+    compare the reproduced (intent, suggested price) with what was logged.
+
+    params: config to replay with (default: each decision's logged params).
+    Decisions are batched per logged params set (batch_size at a time) so the
+    strategy can evaluate many snapshots in one vectorized call; with
+    workers > 1 batches run in a process pool (strategy and reader must then
+    be importable module-level functions). Snapshots are read through the
+    process's snapshot.SnapshotStore (reader: see snapshot.Reader, default
+    read_parquet_snapshot), whose LRU keeps loaded frames. Actionable
+    decisions without a snapshot are reported as NO_SNAPSHOT; NONE decisions
+    without one are skipped.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    audit = Path(audit_dir)
+
+    outcomes: list[ReplayOutcome] = []
+    # logged params key -> (logged params, [(outcome index, file, ctx, logged)])
+    groups: dict[Optional[str], tuple[Optional[dict], list]] = {}
+    for ev in iter_events(audit, start=start, end=end):
+        if ev.get("event_type") != "DECISION":
+            continue
+        ctx = ev.get("context") or {}
+        intent = ev.get("intent")
+        snap = ev.get("snapshot_path")
+        if not snap and intent == "NONE":
+            continue
+        price = (ev.get("suggested") or {}).get("price")
+        outcome = ReplayOutcome(
+            signal_id=ev.get("signal_id", ""),
+            symbol=ctx.get("symbol", ""),
+            decision_time=ctx.get("decision_time", ""),
+            logged_intent=intent,
+            replayed_intent=None,
+            logged_price=price,
+            replayed_price=None,
+            status=NO_SNAPSHOT,
+        )
+        outcomes.append(outcome)
+        if not snap:
+            continue
+        logged_params = ctx.get("params")
+        key = None if logged_params is None else compute_params_key(logged_params)
+        group = groups.setdefault(key, (logged_params, []))
+        group[1].append((len(outcomes) - 1, snap, ctx, (intent, price)))
+
+    batches: list[_Batch] = []
+    index: list[list[int]] = []
+    for logged_params, items in groups.values():
+        replay_params = params if params is not None else (logged_params or {})
+        for lo in range(0, len(items), batch_size):
+            chunk = items[lo : lo + batch_size]
+            index.append([i for i, _, _, _ in chunk])
+            batches.append(
+                _Batch(
+                    audit_dir=audit,
+                    files=[f for _, f, _, _ in chunk],
+                    contexts=[c for _, _, c, _ in chunk],
+                    logged=[x for _, _, _, x in chunk],
+                    params=replay_params,
+                    logged_params=logged_params,
+                    strategy=strategy,
+                    reader=reader,
+                    price_tolerance=price_tolerance,
+                    cache_size=cache_size,
+                )
+            )
+
+    if workers > 1 and len(batches) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as ex:
+            results = list(ex.map(_replay_batch, batches))
+    else:
+        results = [_replay_batch(b) for b in batches]
+
+    for idxs, res in zip(index, results):
+        for i, ((intent, price), reason) in zip(idxs, res):
+            o = outcomes[i]
+            o.replayed_intent = intent
+            o.replayed_price = price
+            o.status = MATCH if reason is None else MISMATCH
+            o.reason = reason
+    return ReplayResult(outcomes)
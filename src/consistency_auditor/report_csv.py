@@ -1,36 +1,206 @@
 from __future__ import annotations
 
 import csv
+from collections.abc import Sequence
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+from .compression import open_text, with_compression_suffix
 from .match import AuditResult
 
+if TYPE_CHECKING:
+    from .fanout import FanoutResult
+    from .outliers import Outlier
+    from .replay import ReplayResult
+
 
 def _default_prefix() -> str:
     return datetime.utcnow().strftime("%Y%m%d_%H%M%S")
 
 
+_UNMATCHED_FIELDS = ["bucket", "symbol", "side", "trade_id", "open_time", "open_price", "source"]
+
+
+class AuditCsvWriter:
+    """
+    Streaming writer of matched_<prefix>.csv and unmatched_<prefix>.csv (see
+    write_audit_csv): both files stay open and every write(res) appends the
+    rows of one (partial) result, so results can be written bucket by bucket
+    (e.g. from match.audit_sorted) without being collected first.
+    """
+
+    def __init__(
+        self,
+        out_dir: str | Path,
+        prefix: str | None = None,
+        compression: str | None = None,
+        partial_fills: bool = False,
+    ):
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+
+        px = (prefix or "").strip() or _default_prefix()
+
+        self.matched_path = with_compression_suffix(out / f"matched_{px}.csv", compression)
+        self.unmatched_path = with_compression_suffix(out / f"unmatched_{px}.csv", compression)
+        self.partial_fills = partial_fills
+
+        fieldnames = [
+            "symbol",
+            "side",
+            "bt_trade_id",
+            "lv_trade_id",
+            "bt_open_time",
+            "lv_open_time",
+            "open_time_diff_s",
+            "bt_open_price",
+            "lv_open_price",
+            "open_price_diff",
+        ]
+        if partial_fills:
+            fieldnames += ["bt_volume", "lv_volume", "fill_count", "under_filled"]
+        self._matched_f = open_text(self.matched_path, "w", compression=compression, newline="")
+        self._unmatched_f = open_text(
+            self.unmatched_path, "w", compression=compression, newline=""
+        )
+        self._matched = csv.DictWriter(self._matched_f, fieldnames=fieldnames)
+        self._unmatched = csv.DictWriter(self._unmatched_f, fieldnames=_UNMATCHED_FIELDS)
+        self._matched.writeheader()
+        self._unmatched.writeheader()
+
+    def write(self, res: AuditResult) -> None:
+        """Append the matched pairs, then missing_in_live and extra_in_live of res."""
+        for m in res.matched:
+            row = {
+                "symbol": m.backtest.symbol,
+                "side": m.backtest.side.value,
+                "bt_trade_id": m.backtest.trade_id or "",
+                "lv_trade_id": m.live.trade_id or "",
+                "bt_open_time": m.backtest.open_time.isoformat(),
+                "lv_open_time": m.live.open_time.isoformat(),
+                "open_time_diff_s": f"{m.open_time_diff_s:.6f}",
+                "bt_open_price": f"{m.backtest.open_price:.6f}",
+                "lv_open_price": f"{m.live.open_price:.6f}",
+                "open_price_diff": f"{m.open_price_diff:+.6f}",
+            }
+            if self.partial_fills:
+                row["bt_volume"] = "" if m.backtest.volume is None else m.backtest.volume
+                row["lv_volume"] = "" if m.live.volume is None else m.live.volume
+                row["fill_count"] = m.fill_count
+                row["under_filled"] = int(m.under_filled)
+            self._matched.writerow(row)
+
+        for bucket, trades in (
+            ("missing_in_live", res.missing_in_live),
+            ("extra_in_live", res.extra_in_live),
+        ):
+            for t in trades:
+                self._unmatched.writerow(
+                    {
+                        "bucket": bucket,
+                        "symbol": t.symbol,
+                        "side": t.side.value,
+                        "trade_id": t.trade_id or "",
+                        "open_time": t.open_time.isoformat(),
+                        "open_price": f"{t.open_price:.6f}",
+                        "source": t.source,
+                    }
+                )
+
+    def close(self) -> None:
+        self._matched_f.close()
+        self._unmatched_f.close()
+
+    def __enter__(self) -> AuditCsvWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
 def write_audit_csv(
     res: AuditResult,
     out_dir: str | Path,
     prefix: str | None = None,
+    compression: str | None = None,
+    partial_fills: bool = False,
 ) -> tuple[Path, Path]:
     """
     Write:
-      - matched_<prefix>.csv: one row per matched pair
+      - matched_<prefix>.csv: one row per matched pair; with partial_fills
+        also bt_volume, lv_volume (total of all fills; lv_* = VWAP when
+        fill_count > 1), fill_count and under_filled (1 if the fills cover
+        less than bt_volume)
       - unmatched_<prefix>.csv: missing_in_live + extra_in_live
+    With compression ("gz", "zst", ...) the files get the matching extra suffix.
     Returns (matched_path, unmatched_path).
     """
+    with AuditCsvWriter(out_dir, prefix, compression, partial_fills) as w:
+        w.write(res)
+    return w.matched_path, w.unmatched_path
+
+
+def write_id_conflicts_csv(
+    res: AuditResult,
+    out_dir: str | Path,
+    prefix: str | None = None,
+    compression: str | None = None,
+) -> Path:
+    """
+    Write id_conflicts_<prefix>.csv: one row per trade involved in an id
+    conflict (see match.link_ids), grouped by id. Returns the path written.
+    """
     out = Path(out_dir)
     out.mkdir(parents=True, exist_ok=True)
 
     px = (prefix or "").strip() or _default_prefix()
+    path = with_compression_suffix(out / f"id_conflicts_{px}.csv", compression)
+
+    with open_text(path, "w", compression=compression, newline="") as f:
+        w = csv.DictWriter(
+            f,
+            fieldnames=[
+                "id", "reason", "source", "symbol", "side", "trade_id", "open_time", "open_price"
+            ],
+        )
+        w.writeheader()
+        for c in res.id_conflicts:
+            for t in (*c.backtest, *c.live):
+                w.writerow(
+                    {
+                        "id": c.key,
+                        "reason": c.reason,
+                        "source": t.source,
+                        "symbol": t.symbol,
+                        "side": t.side.value,
+                        "trade_id": t.trade_id or "",
+                        "open_time": t.open_time.isoformat(),
+                        "open_price": f"{t.open_price:.6f}",
+                    }
+                )
 
-    matched_path = out / f"matched_{px}.csv"
-    unmatched_path = out / f"unmatched_{px}.csv"
+    return path
 
-    with matched_path.open("w", encoding="utf-8", newline="") as f:
+
+def write_outliers_csv(
+    outliers: list[Outlier],
+    out_dir: str | Path,
+    prefix: str | None = None,
+    compression: str | None = None,
+) -> Path:
+    """
+    Write outliers_<prefix>.csv: one row per flagged (match, metric) of
+    outliers.find_outliers, with the window median/MAD it was scored against.
+    Returns the path written.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    px = (prefix or "").strip() or _default_prefix()
+    path = with_compression_suffix(out / f"outliers_{px}.csv", compression)
+
+    with open_text(path, "w", compression=compression, newline="") as f:
         w = csv.DictWriter(
             f,
             fieldnames=[
@@ -40,14 +210,16 @@ def write_audit_csv(
                 "lv_trade_id",
                 "bt_open_time",
                 "lv_open_time",
-                "open_time_diff_s",
-                "bt_open_price",
-                "lv_open_price",
-                "open_price_diff",
+                "metric",
+                "value",
+                "median",
+                "mad",
+                "score",
             ],
         )
         w.writeheader()
-        for m in res.matched:
+        for o in outliers:
+            m = o.match
             w.writerow(
                 {
                     "symbol": m.backtest.symbol,
@@ -56,52 +228,165 @@ def write_audit_csv(
                     "lv_trade_id": m.live.trade_id or "",
                     "bt_open_time": m.backtest.open_time.isoformat(),
                     "lv_open_time": m.live.open_time.isoformat(),
-                    "open_time_diff_s": f"{m.open_time_diff_s:.6f}",
-                    "bt_open_price": f"{m.backtest.open_price:.6f}",
-                    "lv_open_price": f"{m.live.open_price:.6f}",
-                    "open_price_diff": f"{m.open_price_diff:+.6f}",
+                    "metric": o.metric,
+                    "value": f"{o.value:+.6f}",
+                    "median": f"{o.median:+.6f}",
+                    "mad": f"{o.mad:.6f}",
+                    "score": f"{o.score:+.2f}",
                 }
             )
 
-    with unmatched_path.open("w", encoding="utf-8", newline="") as f:
+    return path
+
+
+def write_pivot(
+    rows: list[dict[str, Any]],
+    by: Sequence[str],
+    out_dir: str | Path,
+    prefix: str | None = None,
+    compression: str | None = None,
+    fmt: str = "csv",
+) -> Path:
+    """
+    Write pivot_<prefix>.csv (or .parquet with fmt="parquet"): one row per
+    bucket of pivot.pivot_audit, the `by` columns first. Empty cells are None.
+    Parquet needs pyarrow and ignores `compression` (it compresses internally).
+    Returns the path written.
+    """
+    from .pivot import PIVOT_COLUMNS, format_value
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    px = (prefix or "").strip() or _default_prefix()
+    columns = [*by, *PIVOT_COLUMNS]
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required for Parquet output. pip install pyarrow"
+            ) from None
+        path = out / f"pivot_{px}.parquet"
+        table = pa.table({c: [row[c] for row in rows] for c in columns})
+        pq.write_table(table, path)
+        return path
+    if fmt != "csv":
+        raise ValueError(f"invalid pivot format: {fmt!r} (expected csv or parquet)")
+
+    path = with_compression_suffix(out / f"pivot_{px}.csv", compression)
+    with open_text(path, "w", compression=compression, newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for row in rows:
+            w.writerow([format_value(row[c]) for c in columns])
+
+    return path
+
+
+def write_divergence_csv(
+    fr: FanoutResult,
+    out_dir: str | Path,
+    prefix: str | None = None,
+    compression: str | None = None,
+) -> Path:
+    """
+    Write divergence_<prefix>.csv: one row per backtest trade of a fan-out
+    audit (fanout.audit_fanout), with how many accounts matched it, the accounts
+    missing it and the spread of the matched live open prices/times.
+    Returns the path written.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    px = (prefix or "").strip() or _default_prefix()
+    path = with_compression_suffix(out / f"divergence_{px}.csv", compression)
+
+    with open_text(path, "w", compression=compression, newline="") as f:
         w = csv.DictWriter(
             f,
             fieldnames=[
-                "bucket",
                 "symbol",
                 "side",
-                "trade_id",
-                "open_time",
-                "open_price",
-                "source",
+                "bt_trade_id",
+                "bt_open_time",
+                "bt_open_price",
+                "matched_accounts",
+                "missing_accounts",
+                "price_spread",
+                "time_spread_s",
             ],
         )
         w.writeheader()
-
-        for t in res.missing_in_live:
+        for d in fr.divergence:
+            bt = d.backtest
             w.writerow(
                 {
-                    "bucket": "missing_in_live",
-                    "symbol": t.symbol,
-                    "side": t.side.value,
-                    "trade_id": t.trade_id or "",
-                    "open_time": t.open_time.isoformat(),
-                    "open_price": f"{t.open_price:.6f}",
-                    "source": t.source,
+                    "symbol": bt.symbol,
+                    "side": bt.side.value,
+                    "bt_trade_id": bt.trade_id or "",
+                    "bt_open_time": bt.open_time.isoformat(),
+                    "bt_open_price": f"{bt.open_price:.6f}",
+                    "matched_accounts": d.matched,
+                    "missing_accounts": ";".join(d.missing_accounts),
+                    "price_spread": f"{d.price_spread:.6f}",
+                    "time_spread_s": f"{d.time_spread_s:.3f}",
                 }
             )
 
-        for t in res.extra_in_live:
+    return path
+
+
+def write_replay_csv(
+    res: ReplayResult,
+    out_dir: str | Path,
+    prefix: str | None = None,
+    compression: str | None = None,
+) -> Path:
+    """
+    Write replay_<prefix>.csv: one row per replayed decision (see replay.replay_decisions).
+    Returns the path written.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    px = (prefix or "").strip() or _default_prefix()
+    path = with_compression_suffix(out / f"replay_{px}.csv", compression)
+
+    def fmt(price):
+        return "" if price is None else f"{price:.6f}"
+
+    with open_text(path, "w", compression=compression, newline="") as f:
+        w = csv.DictWriter(
+            f,
+            fieldnames=[
+                "signal_id",
+                "symbol",
+                "decision_time",
+                "status",
+                "reason",
+                "logged_intent",
+                "replayed_intent",
+                "logged_price",
+                "replayed_price",
+            ],
+        )
+        w.writeheader()
+        for o in res.outcomes:
             w.writerow(
                 {
-                    "bucket": "extra_in_live",
-                    "symbol": t.symbol,
-                    "side": t.side.value,
-                    "trade_id": t.trade_id or "",
-                    "open_time": t.open_time.isoformat(),
-                    "open_price": f"{t.open_price:.6f}",
-                    "source": t.source,
+                    "signal_id": o.signal_id,
+                    "symbol": o.symbol,
+                    "decision_time": o.decision_time,
+                    "status": o.status,
+                    "reason": o.reason.value if o.reason else "",
+                    "logged_intent": o.logged_intent,
+                    "replayed_intent": o.replayed_intent or "",
+                    "logged_price": fmt(o.logged_price),
+                    "replayed_price": fmt(o.replayed_price),
                 }
             )
 
-    return matched_path, unmatched_path
\ No newline at end of file
+    return path
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Optional
 
-from .hashing import compute_signal_id
+from .hashing import SIGNAL_ID_VERSION, compute_signal_id
 
 
 @dataclass
@@ -29,8 +29,12 @@ class DecisionContext:
     bars_hash: str      # Hash of the OHLCV data used
     features_hash: str  # Hash of calculated indicators
 
-    def to_dict(self) -> dict[str, Any]:
-        return {
+    def to_dict(self, params_key: Optional[str] = None) -> dict[str, Any]:
+        """
+        With params_key, params are referenced by that key instead of inlined
+        (the full dict lives in a PARAMS event, see ParamsSet).
+        """
+        d = {
             "symbol": self.symbol,
             "decision_time": self.decision_time.isoformat(),
             "bid": self.bid,
@@ -41,6 +45,10 @@ class DecisionContext:
             "bars_hash": self.bars_hash,
             "features_hash": self.features_hash,
         }
+        if params_key is not None:
+            del d["params"]
+            d["params_key"] = params_key
+        return d
 
 
 @dataclass
@@ -52,9 +60,6 @@ class Decision:
     context: DecisionContext
     intent: str  # BUY, SELL, NONE
 
-    # This ID is auto-calculated in __post_init__
-    signal_id: str = field(init=False)
-
     # Optional execution details if intent != NONE
     suggested_price: Optional[float] = None
     suggested_sl: Optional[float] = None
@@ -63,22 +68,41 @@ class Decision:
     # Pointer to full data snapshot (Step 29)
     snapshot_path: Optional[str] = None
 
+    # signal_id scheme (see compute_signal_id); 1 reproduces pre-v2 IDs
+    signal_id_version: int = SIGNAL_ID_VERSION
+
+    _signal_id: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
     def __post_init__(self):
-        # Auto-generate ID immediately upon creation (Steps 23 & 24)
-        self.signal_id = compute_signal_id(
+        # Actionable decisions get their ID immediately (Steps 23 & 24); NONE
+        # decisions (the vast majority) only when signal_id is first read, which
+        # to_event does: the recorder skips the hash only for NONE decisions its
+        # none_policy drops before building the Decision.
+        if self.intent != "NONE":
+            self._signal_id = self._compute_signal_id()
+
+    def _compute_signal_id(self) -> str:
+        return compute_signal_id(
             symbol=self.context.symbol,
             decision_time=self.context.decision_time,
             side=self.intent,
             strategy_tag=self.context.strategy_tag,
-            bars_hash=self.context.bars_hash
+            bars_hash=self.context.bars_hash,
+            version=self.signal_id_version,
         )
 
-    def to_event(self) -> dict[str, Any]:
+    @property
+    def signal_id(self) -> str:
+        if self._signal_id is None:
+            self._signal_id = self._compute_signal_id()
+        return self._signal_id
+
+    def to_event(self, params_key: Optional[str] = None) -> dict[str, Any]:
         return {
             "event_type": "DECISION",
             "signal_id": self.signal_id,
             "intent": self.intent,
-            "context": self.context.to_dict(),
+            "context": self.context.to_dict(params_key),
             "suggested": {
                 "price": self.suggested_price,
                 "sl": self.suggested_sl,
@@ -88,6 +112,35 @@ class Decision:
         }
 
 
+@dataclass
+class DecisionSummary:
+    """
+    Count of unlogged decisions for one (symbol, strategy_tag) and time window
+    (recorder none_policy="aggregate").
+    """
+    symbol: str
+    strategy_tag: str
+    window_start: datetime
+    window_end: datetime
+    intent: str
+    count: int
+    first_decision_time: datetime
+    last_decision_time: datetime
+
+    def to_event(self) -> dict[str, Any]:
+        return {
+            "event_type": "DECISION_SUMMARY",
+            "timestamp": self.window_start.isoformat(),
+            "window_end": self.window_end.isoformat(),
+            "symbol": self.symbol,
+            "strategy_tag": self.strategy_tag,
+            "intent": self.intent,
+            "count": self.count,
+            "first_decision_time": self.first_decision_time.isoformat(),
+            "last_decision_time": self.last_decision_time.isoformat(),
+        }
+
+
 @dataclass
 class RunStart:
     """
@@ -97,6 +150,7 @@ class RunStart:
     timestamp: datetime
     app_version: str
     config_fingerprint: str  # from compute_config_fingerprint
+    signal_id_version: int = SIGNAL_ID_VERSION
 
     def to_event(self) -> dict[str, Any]:
         return {
@@ -105,6 +159,31 @@ class RunStart:
             "timestamp": self.timestamp.isoformat(),
             "app_version": self.app_version,
             "config_fingerprint": self.config_fingerprint,
+            "signal_id_version": self.signal_id_version,
+        }
+
+
+@dataclass
+class ParamsSet:
+    """
+    The full params dict, written once per params_key (and log segment) when
+    the recorder interns params; DECISION events then carry only the key.
+    params_fingerprint is the short config fingerprint, for display.
+    """
+    params_key: str  # from compute_params_key
+    params_fingerprint: str
+    timestamp: datetime
+    strategy_tag: str
+    params: dict[str, Any]
+
+    def to_event(self) -> dict[str, Any]:
+        return {
+            "event_type": "PARAMS",
+            "params_key": self.params_key,
+            "params_fingerprint": self.params_fingerprint,
+            "timestamp": self.timestamp.isoformat(),
+            "strategy_tag": self.strategy_tag,
+            "params": self.params,
         }
 
 
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .io_csv import _row_to_trade, read_trades_csv
+from .match import AuditResult, BacktestIndex, audit_trades, parse_weights
+from .models import Trade
+
+DEFAULT_CACHE_BYTES = 512 << 20
+# Rough resident size of one parsed trade plus its index entries (measured ~450-550).
+TRADE_BYTES = 600
+MAX_BODY_BYTES = 64 << 20
+
+
+class BacktestCache:
+    """
+    Thread-safe LRU of indexed backtest sets, keyed by file path.
+
+    An entry is reloaded when the file's mtime/size change. Entries are evicted
+    least recently used first once their estimated size (TRADE_BYTES per trade)
+    exceeds max_bytes; the most recent entry is always kept. Concurrent
+    requests for the same cold file parse it once. `symbols` maps symbol
+    names while reading (see symbols.SymbolMapper).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        loader: Optional[Callable[[Path], list[Trade]]] = None,
+        symbols: Optional[Callable[[str], str]] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.loader = loader or (lambda p: read_trades_csv(p, source="backtest", symbols=symbols))
+        self._items: OrderedDict[str, tuple[tuple[int, int], BacktestIndex]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[str, threading.Lock] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str | Path) -> tuple[BacktestIndex, bool]:
+        """(index, cache hit) for a backtest CSV."""
+        p = Path(path).resolve()
+        key = str(p)
+        st = p.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        hit = self._lookup(key, stamp)
+        if hit is not None:
+            return hit, True
+
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            try:
+                hit = self._lookup(key, stamp)  # another request may have loaded it meanwhile
+                if hit is not None:
+                    return hit, True
+                index = BacktestIndex(self.loader(p))
+                with self._lock:
+                    self.misses += 1
+                    self._drop(key)
+                    self._items[key] = (stamp, index)
+                    self.bytes += len(index) * TRADE_BYTES
+                    while self.bytes > self.max_bytes and len(self._items) > 1:
+                        self._drop(next(iter(self._items)))
+                        self.evictions += 1
+            finally:
+                # Also when the loader raises: a failed path must not leave its lock behind.
+                with self._lock:
+                    if self._loading.get(key) is load_lock:
+                        del self._loading[key]
+        return index, False
+
+    def _lookup(self, key: str, stamp: tuple[int, int]) -> Optional[BacktestIndex]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] != stamp:
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def _drop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.bytes -= len(item[1]) * TRADE_BYTES
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "files": list(self._items),
+            }
+
+
+def _trade_json(t: Trade) -> dict[str, Any]:
+    return {
+        "symbol": t.symbol,
+        "side": t.side.value,
+        "trade_id": t.trade_id,
+        "open_time": t.open_time.isoformat(),
+        "open_price": t.open_price,
+        "volume": t.volume,
+    }
+
+
+def result_json(res: AuditResult, details: bool = True) -> dict[str, Any]:
+    """JSON-ready summary (and, with details, the rows) of an audit result."""
+    n = len(res.matched)
+    out: dict[str, Any] = {
+        "matched": n,
+        "missing_in_live": len(res.missing_in_live),
+        "extra_in_live": len(res.extra_in_live),
+        "id_conflicts": len(res.id_conflicts),
+        "mean_open_time_diff_s": sum(m.open_time_diff_s for m in res.matched) / n if n else 0.0,
+        "mean_abs_open_price_diff": (
+            sum(abs(m.open_price_diff) for m in res.matched) / n if n else 0.0
+        ),
+    }
+    if details:
+        out["matches"] = [
+            {
+                "backtest": _trade_json(m.backtest),
+                "live": _trade_json(m.live),
+                "open_time_diff_s": m.open_time_diff_s,
+                "open_price_diff": m.open_price_diff,
+                "fill_count": m.fill_count,
+                "under_filled": m.under_filled,
+            }
+            for m in res.matched
+        ]
+        out["missing"] = [_trade_json(t) for t in res.missing_in_live]
+        out["extra"] = [_trade_json(t) for t in res.extra_in_live]
+        out["conflicts"] = [
+            {
+                "id": c.key,
+                "reason": c.reason,
+                "backtest": [_trade_json(t) for t in c.backtest],
+                "live": [_trade_json(t) for t in c.live],
+            }
+            for c in res.id_conflicts
+        ]
+    return out
+
+
+class AuditService:
+    """
+    Request handling of the audit server, independent of the transport.
+
+    audit(request) takes a JSON object:
+      backtest         path of the backtest CSV (indexed once, then cached)
+      live             list of trade objects (same field names/aliases as the CSV)
+      live_path        ... or the path of a live CSV
+      tolerance, price_tolerance, partial_fills, volume_tolerance, id_key (as in audit)
+      max_volume_diff, close_tolerance, weights ({"price": 0.5} or "price=0.5")
+      details          include matched/missing/extra rows (default true)
+    Paths must lie under `root` when one is given. Invalid requests raise ValueError.
+    Live symbols go through `symbols`, which should be the cache's mapper too.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[BacktestCache] = None,
+        root: Optional[str | Path] = None,
+        symbols: Optional[Callable[[str], str]] = None,
+    ):
+        self.cache = cache or BacktestCache(symbols=symbols)
+        self.root = Path(root).resolve() if root else None
+        self.symbols = symbols or sys.intern
+
+    def _path(self, raw: Any, what: str) -> Path:
+        if not isinstance(raw, str) or not raw:
+            raise ValueError(f"{what} must be a file path")
+        p = Path(raw)
+        if self.root is not None:
+            p = (self.root / p).resolve()
+            if not p.is_relative_to(self.root):
+                raise ValueError(f"{what} is outside the server root: {raw}")
+        if not p.is_file():
+            raise FileNotFoundError(f"{what} file not found: {raw}")
+        return p
+
+    def preload(self, request: dict[str, Any]) -> dict[str, Any]:
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        index, cached = self.cache.get(self._path(request.get("backtest"), "backtest"))
+        return {"trades": len(index), "cached": cached}
+
+    def audit(self, request: dict[str, Any]) -> dict[str, Any]:
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        t0 = time.perf_counter()
+        index, cached = self.cache.get(self._path(request.get("backtest"), "backtest"))
+
+        if request.get("live_path") is not None:
+            live = read_trades_csv(
+                self._path(request["live_path"], "live_path"), source="live", symbols=self.symbols
+            )
+        else:
+            rows = request.get("live")
+            if not isinstance(rows, list):
+                raise ValueError("live must be a list of trades (or pass live_path)")
+            live = []
+            for i, row in enumerate(rows):
+                if not isinstance(row, dict):
+                    raise ValueError(f"live[{i}] must be an object")
+                live.append(_row_to_trade(row, "live", f"live[{i}]", self.symbols))
+
+        res = audit_trades(
+            index,
+            live,
+            time_tolerance_s=int(request.get("tolerance", 120)),
+            price_tolerance=request.get("price_tolerance"),
+            partial_fills=bool(request.get("partial_fills", False)),
+            volume_tolerance=float(request.get("volume_tolerance", 1e-9)),
+            id_key=str(request.get("id_key", "trade_id")),
+            max_volume_diff=_opt_float(request.get("max_volume_diff")),
+            close_tolerance_s=_opt_float(request.get("close_tolerance")),
+            weights=_weights(request.get("weights")),
+        )
+        out = result_json(res, details=bool(request.get("details", True)))
+        out["backtest_cached"] = cached
+        out["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        return out
+
+
+def _opt_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _weights(value: Any) -> Optional[dict[str, float]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return parse_weights(value)
+    if not isinstance(value, dict):
+        raise ValueError("weights must be an object or a KEY=NUMBER list")
+    return {str(k): float(v) for k, v in value.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "consistency-auditor"
+    service: AuditService
+    verbose = False
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) address.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.verbose:
+            super().log_message(format, *args)
+
+    def _reply(self, status: int, body: dict[str, Any]) -> None:
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        if self.path in ("/health", "/stats"):
+            self._reply(200, {"status": "ok", "cache": self.service.cache.stats()})
+        else:
+            self._reply(404, {"error": f"unknown endpoint: {self.path}"})
+
+    def do_POST(self) -> None:
+        routes = {"/audit": self.service.audit, "/preload": self.service.preload}
+        handler = routes.get(self.path)
+        if handler is None:
+            self._reply(404, {"error": f"unknown endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ValueError(f"request body too large ({length} bytes)")
+            request = json.loads(self.rfile.read(length) or b"{}")
+            self._reply(200, handler(request))
+        except FileNotFoundError as e:
+            self._reply(404, {"error": str(e)})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+
+class _PoolMixIn:
+    """Like socketserver.ThreadingMixIn, but on a bounded pool of worker threads."""
+
+    workers = 4
+
+    def process_request(self, request, client_address) -> None:
+        if not hasattr(self, "_pool"):
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="audit-worker")
+        self._pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if hasattr(self, "_pool"):
+            self._pool.shutdown(wait=True)
+
+
+class _TCPServer(_PoolMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _UnixServer(_PoolMixIn, socketserver.UnixStreamServer):
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def make_server(
+    listen: str,
+    service: AuditService,
+    workers: int = 4,
+    verbose: bool = False,
+) -> socketserver.BaseServer:
+    """
+    HTTP server for `service` on listen = HOST:PORT or unix:PATH (not started).
+    Requests are handled by a pool of `workers` threads sharing the cache.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    handler = type("Handler", (_Handler,), {"service": service, "verbose": verbose})
+    kind, _, rest = listen.partition(":")
+    if kind == "unix" and rest:
+        if not hasattr(socketserver, "UnixStreamServer"):
+            raise ValueError("unix sockets are not supported on this platform")
+        try:
+            st = os.lstat(rest)
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(st.st_mode):
+                raise ValueError(f"listen path exists and is not a socket: {rest}")
+            os.unlink(rest)  # stale socket of a previous run
+        server: socketserver.BaseServer = _UnixServer(rest, handler)
+    else:
+        host, sep, port = listen.rpartition(":")
+        if not sep or not port.isdigit():
+            raise ValueError(
+                f"invalid listen address: {listen!r} (expected HOST:PORT or unix:PATH)"
+            )
+        server = _TCPServer((host or "127.0.0.1", int(port)), handler)
+    server.workers = workers
+    return server
+
+
+def serve(
+    listen: str,
+    service: AuditService,
+    workers: int = 4,
+    verbose: bool = False,
+) -> None:
+    """Run the audit server until interrupted."""
+    server = make_server(listen, service, workers=workers, verbose=verbose)
+    print(f"Serving audits on {listen} ({workers} workers)", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
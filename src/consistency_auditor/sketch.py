@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Optional
+
+
+class LogHistogram:
+    """
+    Mergeable quantile sketch with relative accuracy (DDSketch-style).
+
+    Values are counted in logarithmic buckets: bucket k holds magnitudes in
+    (gamma^(k-1), gamma^k] with gamma = (1 + a) / (1 - a), so any quantile is
+    returned within a relative error of `rel_accuracy` (a). Positive and
+    negative values have separate buckets; magnitudes below `min_value` count
+    as zero. Two sketches with the same accuracy merge exactly, which is what
+    lets daily rollups be combined into weeks/months without the raw data.
+    """
+
+    def __init__(self, rel_accuracy: float = 0.01, min_value: float = 1e-12):
+        if not 0 < rel_accuracy < 1:
+            raise ValueError("rel_accuracy must be in (0, 1)")
+        self.rel_accuracy = rel_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + rel_accuracy) / (1 - rel_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.pos: dict[int, int] = {}
+        self.neg: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Midpoint of the bucket in the relative-error sense.
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, x: float, n: int = 1) -> None:
+        if math.isnan(x):
+            return
+        if x > self.min_value:
+            k = self._key(x)
+            self.pos[k] = self.pos.get(k, 0) + n
+        elif x < -self.min_value:
+            k = self._key(-x)
+            self.neg[k] = self.neg.get(k, 0) + n
+        else:
+            self.zero += n
+        self.count += n
+        self.sum += x * n
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    def merge(self, other: LogHistogram) -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for k, n in other.pos.items():
+            self.pos[k] = self.pos.get(k, 0) + n
+        for k, n in other.neg.items():
+            self.neg[k] = self.neg.get(k, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def abs(self) -> LogHistogram:
+        """Sketch of |x| (negative buckets folded onto the positive side)."""
+        out = LogHistogram(self.rel_accuracy, self.min_value)
+        out.pos = dict(self.pos)
+        for k, n in self.neg.items():
+            out.pos[k] = out.pos.get(k, 0) + n
+        out.zero = self.zero
+        out.count = self.count
+        out.sum = sum(self._value(k) * n for k, n in out.pos.items())
+        if self.count:
+            out.min = 0.0 if self.zero else self._value(min(out.pos))
+            out.max = max(abs(self.min), abs(self.max))
+        return out
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q in [0, 1] (None for an empty sketch)."""
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be in [0, 1]")
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return max(-self._value(k), self.min)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return min(self._value(k), self.max)
+        return self.max
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "a": self.rel_accuracy,
+                "p": self.pos,
+                "n": self.neg,
+                "z": self.zero,
+                "c": self.count,
+                "s": self.sum,
+                "lo": self.min if self.count else None,
+                "hi": self.max if self.count else None,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: str) -> LogHistogram:
+        d = json.loads(raw)
+        out = cls(d["a"])
+        out.pos = {int(k): n for k, n in d["p"].items()}
+        out.neg = {int(k): n for k, n in d["n"].items()}
+        out.zero = d["z"]
+        out.count = d["c"]
+        out.sum = d["s"]
+        if d["lo"] is not None:
+            out.min = d["lo"]
+            out.max = d["hi"]
+        return out
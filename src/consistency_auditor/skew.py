@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass, replace
+from datetime import timedelta, timezone
+from statistics import median
+from typing import Any
+
+from .match import AuditResult, TradeMatch, _group, _times, audit_trades
+from .models import Trade, epoch_us
+
+SKEW_GROUPS = ("global", "symbol", "day", "symbol_day")
+
+
+@dataclass(frozen=True)
+class SkewEstimate:
+    """
+    Estimated clock offset of the live side for one group of trades.
+    offset_s is live minus backtest: corrected live time = live time - offset_s.
+    """
+    key: str
+    offset_s: float
+    support: int  # candidate deltas in the histogram peak bin and its neighbours
+    candidates: int  # candidate deltas considered
+    live_trades: int
+    applied: bool  # False when support < min_support (offset_s is then 0)
+
+
+def skew_key(t: Trade, by: str) -> str:
+    """Group label of a (live) trade: "*", symbol, UTC day or symbol@day."""
+    if by == "global":
+        return "*"
+    if by == "symbol":
+        return t.symbol
+    day = t.open_time.astimezone(timezone.utc).date().isoformat()
+    if by == "day":
+        return day
+    if by == "symbol_day":
+        return f"{t.symbol}@{day}"
+    raise ValueError(f"invalid skew grouping: {by!r} (expected one of {SKEW_GROUPS})")
+
+
+def estimate_skew(
+    backtest: list[Trade],
+    live: list[Trade],
+    by: str = "symbol",
+    max_offset_s: float = 3600.0,
+    bin_s: float = 1.0,
+    min_support: int = 3,
+    max_samples: int = 5000,
+) -> dict[str, SkewEstimate]:
+    """
+    Histogram pre-pass: for (up to max_samples evenly spaced) live trades of each
+    group, every same (symbol, side) backtest trade within max_offset_s gives a
+    candidate delta live - backtest. The most populated bin_s-wide bin is the
+    offset (refined to the median of the deltas in and next to it); unrelated
+    pairs spread out evenly and do not form a peak.
+    """
+    if by not in SKEW_GROUPS:
+        raise ValueError(f"invalid skew grouping: {by!r} (expected one of {SKEW_GROUPS})")
+    if bin_s <= 0:
+        raise ValueError("bin_s must be > 0")
+    max_us = int(max_offset_s * 1_000_000)
+    bin_us = max(1, int(bin_s * 1_000_000))
+
+    ordered = sorted(backtest, key=lambda t: (t.symbol, t.side.value, t.open_time))
+    bt_times = {key: _times(ts) for key, ts in _group(ordered).items()}
+    by_group: dict[str, list[Trade]] = {}
+    for t in live:
+        by_group.setdefault(skew_key(t, by), []).append(t)
+
+    out: dict[str, SkewEstimate] = {}
+    for gkey, trades in by_group.items():
+        step = max(1, len(trades) // max_samples)
+        sample = trades[::step]
+
+        hist: Counter[int] = Counter()
+        deltas: dict[int, list[int]] = {}
+        n_cand = 0
+        for t in sample:
+            bts = bt_times.get((t.symbol, t.side.value))
+            if not bts:
+                continue
+            lt = epoch_us(t.open_time)
+            lo = bisect_left(bts, lt - max_us)
+            hi = bisect_right(bts, lt + max_us)
+            for j in range(lo, hi):
+                d = lt - bts[j]
+                b = round(d / bin_us)
+                hist[b] += 1
+                deltas.setdefault(b, []).append(d)
+            n_cand += hi - lo
+
+        if not hist:
+            out[gkey] = SkewEstimate(gkey, 0.0, 0, 0, len(trades), False)
+            continue
+        # Most populated bin; ties go to the smaller absolute offset.
+        peak = min(hist, key=lambda b: (-hist[b], abs(b), b))
+        near = [d for b in (peak - 1, peak, peak + 1) for d in deltas.get(b, ())]
+        if len(near) < min_support:
+            out[gkey] = SkewEstimate(gkey, 0.0, len(near), n_cand, len(trades), False)
+            continue
+        out[gkey] = SkewEstimate(
+            gkey, median(near) / 1_000_000, len(near), n_cand, len(trades), True
+        )
+    return out
+
+
+def correct_skew(live: list[Trade], estimates: dict[str, SkewEstimate], by: str) -> list[Trade]:
+    """Copies of `live` with each trade's group offset subtracted from its times."""
+    out = []
+    for t in live:
+        est = estimates.get(skew_key(t, by))
+        if est is None or not est.applied or est.offset_s == 0:
+            out.append(t)
+            continue
+        shift = timedelta(seconds=est.offset_s)
+        out.append(
+            replace(
+                t,
+                open_time=t.open_time - shift,
+                close_time=None if t.close_time is None else t.close_time - shift,
+            )
+        )
+    return out
+
+
+def audit_with_skew(
+    backtest: list[Trade],
+    live: list[Trade],
+    estimates: dict[str, SkewEstimate],
+    by: str = "symbol",
+    **audit_kwargs: Any,
+) -> AuditResult:
+    """
+    audit_trades on skew-corrected live times. The result holds the original
+    live trades; open_time_diff_s is the residual after the correction.
+    """
+    shifted = correct_skew(live, estimates, by)
+    original = {id(s): t for s, t in zip(shifted, live)}
+    res = audit_trades(backtest, shifted, **audit_kwargs)
+
+    def restore(m: TradeMatch) -> TradeMatch:
+        if m.fills:
+            fills = tuple(original[id(f)] for f in m.fills)
+            return replace(m, live=replace(m.live, open_time=fills[0].open_time), fills=fills)
+        return replace(m, live=original[id(m.live)])
+
+    return AuditResult(
+        matched=[restore(m) for m in res.matched],
+        missing_in_live=res.missing_in_live,
+        extra_in_live=[original[id(t)] for t in res.extra_in_live],
+        id_conflicts=[
+            replace(c, live=tuple(original[id(t)] for t in c.live)) for c in res.id_conflicts
+        ],
+    )
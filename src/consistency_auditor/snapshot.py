@@ -1,20 +1,34 @@
 ﻿from __future__ import annotations
 
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Optional
 
-# We use loose imports here so the library doesn't strictly crash 
-# if pandas isn't installed (until you try to snapshot).
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+from .eventlog import iter_events
+
+# Parquet schema metadata key holding the DecisionContext.bars_hash of a snapshot.
+BARS_HASH_KEY = b"consistency_auditor.bars_hash"
+
+# load_snapshots statuses. OK means the file was written for the decision's
+# bars_hash (or, with a hasher, that its bars hash to it), not that the bars
+# were checked against the market data.
+OK = "OK"
+HASH_MISMATCH = "HASH_MISMATCH"
+UNVERIFIED = "UNVERIFIED"  # nothing to check the logged bars_hash against
+MISSING = "MISSING"  # no snapshot logged for the signal_id, or the file is gone
+
+# reader(path, columns) -> (frame, bars_hash stored in the file or None)
+Reader = Callable[[Path, Optional[Sequence[str]]], tuple[Any, Optional[str]]]
+Hasher = Callable[[Any], str]
 
 
 def save_bars_snapshot(
     output_dir: str | Path,
     signal_id: str,
     bars: Any, # Expected: pd.DataFrame
+    bars_hash: Optional[str] = None,
 ) -> str:
     """
     Saves the exact market data used for a decision to a Parquet file.
@@ -24,12 +38,23 @@ def save_bars_snapshot(
         output_dir: The root audit folder (e.g. 'audit_results/snapshots').
         signal_id: The unique ID linking this data to a Decision event.
         bars: The pandas DataFrame of OHLCV data.
+        bars_hash: The DecisionContext.bars_hash of the decision; stored in the
+            Parquet schema metadata so load_snapshots can check the file was
+            written for the decision. Needs pyarrow: with another Parquet
+            engine (fastparquet) the file is written without it and loads as
+            UNVERIFIED.
 
     Returns:
         The relative filename of the saved snapshot.
     """
-    if pd is None:
-        raise ImportError("Pandas is required to save snapshots. pip install pandas pyarrow")
+    # pandas is imported on first use: the library works (and imports fast)
+    # without it until you try to snapshot.
+    try:
+        import pandas as pd
+    except ImportError:
+        raise ImportError(
+            "Pandas is required to save snapshots. pip install pandas pyarrow"
+        ) from None
 
     if not isinstance(bars, pd.DataFrame):
         raise TypeError(f"Snapshot expects a DataFrame, got {type(bars)}")
@@ -42,8 +67,259 @@ def save_bars_snapshot(
     filename = f"bars_{signal_id}.parquet"
     full_path = p_dir / filename
 
+    if bars_hash is not None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            bars_hash = None  # other engine (fastparquet): no hash, loads as UNVERIFIED
+
     # Save to parquet (requires pyarrow or fastparquet)
     # index=True is crucial if your datetime is the index
-    bars.to_parquet(full_path, index=True)
+    if bars_hash is None:
+        bars.to_parquet(full_path, index=True)
+        return filename
+
+    # Same table as to_parquet(engine="pyarrow", index=True), plus the hash.
+    table = pa.Table.from_pandas(bars, preserve_index=True)
+    meta = dict(table.schema.metadata or {})
+    meta[BARS_HASH_KEY] = str(bars_hash).encode("utf-8")
+    pq.write_table(table.replace_schema_metadata(meta), full_path)
 
     return filename
+
+
+def read_arrow_snapshot(
+    path: str | Path, columns: Optional[Sequence[str]] = None
+) -> tuple[Any, Optional[str]]:
+    """
+    Memory-mapped read of one snapshot into a pyarrow Table (only `columns`,
+    if given; the index column is kept as stored). Returns the table and the
+    bars_hash stored by save_bars_snapshot (None for files without one).
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required to load snapshots. pip install pyarrow") from None
+    table = pq.read_table(
+        path, columns=None if columns is None else list(columns), memory_map=True
+    )
+    stored = (table.schema.metadata or {}).get(BARS_HASH_KEY)
+    return table, None if stored is None else stored.decode("utf-8")
+
+
+def read_parquet_snapshot(
+    path: str | Path, columns: Optional[Sequence[str]] = None
+) -> tuple[Any, Optional[str]]:
+    """
+    read_arrow_snapshot converted to a pandas DataFrame (as save_bars_snapshot
+    got it). Without pyarrow the file is read by pandas' other Parquet engine;
+    the stored bars_hash is then not available (None).
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError(
+                "Pandas is required to load snapshots. pip install pandas pyarrow"
+            ) from None
+        return pd.read_parquet(path, columns=None if columns is None else list(columns)), None
+    table, stored = read_arrow_snapshot(path, columns)
+    return table.to_pandas(), stored
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    signal_id: str
+    path: Optional[Path]  # None when no snapshot was logged for the signal_id
+    frame: Any  # None when MISSING
+    status: str  # OK, HASH_MISMATCH, UNVERIFIED or MISSING
+    logged_hash: Optional[str]  # context.bars_hash of the DECISION event
+    found_hash: Optional[str]  # hash of the loaded snapshot (stored or from the hasher)
+
+
+class SnapshotStore:
+    """
+    Bar snapshots of one recorder audit folder, by signal_id.
+
+    The signal_id -> (snapshot file, logged bars_hash) index is built from the
+    DECISION events on first use and rebuilt when an unknown signal_id is
+    asked for (decisions logged since). Loaded frames are kept in an LRU of
+    cache_size entries keyed by file, mtime and column projection.
+
+    Verification: with a hasher (the function that computed bars_hash when the
+    decision was logged), hasher(frame) must equal the logged bars_hash;
+    otherwise the bars_hash stored in the file by save_bars_snapshot must. The
+    stored hash is only a label: OK then means the file was written for this
+    bars_hash, not that its bar contents were checked (pass a hasher for that).
+    A snapshot with neither to compare is UNVERIFIED.
+    """
+
+    def __init__(
+        self,
+        audit_dir: str | Path,
+        cache_size: int = 256,
+        reader: Optional[Reader] = None,
+        hasher: Optional[Hasher] = None,
+    ):
+        self.audit_dir = Path(audit_dir)
+        self.snapshot_dir = self.audit_dir / "snapshots"
+        self.cache_size = cache_size
+        self.reader = reader or read_parquet_snapshot
+        self.hasher = hasher
+        self._index: Optional[dict[str, tuple[str, Optional[str]]]] = None
+        self._frames: OrderedDict[tuple, tuple[Any, Optional[str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _build_index(self) -> dict[str, tuple[str, Optional[str]]]:
+        index = {}
+        for ev in iter_events(self.audit_dir):
+            snap = ev.get("snapshot_path")
+            if ev.get("event_type") == "DECISION" and snap:
+                index[ev.get("signal_id", "")] = (snap, (ev.get("context") or {}).get("bars_hash"))
+        return index
+
+    def _lookup(self, signal_ids: Sequence[str]) -> dict[str, tuple[str, Optional[str]]]:
+        if self._index is None or any(sid not in self._index for sid in signal_ids):
+            self._index = self._build_index()
+        return self._index
+
+    def load(
+        self,
+        signal_ids: Iterable[str],
+        columns: Optional[Sequence[str]] = None,
+        workers: int = 4,
+    ) -> list[Snapshot]:
+        """
+        Snapshots of signal_ids, in that order. Files not in the cache are read
+        by `workers` threads (the Arrow reader releases the GIL while it decodes).
+        """
+        ids = list(signal_ids)
+        index = self._lookup(ids)
+        cols = None if columns is None else tuple(columns)
+
+        keys: dict[str, Optional[tuple]] = {}
+        paths: dict[tuple, Path] = {}
+        for sid in dict.fromkeys(ids):
+            entry = index.get(sid)
+            path = None if entry is None else self.snapshot_dir / entry[0]
+            try:
+                key = None if path is None else (str(path), path.stat().st_mtime_ns, cols)
+            except FileNotFoundError:
+                key = None
+            keys[sid] = key
+            if key is not None:
+                paths.setdefault(key, path)
+        found = self._fetch(paths, workers)
+
+        out = []
+        for sid in ids:
+            entry = index.get(sid)
+            logged = None if entry is None else entry[1]
+            path = None if entry is None else self.snapshot_dir / entry[0]
+            if keys[sid] is None:
+                out.append(Snapshot(sid, path, None, MISSING, logged, None))
+                continue
+            frame, digest = found[keys[sid]]
+            if logged is None or digest is None:
+                status = UNVERIFIED
+            else:
+                status = OK if digest == logged else HASH_MISMATCH
+            out.append(Snapshot(sid, path, frame, status, logged, digest))
+        return out
+
+    def read_files(
+        self,
+        paths: Iterable[str | Path],
+        columns: Optional[Sequence[str]] = None,
+        workers: int = 1,
+    ) -> list[tuple[Any, Optional[str]]]:
+        """
+        (frame, hash) of snapshot files given by path (relative to the snapshots
+        folder), in order, through the same LRU as load; nothing is verified.
+        A missing file raises FileNotFoundError.
+        """
+        cols = None if columns is None else tuple(columns)
+        keys = []
+        todo: dict[tuple, Path] = {}
+        for p in paths:
+            path = self.snapshot_dir / p
+            key = (str(path), path.stat().st_mtime_ns, cols)
+            keys.append(key)
+            todo.setdefault(key, path)
+        found = self._fetch(todo, workers)
+        return [found[key] for key in keys]
+
+    def _fetch(
+        self, paths: dict[tuple, Path], workers: int
+    ) -> dict[tuple, tuple[Any, Optional[str]]]:
+        # Cached entries of paths (cache key -> file), reading the others.
+        found: dict[tuple, tuple[Any, Optional[str]]] = {}
+        todo: dict[tuple, Path] = {}
+        for key, path in paths.items():
+            cached = self._frames.get(key)
+            if cached is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                found[key] = cached
+            else:
+                self.misses += 1
+                todo[key] = path
+
+        if todo:
+            cols = [key[2] for key in todo]
+            if workers > 1 and len(todo) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor(max_workers=min(workers, len(todo))) as ex:
+                    loaded = list(ex.map(self._read, todo.values(), cols))
+            else:
+                loaded = [self._read(path, c) for path, c in zip(todo.values(), cols)]
+            for key, item in zip(todo, loaded):
+                found[key] = self._frames[key] = item
+            while len(self._frames) > self.cache_size:
+                self._frames.popitem(last=False)
+        return found
+
+    def _read(self, path: Path, columns: Optional[tuple]) -> tuple[Any, Optional[str]]:
+        frame, stored = self.reader(path, columns)
+        return frame, self.hasher(frame) if self.hasher is not None else stored
+
+
+# One store per audit folder and process, so repeated load_snapshots calls reuse
+# the signal_id index and the frame cache.
+_STORES: dict[tuple[str, Optional[Reader], Optional[Hasher]], SnapshotStore] = {}
+
+
+def snapshot_store(
+    audit_dir: str | Path,
+    reader: Optional[Reader] = None,
+    hasher: Optional[Hasher] = None,
+) -> SnapshotStore:
+    """The SnapshotStore of audit_dir shared within this process."""
+    key = (str(Path(audit_dir).resolve()), reader, hasher)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = SnapshotStore(audit_dir, reader=reader, hasher=hasher)
+    return store
+
+
+def load_snapshots(
+    audit_dir: str | Path,
+    signal_ids: Iterable[str],
+    columns: Optional[Sequence[str]] = None,
+    workers: int = 4,
+    reader: Optional[Reader] = None,
+    hasher: Optional[Hasher] = None,
+) -> list[Snapshot]:
+    """
+    Load and verify the bar snapshots of many decisions at once (see
+    SnapshotStore): memory-mapped Arrow reads of only `columns` (default all),
+    as pandas DataFrames unless another reader is given (read_arrow_snapshot
+    keeps pyarrow Tables). Returns one Snapshot per signal_id, in order.
+    """
+    store = snapshot_store(audit_dir, reader=reader, hasher=hasher)
+    return store.load(signal_ids, columns=columns, workers=workers)
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from .match import AuditResult
+from .sketch import LogHistogram
+
+# Rollup dimensions a query can group by, and the metrics it can ask for.
+QUERY_DIMENSIONS = ("day", "week", "month", "symbol", "account")
+SKETCH_METRICS = ("price_diff", "abs_price_diff", "time_diff_s")
+COUNT_METRICS = ("matched", "missing", "extra", "match_rate")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    account TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    matched INTEGER NOT NULL,
+    missing INTEGER NOT NULL,
+    extra INTEGER NOT NULL,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS matches (
+    run_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    day TEXT NOT NULL,
+    bt_trade_id TEXT,
+    lv_trade_id TEXT,
+    bt_open_time TEXT NOT NULL,
+    lv_open_time TEXT NOT NULL,
+    time_diff_s REAL NOT NULL,
+    price_diff REAL NOT NULL,
+    fill_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_matches_run ON matches (run_id);
+CREATE INDEX IF NOT EXISTS ix_matches_symbol_day ON matches (symbol, day);
+CREATE INDEX IF NOT EXISTS ix_matches_account_day ON matches (account, day);
+CREATE TABLE IF NOT EXISTS unmatched (
+    run_id TEXT NOT NULL,
+    account TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    day TEXT NOT NULL,
+    trade_id TEXT,
+    open_time TEXT NOT NULL,
+    open_price REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_unmatched_run ON unmatched (run_id);
+CREATE INDEX IF NOT EXISTS ix_unmatched_symbol_day ON unmatched (symbol, day);
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    account TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    day TEXT NOT NULL,
+    matched INTEGER NOT NULL,
+    missing INTEGER NOT NULL,
+    extra INTEGER NOT NULL,
+    price_sketch TEXT NOT NULL,
+    time_sketch TEXT NOT NULL,
+    PRIMARY KEY (account, symbol, day)
+);
+CREATE INDEX IF NOT EXISTS ix_rollup_symbol_day ON rollup_daily (symbol, day);
+CREATE INDEX IF NOT EXISTS ix_rollup_day ON rollup_daily (day);
+"""
+
+
+def _period(day: str, dim: str) -> str:
+    if dim == "day":
+        return day
+    d = date.fromisoformat(day)
+    if dim == "week":
+        y, w, _ = d.isocalendar()
+        return f"{y}-W{w:02d}"
+    return d.strftime("%Y-%m")
+
+
+def _parse_stat(stat: str) -> Optional[float]:
+    """"p95" -> 0.95; None for mean/count/min/max/sum."""
+    if stat in ("mean", "count", "min", "max", "sum"):
+        return None
+    if stat.startswith("p"):
+        try:
+            q = float(stat[1:]) / 100
+        except ValueError:
+            q = -1.0
+        if 0 <= q <= 1:
+            return q
+    raise ValueError(f"invalid stat: {stat!r} (expected mean, count, min, max, sum or pNN)")
+
+
+class _Rollup:
+    def __init__(self, rel_accuracy: float):
+        self.matched = 0
+        self.missing = 0
+        self.extra = 0
+        self.price = LogHistogram(rel_accuracy)
+        self.time = LogHistogram(rel_accuracy)
+
+
+class ResultStore:
+    """
+    Local SQLite store of audit results across runs.
+
+    Every stored run adds its rows to `matches` / `unmatched` (indexed by run,
+    symbol, account and day) and folds them into `rollup_daily`: per (account,
+    symbol, UTC day) counts plus mergeable quantile sketches of price_diff and
+    time_diff_s. query() reads only the rollups, so trend questions over
+    thousands of runs touch a few rows per symbol and day.
+    """
+
+    def __init__(self, path: str | Path, rel_accuracy: float = 0.01):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rel_accuracy = rel_accuracy
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> ResultStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def has_run(self, run_id: str) -> bool:
+        cur = self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,))
+        return cur.fetchone() is not None
+
+    def add_run(
+        self,
+        run_id: str,
+        res: AuditResult,
+        account: str = "",
+        meta: Optional[str] = None,
+    ) -> None:
+        """Append one audit result. A run_id can only be stored once."""
+        if self.has_run(run_id):
+            raise ValueError(f"run already stored: {run_id!r}")
+
+        rollups: dict[tuple[str, str], _Rollup] = {}
+
+        def rollup(symbol: str, day: str) -> _Rollup:
+            r = rollups.get((symbol, day))
+            if r is None:
+                r = rollups[(symbol, day)] = _Rollup(self.rel_accuracy)
+            return r
+
+        match_rows = []
+        for m in res.matched:
+            bt = m.backtest
+            day = bt.open_time.astimezone(timezone.utc).date().isoformat()
+            r = rollup(bt.symbol, day)
+            r.matched += 1
+            r.price.add(m.open_price_diff)
+            r.time.add(m.open_time_diff_s)
+            match_rows.append(
+                (
+                    run_id,
+                    account,
+                    bt.symbol,
+                    bt.side.value,
+                    day,
+                    bt.trade_id,
+                    m.live.trade_id,
+                    bt.open_time.isoformat(),
+                    m.live.open_time.isoformat(),
+                    m.open_time_diff_s,
+                    m.open_price_diff,
+                    m.fill_count,
+                )
+            )
+
+        unmatched_rows = []
+        unmatched = (("missing_in_live", res.missing_in_live), ("extra_in_live", res.extra_in_live))
+        for bucket, trades in unmatched:
+            for t in trades:
+                day = t.open_time.astimezone(timezone.utc).date().isoformat()
+                r = rollup(t.symbol, day)
+                if bucket == "missing_in_live":
+                    r.missing += 1
+                else:
+                    r.extra += 1
+                unmatched_rows.append(
+                    (
+                        run_id,
+                        account,
+                        bucket,
+                        t.symbol,
+                        t.side.value,
+                        day,
+                        t.trade_id,
+                        t.open_time.isoformat(),
+                        t.open_price,
+                    )
+                )
+
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    account,
+                    datetime.now(timezone.utc).isoformat(),
+                    len(res.matched),
+                    len(res.missing_in_live),
+                    len(res.extra_in_live),
+                    meta,
+                ),
+            )
+            self.conn.executemany(
+                "INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", match_rows
+            )
+            self.conn.executemany(
+                "INSERT INTO unmatched VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", unmatched_rows
+            )
+            for (symbol, day), r in rollups.items():
+                row = self.conn.execute(
+                    "SELECT matched, missing, extra, price_sketch, time_sketch FROM rollup_daily"
+                    " WHERE account = ? AND symbol = ? AND day = ?",
+                    (account, symbol, day),
+                ).fetchone()
+                if row is not None:
+                    r.matched += row[0]
+                    r.missing += row[1]
+                    r.extra += row[2]
+                    r.price.merge(LogHistogram.from_json(row[3]))
+                    r.time.merge(LogHistogram.from_json(row[4]))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rollup_daily VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        account,
+                        symbol,
+                        day,
+                        r.matched,
+                        r.missing,
+                        r.extra,
+                        r.price.to_json(),
+                        r.time.to_json(),
+                    ),
+                )
+
+    def query(
+        self,
+        metric: str = "price_diff",
+        stat: str = "p95",
+        by: tuple[str, ...] = ("week",),
+        symbol: Optional[str] = None,
+        account: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Aggregate rollups. metric is one of SKETCH_METRICS (stat: mean, count,
+        min, max, sum or pNN, e.g. p95) or COUNT_METRICS (stat ignored).
+        by groups by any of QUERY_DIMENSIONS; since/until are inclusive ISO days.
+        Returns one dict per group: the group columns, "n" and "value".
+        """
+        if metric not in SKETCH_METRICS + COUNT_METRICS:
+            raise ValueError(
+                f"invalid metric: {metric!r} (expected one of {SKETCH_METRICS + COUNT_METRICS})"
+            )
+        for dim in by:
+            if dim not in QUERY_DIMENSIONS:
+                raise ValueError(f"invalid group: {dim!r} (expected one of {QUERY_DIMENSIONS})")
+        q = _parse_stat(stat) if metric in SKETCH_METRICS else None
+
+        where, params = [], []
+        for col, val, op in (
+            ("symbol", symbol, "="),
+            ("account", account, "="),
+            ("day", since, ">="),
+            ("day", until, "<="),
+        ):
+            if val is not None:
+                where.append(f"{col} {op} ?")
+                params.append(val)
+        # Only fetch the sketch column the metric needs (none for counts).
+        sketch_col = {"time_diff_s": "time_sketch", "price_diff": "price_sketch"}.get(
+            metric, "price_sketch" if metric == "abs_price_diff" else "NULL"
+        )
+        sql = (
+            f"SELECT account, symbol, day, matched, missing, extra, {sketch_col} "
+            "FROM rollup_daily"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        groups: dict[tuple[str, ...], _Rollup] = {}
+        for acc, sym, day, matched, missing, extra, raw in self.conn.execute(sql, params):
+            cols = {"account": acc, "symbol": sym}
+            key = tuple(cols[d] if d in cols else _period(day, d) for d in by)
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = _Rollup(self.rel_accuracy)
+            g.matched += matched
+            g.missing += missing
+            g.extra += extra
+            if metric == "time_diff_s":
+                g.time.merge(LogHistogram.from_json(raw))
+            elif raw is not None:
+                g.price.merge(LogHistogram.from_json(raw))
+
+        out = []
+        for key in sorted(groups):
+            g = groups[key]
+            row: dict[str, Any] = dict(zip(by, key))
+            if metric in COUNT_METRICS:
+                n = g.matched + g.missing
+                if metric == "match_rate":
+                    value: Any = g.matched / n if n else None
+                else:
+                    value = getattr(g, metric)
+                row.update(n=n, value=value)
+            else:
+                sk = g.time if metric == "time_diff_s" else g.price
+                if metric == "abs_price_diff":
+                    sk = sk.abs()
+                row.update(n=sk.count, value=_sketch_stat(sk, stat, q))
+            out.append(row)
+        return out
+
+
+def _sketch_stat(sk: LogHistogram, stat: str, q: Optional[float]) -> Optional[float]:
+    if q is not None:
+        return sk.quantile(q)
+    if stat == "count":
+        return sk.count
+    if not sk.count:
+        return None
+    return {"mean": sk.mean, "min": sk.min, "max": sk.max, "sum": sk.sum}[stat]
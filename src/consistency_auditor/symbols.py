@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+import re
+import sys
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import Any, Optional
+
+_KEYS = ("aliases", "suffixes", "patterns", "case")
+CASES = ("upper", "keep")
+
+
+class SymbolMapper:
+    """
+    Maps broker-specific symbol names onto one canonical name per instrument.
+
+    A raw name (whitespace stripped) resolves in this order:
+      1. an exact alias ("GER40" -> "DE40")
+      2. else the first regex pattern that fully matches, expanded with its
+         replacement (r"(\\w{6})\\.\\w+" -> r"\\1")
+      3. else the longest matching suffix is stripped ("EURUSD.m" -> "EURUSD")
+      4. case="upper" upper-cases the result, then aliases apply once more.
+    Resolved names are cached per raw name and interned (sys.intern), so equal
+    symbols from any file are the same object and compare by identity. With no
+    rules the mapper only interns (and upper-cases).
+    """
+
+    def __init__(
+        self,
+        aliases: Optional[Mapping[str, str]] = None,
+        suffixes: Iterable[str] = (),
+        patterns: Iterable[tuple[str, str]] = (),
+        case: str = "upper",
+    ):
+        if case not in CASES:
+            raise ValueError(f"invalid symbol case: {case!r} (expected one of {CASES})")
+        self.case = case
+        self.aliases = {self._fold(k.strip()): v.strip() for k, v in (aliases or {}).items()}
+        self.suffixes = tuple(sorted({self._fold(s) for s in suffixes if s}, key=len, reverse=True))
+        self.patterns: list[tuple[re.Pattern[str], str]] = []
+        for pattern, repl in patterns:
+            try:
+                rx = re.compile(pattern, re.IGNORECASE if case == "upper" else 0)
+            except re.error as e:
+                raise ValueError(f"invalid symbol pattern {pattern!r}: {e}") from None
+            self.patterns.append((rx, repl))
+        self.resolved: dict[str, str] = {}  # raw name -> interned canonical name
+
+    def _fold(self, s: str) -> str:
+        return s.upper() if self.case == "upper" else s
+
+    def __call__(self, raw: str) -> str:
+        out = self.resolved.get(raw)
+        if out is None:
+            out = self.resolved[raw] = sys.intern(self._resolve(raw))
+        return out
+
+    def _resolve(self, raw: str) -> str:
+        s = raw.strip()
+        folded = self._fold(s)
+        if folded in self.aliases:
+            return self.aliases[folded]
+        for rx, repl in self.patterns:
+            m = rx.fullmatch(s)
+            if m:
+                s = m.expand(repl)
+                break
+        else:
+            for suffix in self.suffixes:
+                if len(folded) > len(suffix) and folded.endswith(suffix):
+                    s = s[: -len(suffix)]
+                    break
+        s = self._fold(s)
+        return self.aliases.get(s, s)
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> SymbolMapper:
+        unknown = set(spec) - set(_KEYS)
+        if unknown:
+            raise ValueError(f"unknown symbol map keys: {sorted(unknown)} (expected {_KEYS})")
+        patterns = []
+        for item in spec.get("patterns", []):
+            if not (isinstance(item, (list, tuple)) and len(item) == 2):
+                raise ValueError(f"symbol pattern must be [regex, replacement], got {item!r}")
+            patterns.append((str(item[0]), str(item[1])))
+        return cls(
+            aliases=spec.get("aliases"),
+            suffixes=spec.get("suffixes", ()),
+            patterns=patterns,
+            case=spec.get("case", "upper"),
+        )
+
+
+def load_symbol_map(path: str | Path) -> SymbolMapper:
+    """
+    Read a JSON symbol map:
+      {"aliases": {"GER40": "DE40"}, "suffixes": [".m", "pro"],
+       "patterns": [["(\\\\w{6})_.*", "\\\\1"]], "case": "upper"}
+    All keys are optional.
+    """
+    p = Path(path)
+    try:
+        spec = json.loads(p.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid symbol map {p.name}: {e}") from None
+    if not isinstance(spec, dict):
+        raise ValueError(f"invalid symbol map {p.name}: expected a JSON object")
+    return SymbolMapper.from_dict(spec)
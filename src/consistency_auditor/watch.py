@@ -0,0 +1,534 @@
+from __future__ import annotations
+
+import csv
+import heapq
+import json
+import logging
+import os
+import socket
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Protocol
+
+from .events import write_jsonl
+from .io_csv import _parse_dt, _parse_side, _row_to_trade, _sniff_dialect
+from .match import IdConflict, _fmt_key, _id_index
+from .models import Trade
+
+logger = logging.getLogger(__name__)
+
+# --- Sinks ---
+
+
+class AlertSink(Protocol):
+    """
+    Destination for watch alerts (one dict per alert).
+    """
+
+    def emit(self, alert: dict[str, Any]) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class StdoutSink:
+    """Human-readable one-line alerts on stdout (flushed per alert)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, alert: dict[str, Any]) -> None:
+        out = self.stream or sys.stdout
+        kind = alert["alert"]
+        if kind == "MATCHED":
+            line = (
+                f"[MATCHED] {alert['symbol']} {alert['side']} "
+                f"bt={alert['bt_trade_id'] or '-'} lv={alert['lv_trade_id'] or '-'} "
+                f"dt_s={alert['open_time_diff_s']:.2f} price_diff={alert['open_price_diff']:+.6f}"
+            )
+        else:
+            line = (
+                f"[{kind}] {alert['symbol']} {alert['side']} open={alert['open_time']} "
+                f"price={alert['open_price']:.6f} id={alert['trade_id'] or '-'}"
+            )
+        out.write(line + "\n")
+        out.flush()
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink:
+    """Append alerts to a JSONL file (same format as the recorder event log)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def emit(self, alert: dict[str, Any]) -> None:
+        write_jsonl(self.path, alert)
+
+    def close(self) -> None:
+        pass
+
+
+class SocketSink:
+    """
+    Send each alert as one JSON datagram to a local socket.
+    Address is either a Unix datagram socket path or a (host, port) UDP pair.
+    """
+
+    def __init__(self, address: str | tuple[str, int]):
+        if isinstance(address, tuple):
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.address = address
+
+    def emit(self, alert: dict[str, Any]) -> None:
+        payload = json.dumps(alert, default=str).encode("utf-8")
+        try:
+            self.sock.sendto(payload, self.address)
+        except OSError:
+            # A missing listener must never stall the watch loop.
+            pass
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def make_sink(spec: str) -> AlertSink:
+    """
+    Build a sink from a CLI spec:
+      stdout | jsonl:<path> | unix:<socket path> | udp:<host>:<port>
+    """
+    if spec == "stdout":
+        return StdoutSink()
+    kind, _, rest = spec.partition(":")
+    if kind == "jsonl" and rest:
+        return JsonlSink(rest)
+    if kind == "unix" and rest:
+        return SocketSink(rest)
+    if kind == "udp" and rest:
+        host, _, port = rest.rpartition(":")
+        if host and port.isdigit():
+            return SocketSink((host, int(port)))
+    raise ValueError(
+        f"invalid sink: {spec!r} (expected stdout, jsonl:PATH, unix:PATH or udp:HOST:PORT)"
+    )
+
+
+# --- File following ---
+
+
+class LineFollower:
+    """
+    Polling `tail -f`: returns complete lines appended since the last poll.
+    Handles truncation and rotation (file replaced under the same path):
+    `reopens` counts them, and the lines of one poll always come from one file.
+    A poll reads chunk_size bytes (more only to complete a line), so a large
+    backlog is returned over several polls and memory stays bounded.
+    """
+
+    def __init__(self, path: str | Path, chunk_size: int = 1 << 20):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self._f = None
+        self._ino: Optional[int] = None
+        self._buf = b""
+        self.reopens = 0
+
+    def _open(self) -> bool:
+        try:
+            self._f = self.path.open("rb")
+        except FileNotFoundError:
+            return False
+        if self._ino is not None:
+            self.reopens += 1
+        self._ino = os.fstat(self._f.fileno()).st_ino
+        self._buf = b""
+        return True
+
+    def _rotated_or_truncated(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return st.st_ino != self._ino or st.st_size < self._f.tell()
+
+    def poll(self) -> list[str]:
+        """Next complete lines; [] once the file has nothing new."""
+        if self._f is None and not self._open():
+            return []
+
+        lines = self._read_lines()
+        if not lines and self._rotated_or_truncated():
+            self._f.close()
+            if not self._open():
+                self._f = None
+                return []
+            lines = self._read_lines()
+        return lines
+
+    def _read_lines(self) -> list[str]:
+        # Read chunks until they complete at least one non-blank line, or EOF.
+        while True:
+            chunk = self._f.read(self.chunk_size)
+            if not chunk:
+                return []
+            lines = (self._buf + chunk).split(b"\n")
+            # Last element is a partial line (or b"" when data ends with a newline).
+            self._buf = lines.pop()
+            out = [ln.decode("utf-8-sig").rstrip("\r") for ln in lines if ln.strip()]
+            if out:
+                return out
+
+    def flush_partial(self) -> list[str]:
+        """Return a trailing line without newline (only used when not following)."""
+        rest, self._buf = self._buf, b""
+        s = rest.decode("utf-8-sig").rstrip("\r")
+        return [s] if s.strip() else []
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+# --- Line parsers ---
+
+
+class CsvTradeParser:
+    """
+    Incremental CSV parser: the first line is the header, every later line a trade.
+    """
+
+    def __init__(
+        self,
+        source: str = "live",
+        name: str = "live",
+        symbols: Callable[[str], str] = sys.intern,
+    ):
+        self.source = source
+        self.name = name
+        self.symbols = symbols
+        self._header: Optional[list[str]] = None
+        self._dialect: Any = csv.excel
+
+    def reset(self) -> None:
+        """The file was rotated or truncated: its next line is a header again."""
+        self._header = None
+        self._dialect = csv.excel
+
+    def feed(self, line: str) -> Optional[Trade]:
+        if self._header is None:
+            self._dialect = _sniff_dialect(line)
+            self._header = next(csv.reader([line], dialect=self._dialect))
+            return None
+        values = next(csv.reader([line], dialect=self._dialect))
+        return _row_to_trade(dict(zip(self._header, values)), self.source, self.name, self.symbols)
+
+
+class EventTradeParser:
+    """
+    Builds live trades from recorder events: ORDER_SENT carries symbol/side/volume,
+    the following FILL_OPEN for the same signal_id carries fill time and price.
+    Pending orders are kept in a bounded LRU so memory stays flat on long runs.
+    """
+
+    def __init__(
+        self,
+        source: str = "live",
+        max_pending: int = 10_000,
+        symbols: Callable[[str], str] = sys.intern,
+    ):
+        self.source = source
+        self.max_pending = max_pending
+        self.symbols = symbols
+        self._orders: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def reset(self) -> None:
+        """
+        The file was rotated or truncated. Pending orders are kept: the recorder
+        rotates its log, so a FILL_OPEN may follow its ORDER_SENT in the next file.
+        """
+
+    def feed(self, line: str) -> Optional[Trade]:
+        ev = json.loads(line)
+        etype = ev.get("event_type")
+        sid = ev.get("signal_id")
+
+        if etype == "ORDER_SENT" and sid:
+            self._orders[sid] = ev
+            self._orders.move_to_end(sid)
+            while len(self._orders) > self.max_pending:
+                self._orders.popitem(last=False)
+            return None
+
+        if etype == "FILL_OPEN" and sid in self._orders:
+            order = self._orders.pop(sid)
+            price = ev.get("fill_price")
+            if price is None:
+                price = order.get("price")
+            if price is None:
+                return None
+            return Trade(
+                source=self.source,
+                symbol=self.symbols(order["symbol"]),
+                side=_parse_side(order["side"]),
+                open_time=_parse_dt(ev["timestamp"]),
+                open_price=float(price),
+                volume=order.get("volume"),
+                sl=order.get("sl"),
+                tp=order.get("tp"),
+                trade_id=sid,
+                signal_id=sid,
+            )
+
+        return None
+
+
+# --- Streaming matcher ---
+
+
+def _trade_fields(t: Trade) -> dict[str, Any]:
+    return {
+        "symbol": t.symbol,
+        "side": t.side.value,
+        "trade_id": t.trade_id or "",
+        "open_time": t.open_time.isoformat(),
+        "open_price": t.open_price,
+        "source": t.source,
+    }
+
+
+class StreamMatcher:
+    """
+    Online counterpart of audit_trades.
+
+    The backtest/replay set is preloaded and indexed per (symbol, side) by open_time.
+    A live trade whose trade_id names an unused backtest trade of the same symbol
+    and side is matched on arrival (ids carried by several backtest trades link
+    nothing and are listed in id_conflicts, as with link_ids). Any other live trade waits until the
+    watermark (latest live open_time seen, or wall clock) has moved past its
+    open_time + tolerance + lateness, so that backtest trades the id pass will
+    still claim are not taken; it then takes the nearest unused open_time within
+    tolerance (MATCHED) or is reported EXTRA, in open_time order. A backtest
+    trade is reported MISSING once the watermark is past open_time + 2 *
+    tolerance + lateness (no waiting live trade can reach it then).
+
+    lateness_s (default: the tolerance) is how far out of order live trades may
+    arrive, and how much later than its backtest trade an id match may arrive.
+    Within those bounds the result equals audit_trades on the same trades.
+    Memory is bounded by the backtest set plus the live trades of one horizon.
+    """
+
+    def __init__(
+        self,
+        backtest: Iterable[Trade],
+        time_tolerance_s: int = 120,
+        price_tolerance: float | None = None,
+        lateness_s: float | None = None,
+    ):
+        if lateness_s is None:
+            lateness_s = time_tolerance_s
+        self.tol = timedelta(seconds=time_tolerance_s)
+        self.price_tolerance = price_tolerance
+        self.horizon = self.tol + timedelta(seconds=lateness_s)
+        # Live trades waiting for the time pass: (open_time, arrival, trade).
+        self._pending: list[tuple[datetime, int, Trade]] = []
+        self._arrivals = 0
+
+        # Global time order drives expiry; buckets drive candidate lookup.
+        self._bt = sorted(backtest, key=lambda t: t.open_time)
+        self._used = bytearray(len(self._bt))
+        self._expire_pos = 0
+
+        self._buckets: dict[tuple[str, str], tuple[list[datetime], list[int]]] = {}
+        for i, t in enumerate(self._bt):
+            times, idx = self._buckets.setdefault((t.symbol, t.side.value), ([], []))
+            times.append(t.open_time)
+            idx.append(i)
+
+        # Like link_ids: an id carried by several backtest trades links nothing.
+        ids = _id_index(self._bt, lambda t: t.trade_id or None)
+        self._ids = {k: v[0] for k, v in ids.items() if len(v) == 1}
+        self.id_conflicts = [
+            IdConflict(_fmt_key(k), "duplicate_backtest", tuple(self._bt[j] for j in v), ())
+            for k, v in ids.items()
+            if len(v) > 1
+        ]
+        self.watermark: Optional[datetime] = None
+
+    def _id_candidate(self, lt: Trade) -> Optional[int]:
+        i = self._ids.get(lt.trade_id) if lt.trade_id else None
+        if i is not None and not self._used[i]:
+            bt = self._bt[i]
+            if bt.symbol == lt.symbol and bt.side == lt.side:
+                return i
+        return None
+
+    def _time_candidate(self, lt: Trade) -> Optional[int]:
+        bucket = self._buckets.get((lt.symbol, lt.side.value))
+        if bucket is None:
+            return None
+        times, idx = bucket
+        lo = bisect_left(times, lt.open_time - self.tol)
+        hi = bisect_right(times, lt.open_time + self.tol)
+
+        best_i: Optional[int] = None
+        best_dt: Optional[timedelta] = None
+        for k in range(lo, hi):
+            j = idx[k]
+            if self._used[j]:
+                continue
+            bt = self._bt[j]
+            if self.price_tolerance is not None:
+                if abs(lt.open_price - bt.open_price) > self.price_tolerance:
+                    continue
+            dt = abs(bt.open_time - lt.open_time)
+            if best_dt is None or dt < best_dt:
+                best_dt = dt
+                best_i = j
+        return best_i
+
+    def _matched(self, j: int, lt: Trade) -> dict[str, Any]:
+        self._used[j] = 1
+        bt = self._bt[j]
+        return {
+            "alert": "MATCHED",
+            "symbol": bt.symbol,
+            "side": bt.side.value,
+            "bt_trade_id": bt.trade_id or "",
+            "lv_trade_id": lt.trade_id or "",
+            "bt_open_time": bt.open_time.isoformat(),
+            "lv_open_time": lt.open_time.isoformat(),
+            "open_time_diff_s": abs((bt.open_time - lt.open_time).total_seconds()),
+            "open_price_diff": lt.open_price - bt.open_price,
+        }
+
+    def on_live(self, lt: Trade) -> list[dict[str, Any]]:
+        alerts: list[dict[str, Any]] = []
+
+        j = self._id_candidate(lt)
+        if j is None:
+            heapq.heappush(self._pending, (lt.open_time, self._arrivals, lt))
+            self._arrivals += 1
+        else:
+            alerts.append(self._matched(j, lt))
+
+        alerts.extend(self.advance(lt.open_time))
+        return alerts
+
+    def _resolve(self, cutoff: Optional[datetime]) -> list[dict[str, Any]]:
+        # Time pass for waiting live trades older than cutoff (all with None).
+        alerts: list[dict[str, Any]] = []
+        while self._pending and (cutoff is None or self._pending[0][0] < cutoff):
+            lt = heapq.heappop(self._pending)[2]
+            j = self._time_candidate(lt)
+            if j is None:
+                alerts.append({"alert": "EXTRA", **_trade_fields(lt)})
+            else:
+                alerts.append(self._matched(j, lt))
+        return alerts
+
+    def advance(self, now: datetime) -> list[dict[str, Any]]:
+        """
+        Move the watermark forward: settle the live trades that waited long
+        enough and report backtest trades that can no longer match.
+        """
+        if self.watermark is not None and now <= self.watermark:
+            return []
+        self.watermark = now
+
+        alerts = self._resolve(now - self.horizon)
+        cutoff = now - self.horizon - self.tol
+        while self._expire_pos < len(self._bt) and self._bt[self._expire_pos].open_time < cutoff:
+            i = self._expire_pos
+            if not self._used[i]:
+                self._used[i] = 1
+                alerts.append({"alert": "MISSING", **_trade_fields(self._bt[i])})
+            self._expire_pos += 1
+        return alerts
+
+    def finish(self) -> list[dict[str, Any]]:
+        """End of stream: settle every waiting live trade; unmatched backtest trades are missing."""
+        alerts = self._resolve(None)
+        for i in range(self._expire_pos, len(self._bt)):
+            if not self._used[i]:
+                self._used[i] = 1
+                alerts.append({"alert": "MISSING", **_trade_fields(self._bt[i])})
+        self._expire_pos = len(self._bt)
+        return alerts
+
+
+def _stamp(alerts: list[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    now = datetime.now(timezone.utc).isoformat()
+    for a in alerts:
+        a["emitted_at"] = now
+        yield a
+
+
+def run_watch(
+    matcher: StreamMatcher,
+    follower: LineFollower,
+    parser: CsvTradeParser | EventTradeParser,
+    sink: AlertSink,
+    follow: bool = True,
+    poll_interval: float = 0.2,
+    wall_clock: bool = False,
+    emit_matched: bool = False,
+) -> dict[str, int]:
+    """
+    Main watch loop. Returns alert counts per kind, plus BAD_LINES: lines the
+    parser rejected (logged and skipped, the watch keeps running).
+    Stops at end of file when follow=False, or on KeyboardInterrupt.
+    """
+    counts = {"MATCHED": 0, "MISSING": 0, "EXTRA": 0, "BAD_LINES": 0}
+    reopens = follower.reopens
+
+    def publish(alerts: list[dict[str, Any]]) -> None:
+        for a in _stamp(alerts):
+            counts[a["alert"]] += 1
+            if a["alert"] == "MATCHED" and not emit_matched:
+                continue
+            sink.emit(a)
+
+    try:
+        while True:
+            lines = follower.poll()
+            if not follow and not lines:
+                lines = follower.flush_partial()
+
+            if follower.reopens != reopens:
+                reopens = follower.reopens
+                parser.reset()
+
+            for line in lines:
+                try:
+                    lt = parser.feed(line)
+                except (ValueError, KeyError) as e:  # json.JSONDecodeError is a ValueError
+                    counts["BAD_LINES"] += 1
+                    logger.warning("Skipping bad line in %s: %s (%r)", follower.path, e, line[:200])
+                    continue
+                if lt is not None:
+                    publish(matcher.on_live(lt))
+
+            if wall_clock:
+                publish(matcher.advance(datetime.now(timezone.utc)))
+
+            if not lines:
+                if not follow:
+                    break
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+
+    if not follow:
+        publish(matcher.finish())
+    sink.close()
+    return counts
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.io_csv import BadRowPolicy, read_trades_csv
+from consistency_auditor.io_mmap import read_trades_columns
+
+
+def _write(p: Path) -> None:
+    p.write_text(
+        "symbol,side,open_time,open_price\n"
+        "EURUSD,BUY,2026-01-01T10:00:00+00:00,1.1000\n"
+        "EURUSD,HOLD,2026-01-01T11:00:00+00:00,1.1000\n"
+        "\n"
+        "EURUSD,SELL,not-a-time,1.2000\n"
+        "EURUSD,SELL,2026-01-01T12:00:00+00:00,1.2000\n",
+        encoding="utf-8",
+    )
+
+
+def test_fail_mode_reports_line_number(tmp_path: Path):
+    p = tmp_path / "bt.csv"
+    _write(p)
+    with pytest.raises(ValueError, match="line 3"):
+        read_trades_csv(p, source="backtest")
+
+
+@pytest.mark.parametrize("reader", ["csv", "mmap"])
+def test_quarantine_writes_rejected_rows(tmp_path: Path, reader: str):
+    p = tmp_path / "bt.csv"
+    _write(p)
+    q = tmp_path / "quarantine.csv"
+    policy = BadRowPolicy("quarantine", quarantine_path=q)
+
+    if reader == "csv":
+        trades = read_trades_csv(p, source="backtest", bad_rows=policy)
+    else:
+        trades = read_trades_columns(p, source="backtest", bad_rows=policy).to_trades()
+
+    assert len(trades) == 2
+    assert policy.count == 2
+    with q.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["line"] for r in rows] == ["3", "5"]
+    assert "invalid side/type" in rows[0]["reason"]
+    assert rows[1]["row"] == "EURUSD,SELL,not-a-time,1.2000"
+
+
+def test_error_budget_aborts(tmp_path: Path):
+    p = tmp_path / "bt.csv"
+    _write(p)
+    with pytest.raises(ValueError, match="too many bad rows"):
+        read_trades_csv(p, source="backtest", bad_rows=BadRowPolicy("skip", max_bad_rows=1))
+
+
+def test_cli_on_bad_row_skip(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    _write(bt)
+    lv = tmp_path / "lv.csv"
+    lv.write_text("symbol,side,open_time,open_price\n", encoding="utf-8")
+
+    assert main(["audit", "--backtest", str(bt), "--live", str(lv)]) == 2
+    assert "ERROR:" in capsys.readouterr().out
+
+    rc = main(["audit", "--backtest", str(bt), "--live", str(lv), "--on-bad-row", "skip"])
+    out = capsys.readouterr().out
+    assert rc == 0
+    assert "skipped 2 bad rows" in out
+    assert "missing_in_live=2" in out
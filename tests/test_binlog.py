@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.binlog import (
+    BinaryEventWriter,
+    convert_to_jsonl,
+    is_binary_log,
+    read_binary_events,
+)
+from consistency_auditor.eventlog import EventLog, iter_events, read_manifest
+from consistency_auditor.events import write_jsonl
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import OrderRequest
+
+
+class _Side(str, Enum):
+    BUY = "BUY"
+
+
+def _events():
+    params = {"fast": 12, "slow": 26, "risk": 0.5, "filters": ["atr", "rsi"], "on": True}
+    for i in range(20):
+        yield (
+            {
+                "event_type": "DECISION",
+                "signal_id": f"sig{i:03d}",
+                "symbol": "EURUSD" if i % 2 else "GBPUSD",
+                "side": _Side.BUY,
+                "price": 1.1 + i / 1000,
+                "volume": -i,
+                "comment": None,
+                "timestamp": datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i),
+                "params": params,
+                "context": {"bar": {"o": 1.0, "c": float("inf")}, 3: "int key"},
+            }
+        )
+        if i == 10:
+            params["slow"] = 30  # mutated in place: must not reuse the old dict
+
+
+def test_round_trip_matches_jsonl_bytes(tmp_path: Path):
+    bin_path = tmp_path / "events.bin"
+    w = BinaryEventWriter(bin_path)
+    jsonl = tmp_path / "ref.jsonl"
+    n = 0
+    for ev in _events():
+        w.write(ev)
+        write_jsonl(jsonl, ev)
+        n += 1
+
+    assert is_binary_log(bin_path)
+    assert not is_binary_log(jsonl)
+    assert bin_path.stat().st_size < jsonl.stat().st_size / 2
+
+    decoded = list(read_binary_events(bin_path))
+    assert decoded[0]["params"]["slow"] == 26
+    assert decoded[11]["params"]["slow"] == 30
+
+    out = tmp_path / "out.jsonl"
+    assert convert_to_jsonl(bin_path, out) == n
+    assert out.read_bytes() == jsonl.read_bytes()
+
+
+def test_append_after_restart_keeps_interning(tmp_path: Path):
+    path = tmp_path / "events.bin"
+    expected = []
+    w = BinaryEventWriter(path)
+    for i, ev in enumerate(_events()):
+        if i == 5:
+            w.close()  # the old process exits, releasing the file
+            w = BinaryEventWriter(path)  # new process: tables rebuilt from the file
+        w.write(ev)
+        expected.append(json.loads(json.dumps(ev, default=str)))
+
+    assert list(read_binary_events(path)) == expected
+
+
+def test_binary_log_has_one_writer_per_file(tmp_path: Path):
+    a = EventLog(tmp_path, encoding="binary")
+    with pytest.raises(ValueError, match="in use by another writer"):
+        EventLog(tmp_path, encoding="binary")
+
+    b = EventLog(tmp_path, encoding="binary", writer_id="b")
+    a.append({"event_type": "X", "symbol": "EURUSD"})
+    b.append({"event_type": "Y", "symbol": "GBPUSD"})
+    a.append({"event_type": "Z", "symbol": "USDJPY"})
+    a.close()
+    b.close()
+    assert list(read_binary_events(tmp_path / "events.bin")) == [
+        {"event_type": "X", "symbol": "EURUSD"},
+        {"event_type": "Z", "symbol": "USDJPY"},
+    ]
+    assert list(read_binary_events(tmp_path / "events.b.bin")) == [
+        {"event_type": "Y", "symbol": "GBPUSD"}
+    ]
+    EventLog(tmp_path, encoding="binary").close()  # free again once closed
+
+
+def test_recorder_binary_encoding_with_rotation(tmp_path: Path):
+    rec = ConsistencyRecorder(
+        tmp_path, "run1", rotate_bytes=300, compress_segments="gz", encoding="binary"
+    )
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(12):
+        rec.log_order_request(
+            OrderRequest(
+                signal_id=f"sig{i:03d}",
+                timestamp=t0 + timedelta(hours=i),
+                symbol="EURUSD",
+                side="BUY",
+                volume=0.1,
+            )
+        )
+
+    audit = tmp_path / "run1" / "audit"
+    assert rec.events_path == audit / "events.bin"
+    segments = read_manifest(audit)
+    assert segments and segments[0]["file"] == "events-000001.bin.gz"
+    assert [e["signal_id"] for e in iter_events(audit)] == [f"sig{i:03d}" for i in range(12)]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.compression import detect_compression, open_text
+from consistency_auditor.io_csv import read_trades_csv
+
+CSV = (
+    "symbol;side;open_time;open_price\n"
+    "EURUSD;BUY;2026-01-01T10:00:00+00:00;1.1000\n"
+    "EURUSD;SELL;2026-01-01T12:00:00+00:00;1.2000\n"
+)
+
+
+def test_read_gzip_by_extension_and_by_magic(tmp_path: Path):
+    gz = tmp_path / "bt.csv.gz"
+    gz.write_bytes(gzip.compress(CSV.encode("utf-8")))
+    disguised = tmp_path / "bt.csv"
+    disguised.write_bytes(gz.read_bytes())
+
+    assert detect_compression(disguised) == "gz"
+    for p in (gz, disguised):
+        trades = read_trades_csv(p, source="backtest")
+        assert [t.open_price for t in trades] == [1.1, 1.2]
+
+
+def test_read_zstd(tmp_path: Path):
+    pytest.importorskip("zstandard")
+    p = tmp_path / "bt.csv.zst"
+    with open_text(p, "w", newline="") as f:
+        f.write(CSV)
+    assert len(read_trades_csv(p, source="backtest")) == 2
+
+
+def test_cli_compressed_inputs_and_outputs(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv.gz"
+    bt.write_bytes(gzip.compress(CSV.encode("utf-8")))
+    lv = tmp_path / "lv.csv"
+    lv.write_text("symbol,side,open_time,open_price\nEURUSD,BUY,2026-01-01T10:01:00+00:00,1.1002\n")
+    out = tmp_path / "out"
+
+    rc = main(
+        ["audit", "--backtest", str(bt), "--live", str(lv), "--out", str(out), "--out-prefix", "x",
+         "--compress", "gz"]
+    )
+    capsys.readouterr()
+
+    assert rc == 0
+    text = gzip.decompress((out / "matched_x.csv.gz").read_bytes()).decode("utf-8")
+    assert text.splitlines()[0].startswith("symbol,side,bt_trade_id")
+    assert len(text.splitlines()) == 2
+    assert (out / "unmatched_x.csv.gz").exists()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from consistency_auditor.eventlog import iter_events, read_manifest
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import OrderRequest
+
+
+def _log_orders(rec: ConsistencyRecorder, n: int) -> datetime:
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(n):
+        rec.log_order_request(
+            OrderRequest(
+                signal_id=f"sig{i:03d}",
+                timestamp=t0 + timedelta(hours=i),
+                symbol="EURUSD",
+                side="BUY",
+                volume=0.1,
+            )
+        )
+    return t0
+
+
+def test_size_rotation_writes_manifest_and_segments(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run1", rotate_bytes=600, compress_segments="gz")
+    t0 = _log_orders(rec, 12)
+
+    audit = tmp_path / "run1" / "audit"
+    segments = read_manifest(audit)
+    assert len(segments) >= 2
+    assert segments[0]["file"] == "events-000001.jsonl.gz"
+    assert segments[0]["first_signal_id"] == "sig000"
+    assert segments[0]["start"] == t0.isoformat()
+    assert sum(s["events"] for s in segments) < 12  # the rest is in the active file
+    assert (audit / "events.jsonl").exists()
+
+    all_ids = [e["signal_id"] for e in iter_events(audit)]
+    assert all_ids == [f"sig{i:03d}" for i in range(12)]
+
+
+def test_time_window_skips_segments(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run2", rotate_bytes=1)  # one event per segment
+    t0 = _log_orders(rec, 5)
+
+    audit = tmp_path / "run2" / "audit"
+    assert len(read_manifest(audit)) == 4
+
+    got = list(iter_events(audit, start=t0 + timedelta(hours=2), end=t0 + timedelta(hours=3)))
+    assert [e["signal_id"] for e in got] == ["sig002", "sig003"]
+
+
+def test_restart_continues_numbering(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run3", rotate_bytes=1)
+    _log_orders(rec, 2)
+    rec2 = ConsistencyRecorder(tmp_path, "run3", rotate_bytes=1)
+    _log_orders(rec2, 1)
+
+    seqs = [s["seq"] for s in read_manifest(tmp_path / "run3" / "audit")]
+    assert seqs == [1, 2]
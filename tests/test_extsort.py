@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.extsort import external_sort
+from consistency_auditor.match import audit_sorted, audit_trades, merge_results
+from consistency_auditor.models import Side, Trade
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+CET = timezone(timedelta(hours=1))
+
+
+def _trades(rng: random.Random, source: str, n: int) -> list[Trade]:
+    out = []
+    for i in range(n):
+        t = T0 + timedelta(seconds=rng.randrange(3600), microseconds=rng.randrange(10**6))
+        out.append(
+            Trade(
+                source,
+                rng.choice(["EURUSD", "GBPUSD", "XAUUSD"]),
+                rng.choice([Side.BUY, Side.SELL]),
+                t.astimezone(CET) if i % 3 == 0 else t,
+                round(rng.uniform(1.0, 1.1), 5),
+                close_time=t + timedelta(minutes=5) if i % 2 else None,
+                close_price=1.2 if i % 2 else None,
+                volume=0.1 * (i % 4) if i % 4 else None,
+                sl=1.0 if i % 5 == 0 else None,
+                trade_id=f"T{i}" if i % 2 else None,
+                signal_id="sig-é" if i % 7 == 0 else None,
+            )
+        )
+    return out
+
+
+def _key(t: Trade):
+    return (t.symbol, t.side.value, t.open_time)
+
+
+def test_external_sort_equals_stable_sort(tmp_path: Path):
+    trades = _trades(random.Random(1), "live", 500)
+    trades += trades[:20]  # exact duplicates keep their input order
+    expected = sorted(trades, key=_key)
+
+    with external_sort(trades, run_size=37, fan_in=3, tmp_dir=tmp_path) as st:
+        assert 1 < len(st.runs) <= 3 and len(st) == len(trades)  # 15 runs, merged 3 at a time
+        got = list(st)
+        assert got == expected and list(st) == expected
+        assert [t.open_time.isoformat() for t in got] == [t.open_time.isoformat() for t in expected]
+        tmp = st.tmp
+        assert tmp is not None and tmp.is_dir()
+    assert not tmp.exists()
+
+    in_memory = external_sort(trades, memory_mb=64)
+    assert in_memory.tmp is None and list(in_memory) == expected
+
+    # Symbols read back from different run files are one interned object each.
+    with external_sort(_trades(random.Random(2), "live", 200), run_size=37) as st:
+        assert len({id(t.symbol) for t in st}) == 3
+
+
+def test_audit_sorted_equals_audit_trades():
+    rng = random.Random(2)
+    bt = _trades(rng, "backtest", 400)
+    lv = [
+        Trade("live", t.symbol, t.side, t.open_time + timedelta(seconds=rng.uniform(-30, 30)),
+              t.open_price, trade_id=t.trade_id)
+        for t in bt
+        if rng.random() < 0.85
+    ]
+    lv += _trades(rng, "live", 40)
+    lv = [t for t in lv if t.trade_id is None]  # ids stay within their (symbol, side) here
+    expected = audit_trades(bt, lv, time_tolerance_s=20)
+
+    stream = audit_sorted(external_sort(bt, run_size=50), sorted(lv, key=_key), time_tolerance_s=20)
+    buckets = list(stream)
+    assert [k for k, _ in buckets] == sorted({(t.symbol, t.side.value) for t in bt + lv})
+    res = merge_results(r for _, r in buckets)
+
+    def pairs(r):
+        return sorted((_key(m.backtest), _key(m.live)) for m in r.matched)
+
+    assert pairs(res) == pairs(expected)
+    assert sorted(map(_key, res.missing_in_live)) == sorted(map(_key, expected.missing_in_live))
+    assert sorted(map(_key, res.extra_in_live)) == sorted(map(_key, expected.extra_in_live))
+
+    with pytest.raises(ValueError, match="live trades are not sorted"):
+        list(audit_sorted(sorted(bt, key=_key), sorted(lv, key=_key, reverse=True)))
+
+
+def test_cli_external_sort(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    # Exports ordered by ticket, not by (symbol, side, open_time).
+    bt.write_text(
+        "trade_id,symbol,side,open_time,open_price\n"
+        "1,EURUSD,BUY,2026-01-01T10:05:00Z,1.1000\n"
+        "2,EURUSD,BUY,2026-01-01T10:00:00Z,1.1000\n"
+        "3,GBPUSD,SELL,2026-01-01T09:00:00Z,1.3000\n",
+        encoding="utf-8",
+    )
+    lv.write_text(
+        "trade_id,symbol,side,open_time,open_price\n"
+        "8,GBPUSD,SELL,2026-01-01T09:00:30Z,1.3001\n"
+        "9,EURUSD,BUY,2026-01-01T10:05:20Z,1.1002\n",
+        encoding="utf-8",
+    )
+    argv = ["audit", "--backtest", str(bt), "--live", str(lv)]
+    assert main([*argv, "--out", str(tmp_path / "plain"), "--out-prefix", "x"]) == 0
+    plain = capsys.readouterr().out
+    for workers in ("1", "2"):
+        out_dir = tmp_path / f"sorted{workers}"
+        sorted_argv = [
+            *argv, "--external-sort", "--sort-tmp-dir", str(tmp_path),
+            "--workers", workers, "--out", str(out_dir), "--out-prefix", "x",
+        ]
+        assert main(sorted_argv) == 0
+        out = capsys.readouterr().out
+        # Same summary, but no per-pair listing: nothing is kept in memory.
+        assert out.splitlines()[:2] == plain.splitlines()[:2]
+        assert "matched=2 missing_in_live=1 extra_in_live=0" in out
+        assert "Matched pairs:" in plain and "Matched pairs:" not in out
+        for name in ("matched_x.csv", "unmatched_x.csv"):
+            got = (out_dir / name).read_text(encoding="utf-8").splitlines()
+            want = (tmp_path / "plain" / name).read_text(encoding="utf-8").splitlines()
+            assert got[0] == want[0]
+            assert sorted(got[1:]) == sorted(want[1:])
+    assert not list(tmp_path.glob("ca-sort-*"))
+
+    assert main([*argv, "--external-sort", "--auto-skew"]) == 2
+    assert "does not combine" in capsys.readouterr().out
+    assert main([*argv, "--external-sort", "--outliers"]) == 2
+    assert "need them all in memory" in capsys.readouterr().out
+
+
+def test_audit_sorted_shares_one_process_pool(monkeypatch):
+    import concurrent.futures
+
+    started = []
+
+    class _Pool(concurrent.futures.ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            started.append(max_workers)
+            super().__init__(max_workers)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", _Pool)
+    bt = [
+        Trade("backtest", sym, Side.BUY, T0 + timedelta(hours=i), 1.1)
+        for i, sym in enumerate(["EURUSD", "GBPUSD", "USDJPY"])
+    ]
+    lv = [Trade("live", t.symbol, t.side, t.open_time + timedelta(seconds=30), 1.1) for t in bt]
+    results = list(audit_sorted(bt, lv, workers=2, partition_size=1))
+    assert len(results) == 3
+    assert sum(len(r.matched) for _, r in results) == 3
+    assert started == [2]
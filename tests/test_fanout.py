@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import random
+import warnings
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from consistency_auditor.cli import main
+from consistency_auditor.fanout import SharedBacktest, _View, audit_fanout, fanout_summary
+from consistency_auditor.io_csv import read_trades_csv
+from consistency_auditor.match import BacktestIndex, audit_trades
+from consistency_auditor.models import Side, Trade, epoch_us
+
+T0 = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+HEADER = "trade_id,symbol,side,open_time,open_price\n"
+
+
+def _row(t: Trade) -> str:
+    tid = t.trade_id or ""
+    return f"{tid},{t.symbol},{t.side.value},{t.open_time.isoformat()},{t.open_price!r}\n"
+
+
+def _write(path: Path, trades: list[Trade]) -> Path:
+    path.write_text(HEADER + "".join(_row(t) for t in trades), encoding="utf-8")
+    return path
+
+
+def _random_set(rng: random.Random, source: str, n: int, ids: list[str]) -> list[Trade]:
+    return [
+        Trade(
+            source,
+            rng.choice(["EURUSD", "GBPUSD"]),
+            rng.choice([Side.BUY, Side.SELL]),
+            T0 + timedelta(seconds=rng.randrange(3600), microseconds=rng.randrange(1000) * 1000),
+            round(rng.uniform(1.0, 1.01), 5),
+            trade_id=rng.choice(ids),
+        )
+        for _ in range(n)
+    ]
+
+
+def _accounts(tmp_path: Path) -> tuple[list[Trade], dict[str, Path]]:
+    rng = random.Random(11)
+    ids = ["", "", "", "A", "B", "C", "D", "E"]  # mostly no id; some unique, some duplicated
+    bt = _random_set(rng, "backtest", 300, ids)
+    paths = {}
+    for k in range(3):
+        lv = [
+            Trade("live", t.symbol, t.side, t.open_time + timedelta(seconds=rng.uniform(-20, 20)),
+                  t.open_price, trade_id=t.trade_id)
+            for t in bt
+            if rng.random() < 0.8
+        ]
+        lv += _random_set(rng, "live", 30, ids)
+        lv.sort(key=lambda t: t.open_time)
+        paths[f"acc{k}"] = _write(tmp_path / f"lv{k}.csv", lv)
+    return bt, paths
+
+
+def test_fanout_equals_per_account_audit(tmp_path: Path):
+    bt, paths = _accounts(tmp_path)
+    index = BacktestIndex(bt)
+    for workers in (1, 2):
+        fr = audit_fanout(index, paths, time_tolerance_s=30, price_tolerance=0.001, workers=workers)
+        assert list(fr.results) == ["acc0", "acc1", "acc2"]
+        for account, path in paths.items():
+            lv = read_trades_csv(path, source="live")
+            expected = audit_trades(index, lv, time_tolerance_s=30, price_tolerance=0.001)
+            assert fr.results[account] == expected
+            assert expected.id_conflicts and expected.matched
+
+
+def test_divergence_across_accounts(tmp_path: Path):
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, T0, 1.1000, trade_id="1"),
+        Trade("backtest", "EURUSD", Side.BUY, T0 + timedelta(minutes=10), 1.2000),
+    ]
+    a = [Trade("live", "EURUSD", Side.BUY, T0 + timedelta(seconds=2), 1.1002, trade_id="1")]
+    b = [
+        Trade("live", "EURUSD", Side.BUY, T0 + timedelta(seconds=5), 1.0999),
+        Trade("live", "EURUSD", Side.BUY, T0 + timedelta(minutes=10), 1.2000),
+    ]
+    fr = audit_fanout(bt, {"a": _write(tmp_path / "a.csv", a), "b": _write(tmp_path / "b.csv", b)})
+    first, second = fr.divergence
+    assert (first.matched, first.missing_accounts) == (2, ())
+    assert abs(first.price_spread - 0.0003) < 1e-9 and first.time_spread_s == 3.0
+    assert (second.matched, second.missing_accounts, second.price_spread) == (1, ("a",), 0.0)
+    summary = fanout_summary(fr)
+    assert (summary["missing_in_all"], summary["missing_in_some"]) == (0, 1)
+
+
+def test_shared_block_lookup_and_cleanup():
+    bt = [
+        Trade("backtest", "GBPUSD", Side.SELL, T0, 1.3, trade_id="X"),
+        Trade("backtest", "EURUSD", Side.BUY, T0, 1.1, trade_id="X"),
+        Trade("backtest", "EURUSD", Side.BUY, T0 - timedelta(seconds=1), 1.1, trade_id="Y"),
+    ]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with SharedBacktest(BacktestIndex(bt), "trade_id") as shared:
+            view = _View(shared.spec, shared.shm.buf)
+            # Positions follow (symbol, side, time): EURUSD BUY Y, EURUSD BUY X, GBPUSD SELL X.
+            assert view.lookup(b"X") == [1, 2] and view.lookup(b"Y") == [0]
+            assert view.lookup(b"Z") == [] and view.bucket_of(2) == ("GBPUSD", "SELL")
+            assert list(view.times) == [epoch_us(t.open_time) for t in shared.order]
+            view.release()
+
+
+def test_cli_audit_fanout(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    bt.write_text(
+        HEADER
+        + "1,EURUSD,BUY,2026-01-01T10:00:00Z,1.1000\n"
+        + "2,EURUSD,BUY,2026-01-01T11:00:00Z,1.1000\n",
+        encoding="utf-8",
+    )
+    a = tmp_path / "a.csv"
+    a.write_text(HEADER + "1,EURUSD,BUY,2026-01-01T10:00:01Z,1.1001\n", encoding="utf-8")
+    b = tmp_path / "acct_b.csv"
+    b.write_text(HEADER + "9,EURUSD,BUY,2026-01-01T11:00:05Z,1.1000\n", encoding="utf-8")
+    out = tmp_path / "out"
+    argv = ["audit-fanout", "--backtest", str(bt), "--live", f"main={a}", "--live", str(b)]
+    assert main([*argv, "--workers", "2", "--out", str(out), "--out-prefix", "p"]) == 0
+    text = capsys.readouterr().out
+    assert "main: matched=1 missing_in_live=1 extra_in_live=0" in text
+    assert "acct_b: matched=1 missing_in_live=1 extra_in_live=0" in text
+    assert "missing_in_all=0 missing_in_some=2" in text
+    assert "Wrote: " + str(out / "matched_p_main.csv") in text
+
+    with (out / "divergence_p.csv").open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["bt_trade_id"], r["matched_accounts"], r["missing_accounts"]) for r in rows] == [
+        ("1", "1", "acct_b"),
+        ("2", "1", "main"),
+    ]
+
+    assert main([*argv, "--fail-on", "missing"]) == 3
+    capsys.readouterr()
+    assert main([*argv, "--live", str(b)]) == 2
+    assert "duplicate account: 'acct_b'" in capsys.readouterr().out
+    assert main(["audit-fanout", "--backtest", str(bt), "--live", "x=nope.csv"]) == 2
+    assert "live file not found" in capsys.readouterr().out
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.io_csv import read_trades_csv
+from consistency_auditor.match import BacktestIndex, audit_trades, link_ids
+from consistency_auditor.models import Side, Trade
+
+T0 = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _t(source, s, tid=None, symbol="EURUSD", side=Side.BUY, sig=None, price=1.1, vol=None):
+    return Trade(
+        source,
+        symbol,
+        side,
+        T0 + timedelta(seconds=s),
+        price,
+        volume=vol,
+        trade_id=tid,
+        signal_id=sig,
+    )
+
+
+def test_duplicate_live_ids_do_not_double_match():
+    bt = [_t("backtest", 0, "A"), _t("backtest", 600, "B")]
+    lv = [_t("live", 5, "A"), _t("live", 6000, "A"), _t("live", 605, "B")]
+    res = audit_trades(bt, lv, time_tolerance_s=60)
+
+    assert [c.reason for c in res.id_conflicts] == ["duplicate_live"]
+    assert res.id_conflicts[0].key == "A" and len(res.id_conflicts[0].live) == 2
+    # B links by id; A's trades fall back to time matching.
+    assert sorted((m.backtest.trade_id, m.live.open_time) for m in res.matched) == [
+        ("A", lv[0].open_time),
+        ("B", lv[2].open_time),
+    ]
+    assert res.extra_in_live == [lv[1]]
+    assert not res.missing_in_live
+
+
+def test_duplicate_backtest_and_mismatch_reasons():
+    bt = [
+        _t("backtest", 0, "A"),
+        _t("backtest", 300, "A"),
+        _t("backtest", 900, "C", side=Side.SELL),
+        _t("backtest", 1200, "D"),
+        _t("backtest", 1500, "D"),
+    ]
+    lv = [_t("live", 1, "A"), _t("live", 901, "C"), _t("live", 2, "A")]
+    links, conflicts = link_ids(bt, lv)
+    assert links == {}
+    reasons = {c.key: c.reason for c in conflicts}
+    assert reasons == {
+        "A": "duplicate_both",
+        "C": "symbol_side_mismatch",
+        "D": "duplicate_backtest",
+    }
+    assert [len(c.live) for c in conflicts if c.key == "D"] == [0]
+
+    res = audit_trades(bt, lv, time_tolerance_s=60)
+    assert len(res.id_conflicts) == 3
+    assert len(res.matched) == 1  # one live "A" by time; "C" is on the other side
+    assert len(res.extra_in_live) == 2
+    # Matched + missing cover every backtest trade exactly once.
+    seen = [id(m.backtest) for m in res.matched] + [id(t) for t in res.missing_in_live]
+    assert sorted(seen) == sorted(map(id, bt))
+
+
+def test_composite_and_signal_id_keys():
+    bt = [_t("backtest", 0, "7"), _t("backtest", 0, "7", symbol="GBPUSD")]
+    lv = [_t("live", 30, "7", symbol="GBPUSD"), _t("live", 3000, "7")]
+    assert [c.reason for c in audit_trades(bt, lv).id_conflicts] == ["duplicate_both"]
+    res = audit_trades(bt, lv, time_tolerance_s=60, id_key="trade_id+symbol")
+    assert not res.id_conflicts and len(res.matched) == 2
+
+    bt = [_t("backtest", 0, "bt-1", sig="s1")]
+    lv = [_t("live", 3000, "lv-9", sig="s1")]
+    assert not audit_trades(bt, lv, time_tolerance_s=60).matched
+    assert len(audit_trades(bt, lv, time_tolerance_s=60, id_key="signal_id").matched) == 1
+
+    with pytest.raises(ValueError, match="invalid id key"):
+        audit_trades(bt, lv, id_key="ticket")
+
+
+def test_index_and_fills_report_conflicts():
+    bt = [
+        _t("backtest", 0, "A", vol=2.0),
+        _t("backtest", 100, "A", vol=1.0),
+        _t("backtest", 900, "B", vol=2.0),
+    ]
+    lv = [
+        _t("live", 901, "B", vol=1.0),
+        _t("live", 950, "B", vol=1.0),
+        _t("live", 1, "A", vol=2.0),
+    ]
+    plain = audit_trades(bt, lv, time_tolerance_s=60)
+    assert audit_trades(BacktestIndex(bt), lv, time_tolerance_s=60) == plain
+    reasons = {c.key: c.reason for c in plain.id_conflicts}
+    assert reasons == {"B": "duplicate_live", "A": "duplicate_backtest"}
+
+    fills = audit_trades(bt, lv, time_tolerance_s=60, partial_fills=True)
+    # Several live fills sharing an id are expected here: only A conflicts.
+    assert [c.reason for c in fills.id_conflicts] == ["duplicate_backtest"]
+    b = next(m for m in fills.matched if m.backtest.trade_id == "B")
+    assert b.fill_count == 2
+
+
+def test_signal_id_column_and_cli(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    bt.write_text(
+        "ticket,signal_id,symbol,side,open_time,open_price\n"
+        "1,s1,EURUSD,BUY,2026-01-01T10:00:00Z,1.1\n"
+        "1,s2,EURUSD,BUY,2026-01-01T11:00:00Z,1.1\n",
+        encoding="utf-8",
+    )
+    lv.write_text(
+        "ticket,signal_id,symbol,side,open_time,open_price\n"
+        "9,s1,EURUSD,BUY,2026-01-01T10:30:00Z,1.1\n",
+        encoding="utf-8",
+    )
+    assert [t.signal_id for t in read_trades_csv(bt, source="backtest")] == ["s1", "s2"]
+
+    out = tmp_path / "out"
+    argv = [
+        "audit", "--backtest", str(bt), "--live", str(lv), "--out", str(out), "--out-prefix", "x"
+    ]
+    assert main(argv) == 0
+    text = capsys.readouterr().out
+    assert "ID conflicts (1):" in text and "id=1 duplicate_backtest backtest=2 live=0" in text
+    rows = (out / "id_conflicts_x.csv").read_text(encoding="utf-8").splitlines()
+    assert rows[0] == "id,reason,source,symbol,side,trade_id,open_time,open_price"
+    assert len(rows) == 3
+
+    assert main([*argv, "--id-key", "signal_id", "--out-prefix", "y"]) == 0
+    text = capsys.readouterr().out
+    assert "matched=1 missing_in_live=1 extra_in_live=0" in text
+    assert "ID conflicts" not in text
+    assert not (out / "id_conflicts_y.csv").exists()
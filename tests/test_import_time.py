@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import consistency_auditor
+from consistency_auditor import cli, io_csv, match
+
+SRC = Path(consistency_auditor.__file__).resolve().parents[1]
+
+# Generous: ~30 ms on a laptop, mostly argparse. Catches an eager heavy import
+# (pandas alone is several hundred ms), not small regressions.
+CLI_IMPORT_BUDGET_US = 250_000
+
+HEAVY = {"pandas", "pyarrow", "numpy", "zstandard"}
+SUBSYSTEMS = {
+    "consistency_auditor.extsort",
+    "consistency_auditor.fanout",
+    "consistency_auditor.io_csv",
+    "consistency_auditor.match",
+    "consistency_auditor.outliers",
+    "consistency_auditor.pivot",
+    "consistency_auditor.report_csv",
+    "consistency_auditor.recorder",
+    "consistency_auditor.replay",
+    "consistency_auditor.skew",
+    "consistency_auditor.store",
+    "consistency_auditor.watch",
+    "sqlite3",
+    "concurrent.futures",
+    "gzip",
+    "lzma",
+    "bz2",
+}
+
+
+def _import_times(code: str) -> dict[str, int]:
+    """Run `code` under -X importtime; module -> cumulative import time (us)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    out = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        out[name.strip()] = int(cumulative)
+    return out
+
+
+def test_cli_import_is_light():
+    times = _import_times("import consistency_auditor.cli")
+    loaded = set(times)
+    assert not loaded & HEAVY
+    assert not loaded & SUBSYSTEMS
+    assert times["consistency_auditor.cli"] < CLI_IMPORT_BUDGET_US
+
+
+def test_cli_loads_only_the_subcommand_it_runs(tmp_path: Path):
+    csv = tmp_path / "t.csv"
+    csv.write_text(
+        "symbol,side,open_time,open_price\nEURUSD,BUY,2026-01-01T10:00:00+00:00,1.1\n",
+        encoding="utf-8",
+    )
+    code = (
+        "import sys; from consistency_auditor.cli import main; "
+        f"main(['audit', '--backtest', {str(csv)!r}, '--live', {str(csv)!r}]); "
+        "import json; print(json.dumps(sorted(sys.modules)), file=sys.stderr)"
+    )
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    loaded = set(json.loads(proc.stderr.strip().splitlines()[-1]))
+    assert {"consistency_auditor.io_csv", "consistency_auditor.match"} <= loaded
+    lazy = (
+        "store", "replay", "watch", "skew", "recorder", "io_mmap", "pivot", "outliers", "fanout",
+        "extsort",
+    )
+    for mod in lazy:
+        assert f"consistency_auditor.{mod}" not in loaded
+    assert not loaded & HEAVY
+
+
+def test_recorder_import_does_not_load_pandas():
+    times = _import_times("import consistency_auditor.recorder, consistency_auditor.replay")
+    assert "consistency_auditor.snapshot" in times
+    assert not set(times) & HEAVY
+
+
+def test_cli_choices_match_modules():
+    assert cli.BAD_ROW_MODES == io_csv.BAD_ROW_MODES
+    assert cli.ID_KEYS == match.ID_KEYS
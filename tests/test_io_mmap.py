@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+from consistency_auditor.cli import main
+from consistency_auditor.io_csv import read_trades_csv
+from consistency_auditor.io_mmap import TradeColumns, read_trades_columns
+from consistency_auditor.match import audit_columns, audit_trades
+
+
+def _same(a, b) -> None:
+    assert len(a) == len(b)
+    for x, y in zip(a, b):
+        assert (x.symbol, x.side, x.open_time, x.open_price, x.trade_id) == (
+            y.symbol,
+            y.side,
+            y.open_time,
+            y.open_price,
+            y.trade_id,
+        )
+        assert (x.close_time, x.close_price, x.volume, x.sl, x.tp) == (
+            y.close_time,
+            y.close_price,
+            y.volume,
+            y.sl,
+            y.tp,
+        )
+
+
+def test_mmap_reader_matches_csv_reader(tmp_path: Path):
+    p = tmp_path / "trades.csv"
+    rows = ["trade_id,symbol,side,open_time,open_price,close_time,volume"]
+    formats = [
+        "2026-01-01T10:{m:02d}:00+00:00",
+        "2026-01-01 10:{m:02d}:00",
+        "2026.01.01 10:{m:02d}:00",
+        "2026-01-01T12:{m:02d}:00+02:00",
+        "2026-01-01T10:{m:02d}:00.250Z",
+    ]
+    for i in range(200):
+        t = formats[i % len(formats)].format(m=i % 60)
+        close = "" if i % 3 else "1767268800"
+        rows.append(f"T-{i},EURUSD,{'BUY' if i % 2 else '1'},{t},1.{1000 + i},{close},0.10")
+    p.write_text("\r\n".join(rows) + "\r\n", encoding="utf-8")
+
+    expected = read_trades_csv(p, source="live")
+    _same(read_trades_columns(p, source="live").to_trades(), expected)
+    # Tiny chunks + process pool: still identical and in file order.
+    _same(read_trades_columns(p, source="live", workers=2, chunk_size=256).to_trades(), expected)
+
+
+def test_mmap_reader_mt5_headers_and_quoted_fallback(tmp_path: Path):
+    p = tmp_path / "mt5.csv"
+    p.write_text(
+        "Ticket;Symbol;Type;Time;Price;Volume\n"
+        "123;EURUSD;0;2026.01.01 10:00:00;1.1000;0.10\n"
+        "124;EURUSD;1;2026.01.01 12:00:00;1.2000;0.10\n",
+        encoding="utf-8",
+    )
+    cols = read_trades_columns(p, source="live")
+    assert list(cols.side) == [0, 1]
+    assert cols.trade_id == ["123", "124"]
+
+    q = tmp_path / "quoted.csv"
+    q.write_text(
+        'symbol,side,open_time,open_price,trade_id\n"EURUSD",BUY,2026-01-01T10:00:00Z,1.1,"A,1"\n',
+        encoding="utf-8",
+    )
+    assert read_trades_columns(q, source="live").trade_id == ["A,1"]
+
+
+def test_audit_columns_equals_audit_trades(tmp_path: Path):
+    rng = random.Random(3)
+    paths = {}
+    for source in ("backtest", "live"):
+        rows = ["trade_id,symbol,side,open_time,open_price"]
+        for i in range(300):
+            tid = f"T{rng.randrange(40)}" if rng.random() < 0.3 else ""
+            sym = rng.choice(["EURUSD", "GBPUSD"])
+            side = rng.choice(["BUY", "SELL"])
+            t = 1767261600 + rng.randrange(3600)  # repeats: ties keep file order
+            rows.append(f"{tid},{sym},{side},{t},1.{rng.randrange(1000, 1010)}")
+        paths[source] = tmp_path / f"{source}.csv"
+        paths[source].write_text("\n".join(rows) + "\n", encoding="utf-8")
+
+    bt = read_trades_columns(paths["backtest"], source="backtest")
+    lv = read_trades_columns(paths["live"], source="live")
+    for kwargs in ({}, {"price_tolerance": 0.004}, {"id_key": "trade_id+symbol"}):
+        expected = audit_trades(bt.to_trades(), lv.to_trades(), time_tolerance_s=60, **kwargs)
+        assert expected.matched and expected.id_conflicts
+        assert audit_columns(bt, lv, time_tolerance_s=60, **kwargs) == expected
+    expected = audit_trades(bt.to_trades(), lv.to_trades(), time_tolerance_s=60)
+    got = audit_columns(bt, lv, time_tolerance_s=60, workers=2, partition_size=16)
+    assert got == expected
+
+
+def test_cli_mmap_reader_audits_columns(tmp_path: Path, capsys, monkeypatch):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    bt.write_text(
+        "trade_id,symbol,side,open_time,open_price\n"
+        "1,EURUSD,BUY,2026-01-01T10:00:00Z,1.1000\n"
+        "2,EURUSD,BUY,2026-01-01T10:05:00Z,1.1000\n"
+        "3,GBPUSD,SELL,2026-01-01T09:00:00Z,1.3000\n",
+        encoding="utf-8",
+    )
+    lv.write_text(
+        "trade_id,symbol,side,open_time,open_price\n"
+        "1,EURUSD,BUY,2026-01-01T10:00:10Z,1.1001\n"
+        "9,GBPUSD,SELL,2026-01-01T09:00:30Z,1.3001\n",
+        encoding="utf-8",
+    )
+    argv = ["audit", "--backtest", str(bt), "--live", str(lv)]
+    assert main(argv) == 0
+    plain = capsys.readouterr().out
+
+    def no_trades(self):
+        raise AssertionError("the default mode should not materialize every trade")
+
+    with monkeypatch.context() as m:
+        m.setattr(TradeColumns, "to_trades", no_trades)
+        assert main([*argv, "--reader", "mmap"]) == 0
+    assert capsys.readouterr().out == plain
+    # Modes that need Trade objects still get them.
+    assert main([*argv, "--reader", "mmap", "--partial-fills"]) == 0
+    assert "matched=2 missing_in_live=1" in capsys.readouterr().out
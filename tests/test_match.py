@@ -22,4 +22,20 @@ def test_audit_trades_basic_match():
     res = audit_trades(bt, live, time_tolerance_s=120)
     assert len(res.matched) == 1
     assert len(res.extra_in_live) == 0
-    assert len(res.missing_in_live) == 1  # the SELL is missing
\ No newline at end of file
+    assert len(res.missing_in_live) == 1  # the SELL is missing
+
+
+def test_tolerance_bound_is_inclusive_on_both_sides():
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:00:00"), 1.1),
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T11:00:00"), 1.1),
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T12:00:00"), 1.1),
+    ]
+    live = [
+        Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T10:02:00"), 1.1),  # tol after
+        Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T11:02:00.000001"), 1.1),  # tol + 1us
+        Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T11:58:00"), 1.1),  # tol before
+    ]
+    res = audit_trades(bt, live, time_tolerance_s=120)
+    assert [m.live for m in res.matched] == [live[0], live[2]]
+    assert res.extra_in_live == [live[1]]
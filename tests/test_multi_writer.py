@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.eventlog import EventLog, iter_events, read_manifest, writer_ids
+from consistency_auditor.events import AppendFile
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import OrderRequest
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _bot(root: str, symbol: str, offset: int) -> None:
+    rec = ConsistencyRecorder(root, "run", writer_id=symbol, rotate_bytes=2000)
+    for i in range(40):
+        rec.log_order_request(
+            OrderRequest(
+                signal_id=f"{symbol}-{i:03d}",
+                timestamp=T0 + timedelta(seconds=3 * i + offset),
+                symbol=symbol,
+                side="BUY",
+                volume=0.1,
+            )
+        )
+    rec.close()
+
+
+def _big_lines(path: str, tag: str) -> None:
+    with AppendFile(path) as f:
+        for i in range(20):
+            f.write((json.dumps({"w": tag, "i": i, "pad": tag * 200_000}) + "\n").encode())
+
+
+def test_per_writer_segments_merge_by_time(tmp_path: Path):
+    procs = [
+        mp.Process(target=_bot, args=(str(tmp_path), sym, off))
+        for sym, off in (("EURUSD", 0), ("GBPUSD", 1), ("USDJPY", 2))
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+        assert p.exitcode == 0
+
+    audit = tmp_path / "run" / "audit"
+    assert writer_ids(audit) == ["EURUSD", "GBPUSD", "USDJPY"]
+    assert read_manifest(audit, "EURUSD")[0]["file"] == "events-000001.EURUSD.jsonl"
+
+    events = list(iter_events(audit))
+    assert len(events) == 120
+    times = [e["timestamp"] for e in events]
+    assert times == sorted(times)
+    assert [e["symbol"] for e in events[:3]] == ["EURUSD", "GBPUSD", "USDJPY"]
+
+    start = T0 + timedelta(seconds=60)
+    assert all(e["timestamp"] >= start.isoformat() for e in iter_events(audit, start=start))
+
+
+def test_shared_file_records_do_not_interleave(tmp_path: Path):
+    path = tmp_path / "events.jsonl"
+    procs = [mp.Process(target=_big_lines, args=(str(path), t)) for t in "abcd"]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    lines = path.read_bytes().splitlines()
+    assert len(lines) == 80
+    for line in lines:
+        ev = json.loads(line)
+        assert ev["pad"] == ev["w"] * 200_000
+
+
+def test_record_size_limit(tmp_path: Path):
+    log = EventLog(tmp_path, max_record_bytes=100)
+    log.append({"event_type": "X"})
+    with pytest.raises(ValueError, match="too large"):
+        log.append({"event_type": "X", "pad": "x" * 200})
+    log.close()
+    assert len(log.path.read_text("utf-8").splitlines()) == 1
+
+
+def test_invalid_writer_id(tmp_path: Path):
+    with pytest.raises(ValueError, match="writer_id"):
+        EventLog(tmp_path, writer_id="../x")
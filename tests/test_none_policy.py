@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor import schemas
+from consistency_auditor.eventlog import decision_counts, iter_events
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import DecisionContext
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _ctx(seconds: float, symbol: str = "EURUSD") -> DecisionContext:
+    return DecisionContext(
+        symbol=symbol,
+        decision_time=T0 + timedelta(seconds=seconds),
+        bid=1.1,
+        ask=1.1002,
+        spread=0.0002,
+        strategy_tag="MACD_X",
+        params={"fast": 12},
+        bars_hash=f"b{seconds}",
+        features_hash="f",
+    )
+
+
+def _run(rec: ConsistencyRecorder) -> list[dict]:
+    # 300 NONE decisions over 150s (two symbols) and 2 BUYs.
+    for i in range(150):
+        rec.log_decision(_ctx(i), intent="NONE")
+        rec.log_decision(_ctx(i, "GBPUSD"), intent="NONE")
+        if i in (10, 100):
+            rec.log_decision(_ctx(i), intent="BUY")
+    rec.close()
+    return list(iter_events(rec.audit_dir))
+
+
+def test_all_is_default(tmp_path: Path):
+    events = _run(ConsistencyRecorder(tmp_path, "r"))
+    assert len(events) == 302
+    assert decision_counts(events)[("EURUSD", "NONE")] == 150
+
+
+def test_actionable_only(tmp_path: Path):
+    events = _run(ConsistencyRecorder(tmp_path, "r", none_policy="actionable"))
+    assert [e["intent"] for e in events] == ["BUY", "BUY"]
+
+
+def test_sampled_none_keeps_density(tmp_path: Path):
+    events = _run(ConsistencyRecorder(tmp_path, "r", none_policy="sample", none_sample_every=10))
+    nones = [e for e in events if e["intent"] == "NONE"]
+    assert len(nones) == 30
+    assert all(e["sample_weight"] == 10 for e in nones)
+    counts = decision_counts(events)
+    assert counts[("EURUSD", "NONE")] + counts[("GBPUSD", "NONE")] == 300
+    assert counts[("EURUSD", "BUY")] == 2
+
+
+def test_aggregate_writes_window_summaries(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "r", none_policy="aggregate", none_summary_interval_s=60)
+    events = _run(rec)
+    summaries = [e for e in events if e["event_type"] == "DECISION_SUMMARY"]
+    # windows [0,60) [60,120) [120,180) per symbol; the last one comes from close()
+    eur = [(e["timestamp"], e["count"]) for e in summaries if e["symbol"] == "EURUSD"]
+    assert eur == [
+        (T0.isoformat(), 60),
+        ((T0 + timedelta(seconds=60)).isoformat(), 60),
+        ((T0 + timedelta(seconds=120)).isoformat(), 30),
+    ]
+    assert summaries[0]["last_decision_time"] == (T0 + timedelta(seconds=59)).isoformat()
+    assert decision_counts(events) == {
+        ("EURUSD", "NONE"): 150,
+        ("GBPUSD", "NONE"): 150,
+        ("EURUSD", "BUY"): 2,
+    }
+    assert len(events) == 8
+
+
+@pytest.mark.parametrize("policy", ["actionable", "sample", "aggregate"])
+def test_dropped_none_decisions_compute_no_id(tmp_path: Path, monkeypatch, policy: str):
+    calls = []
+    real = schemas.compute_signal_id
+
+    def counting(*args, **kwargs):
+        calls.append(kwargs["side"])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(schemas, "compute_signal_id", counting)
+    rec = ConsistencyRecorder(tmp_path, "r", none_policy=policy, none_sample_every=10)
+    returned = [rec.log_decision(_ctx(i), intent="NONE") for i in range(100)]
+    sid = rec.log_decision(_ctx(100), intent="BUY")
+    rec.close()
+    written = 10 if policy == "sample" else 0
+    assert calls == ["NONE"] * written + ["BUY"]
+    assert returned.count("") == 100 - written and sid != ""
+
+
+def test_invalid_policy(tmp_path: Path):
+    with pytest.raises(ValueError, match="none_policy"):
+        ConsistencyRecorder(tmp_path, "r", none_policy="some")
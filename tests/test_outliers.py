@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import csv
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.match import TradeMatch
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.outliers import OutlierDetector, RobustWindow, find_outliers
+from consistency_auditor.report_csv import write_outliers_csv
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _m(i: int, price_diff: float, dt_s: float = 1.0, side=Side.BUY, sym="EURUSD") -> TradeMatch:
+    bt = Trade("backtest", sym, side, T0 + timedelta(minutes=i), 1.1, trade_id=f"bt{i}")
+    lv = Trade("live", sym, side, bt.open_time, 1.1 + price_diff)
+    return TradeMatch(bt, lv, dt_s, price_diff)
+
+
+def test_robust_window_tracks_median_and_mad():
+    rng = random.Random(0)
+    w = RobustWindow(window=400, blocks=8)
+    assert w.score(1.0) is None
+    for _ in range(49):
+        w.add(rng.gauss(5.0, 2.0))
+    assert w.median is None  # first block (50 values) not complete yet
+    for _ in range(2000):
+        w.add(rng.gauss(5.0, 2.0))
+    assert w.median == pytest.approx(5.0, abs=0.3)
+    assert w.mad == pytest.approx(2.0 * 0.6745, rel=0.15)
+    assert abs(w.score(5.0)) < 0.5 and w.score(20.0) > 3.5
+
+    # The window forgets: after a level shift the median follows.
+    for _ in range(450):
+        w.add(rng.gauss(50.0, 2.0))
+    assert w.median == pytest.approx(50.0, abs=1.0)
+    assert len(w._blocks) == 8  # bounded state
+
+
+def test_spikes_are_flagged_per_symbol_and_side_adjusted():
+    rng = random.Random(1)
+    matches = []
+    for i in range(3000):
+        side = Side.BUY if i % 2 else Side.SELL
+        sym = "USDJPY" if i % 3 == 0 else "EURUSD"
+        scale = 0.01 if sym == "USDJPY" else 0.0001
+        diff = rng.gauss(0.0, scale)
+        matches.append(_m(i, diff if side is Side.BUY else -diff, abs(rng.gauss(0, 1)), side, sym))
+    # Adverse news spikes: a SELL filled much lower, a BUY filled much higher.
+    matches[1500] = _m(1500, -0.0020, side=Side.SELL)  # EURUSD
+    matches[2001] = _m(2001, 0.0020, side=Side.BUY)  # EURUSD
+    matches[2400] = _m(2400, 0.0020, side=Side.BUY, sym="USDJPY")  # normal noise for JPY
+
+    outliers = find_outliers(matches, window=800)
+    flagged = {o.match.backtest.trade_id for o in outliers if o.metric == "slippage"}
+    assert {"bt1500", "bt2001"} <= flagged
+    assert "bt2400" not in flagged
+    assert len(flagged) < 15
+
+    out = [o for o in outliers if o.match.backtest.trade_id == "bt1500"]
+    assert out[0].score > 10 and out[0].value == pytest.approx(0.002)
+
+
+def test_mostly_zero_slippage_falls_back_to_mean_deviation():
+    # 60% of fills at the exact price: MAD is 0, yet tick noise is not an outlier.
+    rng = random.Random(3)
+    matches = []
+    for i in range(20_000):
+        diff = 0.0 if rng.random() < 0.6 else rng.choice((-1, 1)) * rng.uniform(1e-5, 3e-5)
+        matches.append(_m(i, diff))
+    matches[15_000] = _m(15_000, 0.0005)
+
+    outliers = find_outliers(matches)
+    assert [o.match.backtest.trade_id for o in outliers] == ["bt15000"]
+    assert outliers[0].median == 0.0 and 0 < outliers[0].mad < 2e-5
+
+
+def test_constant_stream_and_validation():
+    matches = [_m(i, 0.0) for i in range(100)] + [_m(100, 0.0005)]
+    out = find_outliers(matches, window=40)
+    assert [(o.match.backtest.trade_id, o.metric) for o in out] == [("bt100", "slippage")]
+    with pytest.raises(ValueError, match="threshold"):
+        OutlierDetector(threshold=0)
+    with pytest.raises(ValueError, match="window"):
+        find_outliers(matches, window=4)
+
+
+def test_write_outliers_csv(tmp_path: Path):
+    matches = [_m(i, 0.0) for i in range(100)] + [_m(100, 0.0005)]
+    path = write_outliers_csv(find_outliers(matches, window=40), tmp_path, prefix="x")
+    with path.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert path.name == "outliers_x.csv"
+    assert rows[0]["bt_trade_id"] == "bt100" and rows[0]["metric"] == "slippage"
+    assert rows[0]["value"] == "+0.000500"
+
+
+def test_cli_outliers(tmp_path: Path, capsys):
+    lines = ["symbol,side,open_time,open_price"]
+    bt = list(lines)
+    lv = list(lines)
+    rng = random.Random(2)
+    for i in range(300):
+        t = (T0 + timedelta(minutes=i)).isoformat()
+        bt.append(f"EURUSD,BUY,{t},1.10000")
+        diff = 0.005 if i == 250 else rng.gauss(0, 0.00005)
+        lv.append(f"EURUSD,BUY,{t},{1.1 + diff:.6f}")
+    (tmp_path / "bt.csv").write_text("\n".join(bt) + "\n", encoding="utf-8")
+    (tmp_path / "lv.csv").write_text("\n".join(lv) + "\n", encoding="utf-8")
+    out = tmp_path / "out"
+    argv = [
+        "audit", "--backtest", str(tmp_path / "bt.csv"), "--live", str(tmp_path / "lv.csv"),
+        "--out", str(out), "--out-prefix", "o", "--outliers", "--outlier-window", "80",
+    ]
+    assert main(argv) == 0
+    text = capsys.readouterr().out
+    assert "Outliers (" in text and "slippage=+0.005000" in text
+    rows = (out / "outliers_o.csv").read_text(encoding="utf-8").splitlines()
+    assert any("2026-01-01T04:10:00+00:00" in r for r in rows[1:])
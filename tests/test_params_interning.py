@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from consistency_auditor.eventlog import iter_events, read_manifest
+from consistency_auditor.hashing import (
+    FingerprintCache,
+    compute_config_fingerprint,
+    compute_params_key,
+)
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import DecisionContext
+
+
+def _ctx(i: int, params: dict) -> DecisionContext:
+    return DecisionContext(
+        symbol="EURUSD",
+        decision_time=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i),
+        bid=1.1,
+        ask=1.1002,
+        spread=0.0002,
+        strategy_tag="MACD_X",
+        params=params,
+        bars_hash=f"bars{i}",
+        features_hash="f",
+    )
+
+
+def test_fingerprint_cache_detects_changes():
+    calls = []
+
+    def fn(d):
+        calls.append(1)
+        return compute_config_fingerprint(d)
+
+    cache = FingerprintCache(fn)
+    params = {"fast": 12, "slow": 26, "filters": ["atr"]}
+    fp = cache(params)
+    assert cache(params) == fp == compute_config_fingerprint(params)
+    assert len(calls) == 1
+
+    params["filters"].append("rsi")  # nested in-place edit
+    fp2 = cache(params)
+    assert fp2 != fp and len(calls) == 2
+
+    params["fast"] = 12.0  # equal value, different serialization
+    assert cache(params) == compute_config_fingerprint(params)
+    assert len(calls) == 3
+
+
+def test_params_written_once_and_inlined_on_read(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run1", intern_params=True)
+    params = {"fast": 12, "slow": 26}
+    for i in range(5):
+        rec.log_decision(_ctx(i, params), intent="NONE")
+    params["slow"] = 30
+    for i in range(5, 8):
+        rec.log_decision(_ctx(i, params), intent="NONE")
+
+    raw = [json.loads(line) for line in rec.events_path.read_text("utf-8").splitlines()]
+    kinds = [e["event_type"] for e in raw]
+    assert kinds.count("PARAMS") == 2
+    assert kinds.index("PARAMS", 1) == 6  # new params right before their first decision
+    decisions = [e for e in raw if e["event_type"] == "DECISION"]
+    assert all("params" not in e["context"] for e in decisions)
+    assert decisions[0]["context"]["params_key"] == raw[0]["params_key"]
+    assert raw[0]["params_key"] == compute_params_key({"fast": 12, "slow": 26})
+    assert raw[0]["params_fingerprint"] == compute_config_fingerprint({"fast": 12, "slow": 26})
+
+    read = [e for e in iter_events(rec.audit_dir) if e["event_type"] == "DECISION"]
+    assert [e["context"]["params"]["slow"] for e in read] == [26] * 5 + [30] * 3
+
+
+def test_params_reemitted_in_each_segment(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run1", intern_params=True, rotate_bytes=1000)
+    params = {"fast": 12, "slow": 26}
+    for i in range(20):
+        rec.log_decision(_ctx(i, params), intent="NONE")
+
+    audit = tmp_path / "run1" / "audit"
+    segments = read_manifest(audit)
+    assert len(segments) >= 2
+    for seg in segments:
+        lines = (audit / seg["file"]).read_text("utf-8").splitlines()
+        assert json.loads(lines[0])["event_type"] == "PARAMS"
+
+    # Even a time window that starts after the first PARAMS event gets params back.
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=15)
+    tail = [e for e in iter_events(audit, start=start) if e["event_type"] == "DECISION"]
+    assert len(tail) == 5
+    assert all(e["context"]["params"] == params for e in tail)
+
+
+def test_params_referenced_by_full_key_not_short_fingerprint(tmp_path: Path):
+    rec = ConsistencyRecorder(tmp_path, "run1", intern_params=True)
+    # Two dicts whose 8-char fingerprints collide must still stay apart.
+    rec._fingerprint = FingerprintCache(lambda d: "deadbeef")
+    a, b = {"fast": 12}, {"fast": 13}
+    for i, params in enumerate([a, b, a]):
+        rec.log_decision(_ctx(i, params), intent="NONE")
+
+    raw = [json.loads(line) for line in rec.events_path.read_text("utf-8").splitlines()]
+    assert [e["params_key"] for e in raw if e["event_type"] == "PARAMS"] == [
+        compute_params_key(a),
+        compute_params_key(b),
+    ]
+    assert len(compute_params_key(a)) == 32
+
+    read = [e for e in iter_events(rec.audit_dir) if e["event_type"] == "DECISION"]
+    assert [e["context"]["params"] for e in read] == [a, b, a]
+
+
+def test_old_logs_referencing_params_fingerprint_still_inline(tmp_path: Path):
+    audit = tmp_path / "audit"
+    audit.mkdir()
+    events = [
+        {"event_type": "PARAMS", "params_fingerprint": "abcd1234", "params": {"fast": 12}},
+        {"event_type": "DECISION", "signal_id": "s", "context": {"params_fingerprint": "abcd1234"}},
+    ]
+    (audit / "events.jsonl").write_text(
+        "".join(json.dumps(e) + "\n" for e in events), encoding="utf-8"
+    )
+    read = [e for e in iter_events(audit) if e["event_type"] == "DECISION"]
+    assert read[0]["context"]["params"] == {"fast": 12}
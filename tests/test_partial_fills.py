@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import csv
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.match import audit_trades
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.report_csv import write_audit_csv
+
+T0 = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+
+
+def _t(src, sec, price, vol, side=Side.BUY, tid=None, sym="EURUSD") -> Trade:
+    return Trade(src, sym, side, T0 + timedelta(seconds=sec), price, volume=vol, trade_id=tid)
+
+
+def test_fills_aggregate_until_volume_covered():
+    bt = [_t("backtest", 0, 1.1000, 1.0), _t("backtest", 600, 1.1100, 0.5)]
+    live = [
+        _t("live", 5, 1.1002, 0.3),
+        _t("live", 7, 1.1004, 0.5),
+        _t("live", 9, 1.1006, 0.2),
+        _t("live", 11, 1.1010, 0.4),  # after the volume is covered: extra
+        _t("live", 601, 1.1101, 0.5),
+    ]
+    res = audit_trades(bt, live, partial_fills=True)
+
+    first, second = res.matched
+    assert first.fill_count == 3 and len(first.fills) == 3
+    assert first.live.volume == pytest.approx(1.0)
+    vwap = (1.1002 * 0.3 + 1.1004 * 0.5 + 1.1006 * 0.2) / 1.0
+    assert first.live.open_price == pytest.approx(vwap)
+    assert first.open_price_diff == pytest.approx(vwap - 1.1)
+    assert first.open_time_diff_s == 5
+    assert second.fill_count == 1 and second.live is live[4]
+    assert [t.open_price for t in res.extra_in_live] == [1.1010]
+    assert res.missing_in_live == []
+
+    # The 1-to-1 matcher sees the same input as 1 match + 3 extras for the first order.
+    strict = audit_trades(bt, live)
+    assert len(strict.matched) == 2 and len(strict.extra_in_live) == 3
+
+
+def test_oversized_fill_left_for_next_order_and_ids_group_fills():
+    bt = [
+        _t("backtest", 0, 1.0, 0.2),
+        _t("backtest", 30, 1.0, 1.0),
+        _t("backtest", 100, 2.0, 2.0, side=Side.SELL, tid="T1"),
+    ]
+    live = [
+        _t("live", 1, 1.0, 1.0),  # too big for the 0.2 order
+        _t("live", 2, 1.0, 0.2),
+        _t("live", 500, 2.1, 1.5, side=Side.SELL, tid="T1"),  # far away but same id
+        _t("live", 501, 2.3, 0.5, side=Side.SELL, tid="T1"),
+    ]
+    res = audit_trades(bt, live, partial_fills=True)
+    by_vol = {m.backtest.volume: m for m in res.matched}
+    assert by_vol[0.2].live is live[1]
+    assert by_vol[1.0].live is live[0]
+    assert by_vol[2.0].fill_count == 2
+    assert by_vol[2.0].live.open_price == pytest.approx((2.1 * 1.5 + 2.3 * 0.5) / 2.0)
+    assert by_vol[2.0].live.trade_id == "T1"
+    assert not res.extra_in_live and not res.missing_in_live
+
+
+def test_underfilled_order_still_matches_with_partial_volume():
+    bt = [_t("backtest", 0, 1.0, 1.0)]
+    live = [_t("live", 1, 1.0, 0.4), _t("live", 500, 1.0, 0.6)]  # second is out of window
+    res = audit_trades(bt, live, partial_fills=True, time_tolerance_s=60)
+    assert res.matched[0].live.volume == pytest.approx(0.4)
+    assert res.matched[0].under_filled
+    assert len(res.extra_in_live) == 1
+    wide = audit_trades(bt, live, partial_fills=True, time_tolerance_s=600)
+    assert wide.matched[0].fill_count == 2 and not wide.matched[0].under_filled
+
+
+def test_volume_columns_only_with_partial_fills(tmp_path: Path):
+    bt = [_t("backtest", 0, 1.0, 1.0), _t("backtest", 600, 1.0, 0.5)]
+    live = [_t("live", 1, 1.0, 0.4), _t("live", 601, 1.0, 0.5)]
+
+    matched, _ = write_audit_csv(audit_trades(bt, live), tmp_path, prefix="plain")
+    with matched.open(encoding="utf-8", newline="") as f:
+        assert "bt_volume" not in next(csv.reader(f))
+
+    res = audit_trades(bt, live, partial_fills=True)
+    matched, _ = write_audit_csv(res, tmp_path, prefix="fills", partial_fills=True)
+    with matched.open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["lv_volume"], r["fill_count"], r["under_filled"]) for r in rows] == [
+        ("0.4", "1", "1"),
+        ("0.5", "1", "0"),
+    ]
+
+
+def test_fill_matching_scales_linearly():
+    rng = random.Random(7)
+
+    def build(n):
+        bt, live = [], []
+        for k in range(n):
+            sec = k * 30
+            bt.append(_t("backtest", sec, 1.0, 1.0))
+            parts = rng.randint(1, 4)
+            for p in range(parts):
+                live.append(_t("live", sec + p, 1.0, 1.0 / parts))
+        return bt, live
+
+    def timed(n):
+        bt, live = build(n)
+        t = time.perf_counter()
+        res = audit_trades(bt, live, partial_fills=True, volume_tolerance=1e-6)
+        assert len(res.matched) == n and not res.extra_in_live
+        return time.perf_counter() - t
+
+    small, big = timed(2_000), timed(16_000)
+    assert big < small * 8 * 3  # ~linear, with generous slack for noisy machines
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+from consistency_auditor.match import audit_trades
+from consistency_auditor.models import Side, Trade
+
+
+def _reference(bt: list[Trade], lv: list[Trade], tol_s: int, price_tolerance=None):
+    # Straight O(N*M) greedy scan, as the matcher worked before bucketing.
+    tol = timedelta(seconds=tol_s)
+    bt_rem = sorted(bt, key=lambda t: (t.symbol, t.side.value, t.open_time))
+    pairs, extra = [], []
+    for lt in sorted(lv, key=lambda t: (t.symbol, t.side.value, t.open_time)):
+        best_i, best_dt = None, None
+        for i, b in enumerate(bt_rem):
+            if b.symbol != lt.symbol or b.side != lt.side:
+                continue
+            d = abs(b.open_time - lt.open_time)
+            if d > tol:
+                continue
+            if price_tolerance is not None and abs(lt.open_price - b.open_price) > price_tolerance:
+                continue
+            if best_dt is None or d < best_dt:
+                best_i, best_dt = i, d
+        if best_i is None:
+            extra.append(lt)
+        else:
+            pairs.append((bt_rem.pop(best_i), lt))
+    return pairs, bt_rem, extra
+
+
+def _stream(rng: random.Random, source: str, n: int) -> list[Trade]:
+    t0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        Trade(
+            source,
+            "XAUUSD",
+            rng.choice([Side.BUY, Side.SELL]),
+            t0 + timedelta(seconds=rng.randrange(0, 20_000)),
+            2000.0 + rng.random(),
+        )
+        for _ in range(n)
+    ]
+
+
+def test_partitioned_parallel_matches_sequential_greedy():
+    rng = random.Random(7)
+    bt = _stream(rng, "backtest", 600)
+    lv = _stream(rng, "live", 600)
+
+    exp_pairs, exp_missing, exp_extra = _reference(bt, lv, 60, price_tolerance=0.8)
+    res = audit_trades(
+        bt, lv, time_tolerance_s=60, price_tolerance=0.8, workers=2, partition_size=37
+    )
+
+    assert [(id(m.backtest), id(m.live)) for m in res.matched] == [
+        (id(b), id(lt)) for b, lt in exp_pairs
+    ]
+    assert [id(t) for t in res.missing_in_live] == [id(t) for t in exp_missing]
+    assert [id(t) for t in res.extra_in_live] == [id(t) for t in exp_extra]
+
+
+def test_sequential_kernel_matches_reference_on_ties():
+    t0 = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, t0 - timedelta(seconds=30), 1.1, trade_id=None),
+        Trade("backtest", "EURUSD", Side.BUY, t0 + timedelta(seconds=30), 1.1, trade_id=None),
+    ]
+    lv = [Trade("live", "EURUSD", Side.BUY, t0, 1.1)]
+
+    res = audit_trades(bt, lv, time_tolerance_s=60)
+    assert res.matched[0].backtest is bt[0]  # equal distance: earlier trade wins
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import csv
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.match import audit_trades
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.pivot import parse_group_by, pivot_audit, session_of
+from consistency_auditor.report_csv import write_pivot
+
+T0 = datetime(2026, 1, 5, tzinfo=timezone.utc)  # a Monday, 00:00 UTC
+
+
+def _t(src, hours, price, side=Side.BUY, sym="EURUSD") -> Trade:
+    return Trade(src, sym, side, T0 + timedelta(hours=hours), price)
+
+
+def _result():
+    bt = [
+        _t("backtest", 3, 1.1000),  # asia: matched, paid 0.0002 more
+        _t("backtest", 9, 1.2000, side=Side.SELL),  # london: matched, sold 0.0001 lower
+        _t("backtest", 10, 1.3000),  # london: missing
+        _t("backtest", 27, 1.1000),  # next day, asia: matched exactly
+    ]
+    lv = [
+        _t("live", 3, 1.1002),
+        _t("live", 9, 1.1999, side=Side.SELL),
+        _t("live", 15, 1.5000),  # new_york: extra
+        _t("live", 27, 1.1000),
+    ]
+    return audit_trades(bt, lv)
+
+
+def test_sessions_and_group_by_parsing():
+    assert [session_of(h) for h in (0, 6, 7, 12, 13, 21, 22, 23)] == [
+        "asia", "asia", "london", "london", "new_york", "new_york", "asia", "asia",
+    ]
+    assert parse_group_by("day, session") == ("day", "session")
+    for bad in ("", "week", "day,day"):
+        with pytest.raises(ValueError, match="invalid group-by"):
+            parse_group_by(bad)
+
+
+def test_pivot_by_session_and_day():
+    res = _result()
+    rows = {r["session"]: r for r in pivot_audit(res, ["session"])}
+    assert list(rows) == ["asia", "london", "new_york"]
+    asia, london, ny = rows["asia"], rows["london"], rows["new_york"]
+    assert (asia["matched"], asia["missing"], asia["extra"]) == (2, 0, 0)
+    assert asia["mean_slippage"] == pytest.approx(0.0001)
+    assert (london["matched"], london["missing"], london["match_rate"]) == (1, 1, 0.5)
+    assert london["p50_slippage"] == pytest.approx(0.0001, rel=0.02)  # adverse on the SELL
+    assert (ny["extra"], ny["match_rate"], ny["mean_slippage"]) == (1, None, None)
+
+    by_day = pivot_audit(res, ("day", "hour"))
+    assert [(r["day"], r["hour"]) for r in by_day] == [
+        ("2026-01-05", 3), ("2026-01-05", 9), ("2026-01-05", 10), ("2026-01-05", 15),
+        ("2026-01-06", 3),
+    ]
+
+
+def test_parallel_pivot_equals_sequential():
+    rng = random.Random(3)
+    bt = [
+        _t("backtest", rng.uniform(0, 96), 1.1, sym=rng.choice(["EURUSD", "GBPUSD"]))
+        for _ in range(300)
+    ]
+    lv = [
+        Trade("live", t.symbol, t.side, t.open_time + timedelta(seconds=rng.uniform(-5, 5)),
+              t.open_price + rng.uniform(-1e-4, 1e-4))
+        for t in bt[:250]
+    ]
+    res = audit_trades(bt, lv)
+    seq = pivot_audit(res, ("symbol", "session"))
+    par = pivot_audit(res, ("symbol", "session"), workers=2, chunk_size=64)
+    assert [r["matched"] for r in par] == [r["matched"] for r in seq]
+    assert [r["missing"] for r in par] == [r["missing"] for r in seq]
+    for a, b in zip(par, seq):
+        assert a["p95_slippage"] == pytest.approx(b["p95_slippage"])
+        assert a["mean_time_diff_s"] == pytest.approx(b["mean_time_diff_s"])
+
+
+def test_write_pivot_csv(tmp_path: Path):
+    rows = pivot_audit(_result(), ("session",))
+    path = write_pivot(rows, ("session",), tmp_path, prefix="x", compression="gz")
+    assert path.name == "pivot_x.csv.gz"
+    with pytest.raises(ValueError, match="invalid pivot format"):
+        write_pivot(rows, ("session",), tmp_path, prefix="x", fmt="xlsx")
+
+
+def test_cli_group_by(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    bt.write_text(
+        "symbol,side,open_time,open_price\n"
+        "EURUSD,BUY,2026-01-05T03:00:00Z,1.1000\n"
+        "EURUSD,BUY,2026-01-05T10:00:00Z,1.1000\n",
+        encoding="utf-8",
+    )
+    lv.write_text(
+        "symbol,side,open_time,open_price\nEURUSD,BUY,2026-01-05T03:00:10Z,1.1003\n",
+        encoding="utf-8",
+    )
+    out = tmp_path / "out"
+    argv = [
+        "audit", "--backtest", str(bt), "--live", str(lv), "--out", str(out), "--out-prefix", "p"
+    ]
+    assert main([*argv, "--group-by", "symbol,session"]) == 0
+    text = capsys.readouterr().out
+    assert "By symbol,session (2):" in text
+    assert "Wrote: " + str(out / "pivot_p.csv") in text
+
+    with (out / "pivot_p.csv").open(encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["session"], r["matched"], r["missing"]) for r in rows] == [
+        ("asia", "1", "0"),
+        ("london", "0", "1"),
+    ]
+    assert rows[0]["mean_slippage"] == "0.000300" and rows[1]["mean_slippage"] == ""
+
+    assert main([*argv, "--group-by", "week"]) == 2
+    assert "invalid group-by" in capsys.readouterr().out
+
+
+def test_pivot_parquet(tmp_path: Path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    rows = pivot_audit(_result(), ("day", "session"))
+    path = write_pivot(rows, ("day", "session"), tmp_path, prefix="x", fmt="parquet")
+    table = pq.read_table(path)
+    assert table.column_names[:3] == ["day", "session", "matched"]
+    assert table.num_rows == len(rows)
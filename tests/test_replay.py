@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.eventlog import EventLog
+from consistency_auditor.events import MismatchReason
+from consistency_auditor.replay import MATCH, MISMATCH, NO_SNAPSHOT, replay_decisions
+from consistency_auditor.snapshot import SnapshotStore
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def read_json(path: Path, columns) -> tuple[list[float], None]:
+    return json.loads(path.read_text("utf-8")), None
+
+
+def breakout(frames, contexts, params):
+    """BUY at the last close when it is above the mean of the window plus params['k']."""
+    out = []
+    for closes in frames:
+        mean = sum(closes) / len(closes)
+        if closes[-1] > mean + params["k"]:
+            out.append(("BUY", closes[-1]))
+        else:
+            out.append(("NONE", None))
+    return out
+
+
+def _record(audit: Path, n: int = 12) -> None:
+    log = EventLog(audit)
+    snaps = audit / "snapshots"
+    snaps.mkdir(parents=True)
+    for i in range(n):
+        closes = [1.0, 1.0, 1.0 + i / 10]
+        params = {"k": 0.1} if i < 8 else {"k": 1.0}  # config changed at i=8
+        intent, price = breakout([closes], [{}], params)[0]
+        if i == 3:
+            closes[-1] += 0.05  # snapshot differs from what the bot saw
+        fname = f"bars_s{i}.json"
+        (snaps / fname).write_text(json.dumps(closes), "utf-8")
+        log.append(
+            {
+                "event_type": "DECISION",
+                "signal_id": f"s{i}",
+                "intent": intent,
+                "context": {
+                    "symbol": "EURUSD",
+                    "decision_time": (T0 + timedelta(minutes=i)).isoformat(),
+                    "params": params,
+                },
+                "suggested": {"price": price, "sl": None, "tp": None},
+                "snapshot_path": fname,
+            }
+        )
+    log.append(
+        {
+            "event_type": "DECISION",
+            "signal_id": "nosnap",
+            "intent": "SELL",
+            "context": {"symbol": "EURUSD", "decision_time": T0.isoformat(), "params": {}},
+            "suggested": {"price": 1.0},
+            "snapshot_path": None,
+        }
+    )
+    log.close()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_classifies_param_and_data_drift(tmp_path: Path, workers: int):
+    audit = tmp_path / "audit"
+    _record(audit)
+
+    res = replay_decisions(
+        audit, breakout, params={"k": 0.1}, reader=read_json, workers=workers, batch_size=4
+    )
+    by_id = {o.signal_id: o for o in res.outcomes}
+    assert by_id["nosnap"].status == NO_SNAPSHOT
+    assert by_id["s3"].status == MISMATCH
+    assert by_id["s3"].reason == MismatchReason.DATA_DRIFT
+    # i >= 8 were NONE under k=1.0 but are BUY under the replay's k=0.1
+    drifted = {o.signal_id for o in res.mismatches if o.reason == MismatchReason.PARAM_DRIFT}
+    assert drifted == {"s8", "s9", "s10", "s11"}
+    assert by_id["s0"].status == MATCH
+    assert res.counts()[MATCH] == 7
+
+
+def test_replay_with_logged_params_only_finds_data_drift(tmp_path: Path):
+    audit = tmp_path / "audit"
+    _record(audit)
+    res = replay_decisions(audit, breakout, reader=read_json)
+    assert [(o.signal_id, o.reason) for o in res.mismatches] == [("s3", MismatchReason.DATA_DRIFT)]
+
+
+def test_replay_groups_logged_params_by_full_key(tmp_path: Path):
+    from consistency_auditor.hashing import compute_config_fingerprint
+
+    # Same 8-char config fingerprint, different params.
+    params = [{"k": 7.552}, {"k": 77.188}]
+    assert compute_config_fingerprint(params[0]) == compute_config_fingerprint(params[1])
+
+    audit = tmp_path / "audit"
+    (audit / "snapshots").mkdir(parents=True)
+    (audit / "snapshots" / "bars.json").write_text("[0.0, 0.0, 30.0]", "utf-8")
+    log = EventLog(audit)
+    for i, p in enumerate(params):
+        intent, price = breakout([[0.0, 0.0, 30.0]], [{}], p)[0]
+        log.append(
+            {
+                "event_type": "DECISION",
+                "signal_id": f"s{i}",
+                "intent": intent,
+                "context": {"symbol": "EURUSD", "decision_time": T0.isoformat(), "params": p},
+                "suggested": {"price": price},
+                "snapshot_path": "bars.json",
+            }
+        )
+    log.close()
+
+    res = replay_decisions(audit, breakout, reader=read_json)
+    assert [(o.logged_intent, o.status) for o in res.outcomes] == [
+        ("BUY", MATCH),
+        ("NONE", MATCH),
+    ]
+
+
+def test_snapshot_store_reuses_files_read_by_path(tmp_path: Path):
+    (tmp_path / "snapshots").mkdir()
+    (tmp_path / "snapshots" / "f.json").write_text("[1.0]", "utf-8")
+    store = SnapshotStore(tmp_path, cache_size=1, reader=read_json)
+    first, again = store.read_files(["f.json", "f.json"])
+    assert first[0] is again[0] is store.read_files(["f.json"])[0][0]
+    assert (store.hits, store.misses) == (1, 1)
+
+
+def test_cli_replay_rejects_bad_strategy(tmp_path: Path, capsys):
+    audit = tmp_path / "audit"
+    audit.mkdir()
+    assert main(["replay", "--audit-dir", str(audit), "--strategy", "nope"]) == 2
+    assert "module:function" in capsys.readouterr().out
+
+
+def last_close_strategy(frames, contexts, params):
+    # Vectorized over the batch: one pandas op per frame column.
+    return [("BUY", float(df["close"].iloc[-1])) for df in frames]
+
+
+def test_replay_recorded_parquet_snapshots(tmp_path: Path):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    from consistency_auditor.recorder import ConsistencyRecorder
+    from consistency_auditor.schemas import DecisionContext
+
+    rec = ConsistencyRecorder(tmp_path, "run")
+    bars = pd.DataFrame({"close": [1.1, 1.2]})
+    ctx = DecisionContext(
+        symbol="EURUSD",
+        decision_time=T0,
+        bid=1.2,
+        ask=1.2001,
+        spread=0.0001,
+        strategy_tag="X",
+        params={"k": 1},
+        bars_hash="h",
+        features_hash="f",
+    )
+    rec.log_decision(ctx, intent="BUY", bars=bars, suggested_price=1.2)
+    res = replay_decisions(rec.audit_dir, last_close_strategy)
+    assert [o.status for o in res.outcomes] == [MATCH]
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.io_csv import read_trades_csv
+from consistency_auditor.match import BacktestIndex, audit_trades
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.server import TRADE_BYTES, AuditService, BacktestCache, make_server
+
+T0 = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _write_bt(path: Path, n: int = 6) -> Path:
+    lines = ["symbol,side,open_time,open_price,trade_id"]
+    for i in range(n):
+        side = "BUY" if i % 2 == 0 else "SELL"
+        lines.append(f"EURUSD,{side},{(T0 + timedelta(minutes=10 * i)).isoformat()},1.1,bt{i}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+LIVE = [
+    {
+        "symbol": "EURUSD",
+        "side": "BUY",
+        "open_time": "2026-01-01T10:00:30+00:00",
+        "open_price": 1.1001,
+    },
+    {
+        "symbol": "EURUSD",
+        "side": "SELL",
+        "open_time": "2026-01-01T10:10:00+00:00",
+        "open_price": 1.1,
+        "trade_id": "bt1",
+    },
+    {
+        "symbol": "GBPUSD",
+        "side": "BUY",
+        "open_time": "2026-01-01T10:20:00+00:00",
+        "open_price": 1.3,
+    },
+]
+
+
+def test_index_gives_same_result_as_list():
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, T0 + timedelta(seconds=s), 1.0, trade_id=tid)
+        for s, tid in ((0, "a"), (30, None), (60, "c"), (90, None))
+    ]
+    lv = [
+        Trade("live", "EURUSD", Side.BUY, T0 + timedelta(seconds=s), 1.0, trade_id=tid)
+        for s, tid in ((5, None), (61, "a"), (85, None), (400, None))
+    ]
+    plain = audit_trades(bt, lv, time_tolerance_s=20)
+    indexed = audit_trades(BacktestIndex(bt), lv, time_tolerance_s=20)
+    assert indexed == plain
+
+
+def test_service_audit_and_cache(tmp_path: Path):
+    bt = _write_bt(tmp_path / "bt.csv")
+    svc = AuditService()
+
+    first = svc.audit({"backtest": str(bt), "live": LIVE, "tolerance": 60})
+    assert (first["matched"], first["missing_in_live"], first["extra_in_live"]) == (2, 4, 1)
+    assert first["backtest_cached"] is False
+    assert first["extra"][0]["symbol"] == "GBPUSD"
+
+    second = svc.audit({"backtest": str(bt), "live": LIVE, "tolerance": 60, "details": False})
+    assert second["backtest_cached"] is True
+    assert "matches" not in second
+    expected = audit_trades(
+        read_trades_csv(bt, source="backtest"), read_trades_csv(bt, source="live")
+    )
+    same = svc.audit({"backtest": str(bt), "live_path": str(bt)})
+    assert same["matched"] == len(expected.matched) == 6
+
+    # A changed file is re-indexed.
+    _write_bt(bt, n=8)
+    os.utime(bt, ns=(1, 1))
+    assert svc.audit({"backtest": str(bt), "live": []})["missing_in_live"] == 8
+    assert svc.cache.stats()["misses"] == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path: Path):
+    paths = [_write_bt(tmp_path / f"bt{i}.csv", n=10) for i in range(3)]
+    cache = BacktestCache(max_bytes=25 * TRADE_BYTES)
+    for p in paths:
+        cache.get(p)
+    cache.get(paths[1])
+    cache.get(paths[2])
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert str(paths[0].resolve()) not in stats["files"]
+    assert stats["bytes"] <= cache.max_bytes
+
+
+def test_cache_releases_load_lock_when_loader_fails(tmp_path: Path):
+    bt = _write_bt(tmp_path / "bt.csv", n=3)
+    calls = []
+
+    def loader(p):
+        calls.append(p)
+        if len(calls) == 1:
+            raise ValueError("bad backtest file")
+        return read_trades_csv(p, source="backtest")
+
+    cache = BacktestCache(loader=loader)
+    with pytest.raises(ValueError):
+        cache.get(bt)
+    assert cache._loading == {}
+    index, hit = cache.get(bt)  # a retry loads it
+    assert len(index) == 3 and not hit
+    assert cache._loading == {}
+
+
+def test_service_rejects_bad_requests(tmp_path: Path):
+    bt = _write_bt(tmp_path / "bt.csv")
+    svc = AuditService(root=tmp_path / "sub")
+    with pytest.raises(ValueError, match="outside the server root"):
+        svc.audit({"backtest": str(bt), "live": []})
+    svc = AuditService(root=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        svc.audit({"backtest": "nope.csv", "live": []})
+    with pytest.raises(ValueError, match="live\\[0\\]"):
+        svc.audit({"backtest": "bt.csv", "live": [{"symbol": "EURUSD"}]})
+
+
+def _serve(server):
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    return t
+
+
+def test_http_roundtrip_concurrent(tmp_path: Path):
+    bt = _write_bt(tmp_path / "bt.csv")
+    server = make_server("127.0.0.1:0", AuditService(), workers=4)
+    _serve(server)
+    port = server.server_address[1]
+    body = json.dumps({"backtest": str(bt), "live": LIVE, "tolerance": 60})
+
+    results = []
+
+    def call():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("POST", "/audit", body, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        results.append((resp.status, json.loads(resp.read())))
+        conn.close()
+
+    try:
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert all(status == 200 and r["matched"] == 2 for status, r in results)
+        assert len(results) == 8
+
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("POST", "/audit", "{not json")
+        resp = conn.getresponse()
+        assert resp.status == 400 and "error" in json.loads(resp.read())
+        conn.close()
+
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", "/health")
+        health = json.loads(conn.getresponse().read())
+        conn.close()
+        assert health["cache"]["entries"] == 1 and health["cache"]["misses"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no unix sockets")
+def test_unix_socket(tmp_path: Path):
+    bt = _write_bt(tmp_path / "bt.csv")
+    sock_path = str(tmp_path / "audit.sock")
+    server = make_server(f"unix:{sock_path}", AuditService(), workers=2)
+    _serve(server)
+    try:
+        body = json.dumps({"backtest": str(bt), "live": LIVE, "details": False}).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(sock_path)
+            s.sendall(
+                b"POST /audit HTTP/1.0\r\nContent-Length: " + str(len(body)).encode()
+                + b"\r\n\r\n" + body
+            )
+            raw = b""
+            while chunk := s.recv(65536):
+                raw += chunk
+        head, _, payload = raw.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.0 200")
+        assert json.loads(payload)["matched"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not os.path.exists(sock_path)
+
+
+def test_unix_listen_path_must_be_a_socket(tmp_path: Path):
+    path = tmp_path / "notes.txt"
+    path.write_text("keep me", encoding="utf-8")
+    with pytest.raises(ValueError, match="not a socket"):
+        make_server(f"unix:{path}", AuditService())
+    assert path.read_text(encoding="utf-8") == "keep me"
+
+    # A stale socket of a previous run is replaced.
+    sock_path = str(tmp_path / "audit.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.bind(sock_path)
+    server = make_server(f"unix:{sock_path}", AuditService())
+    server.server_close()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor import schemas
+from consistency_auditor.hashing import compute_signal_id, stable_hash
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import Decision, DecisionContext
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _ctx(**kw) -> DecisionContext:
+    base = {
+        "symbol": "EURUSD",
+        "decision_time": T0,
+        "bid": 1.1,
+        "ask": 1.1002,
+        "spread": 0.0002,
+        "strategy_tag": "MACD_X",
+        "params": {},
+        "bars_hash": "abc123",
+        "features_hash": "f",
+    }
+    base.update(kw)
+    return DecisionContext(**base)
+
+
+def test_v1_is_the_original_scheme():
+    expected = stable_hash(
+        {"sym": "EURUSD", "dt": str(T0), "side": "BUY", "tag": "MACD_X", "bars": "abc123"}
+    )[:12]
+    assert compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123", version=1) == expected
+
+
+def test_v2_is_stable_and_distinct():
+    sid = compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123")
+    assert len(sid) == 12 and int(sid, 16) >= 0
+    assert sid == compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123", version=2)
+    assert sid != compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123", version=1)
+
+    # Same instant in another tz offset -> same ID; any field change -> new ID.
+    cet = T0.astimezone(timezone(timedelta(hours=1)))
+    assert compute_signal_id("EURUSD", cet, "BUY", "MACD_X", "abc123") == sid
+    others = {
+        compute_signal_id("EURUSD", T0 + timedelta(microseconds=1), "BUY", "MACD_X", "abc123"),
+        compute_signal_id("EURUSD", T0, "SELL", "MACD_X", "abc123"),
+        compute_signal_id("GBPUSD", T0, "BUY", "MACD_X", "abc123"),
+        compute_signal_id("EURUSD", T0, "BUY", "MACD_Y", "abc123"),
+        compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc124"),
+    }
+    assert sid not in others and len(others) == 5
+
+
+def test_v2_field_boundaries_are_unambiguous():
+    a = compute_signal_id("EUR\x1fUSD", T0, "BUY", "X", "b")
+    b = compute_signal_id("EUR", T0, "USD\x1fBUY", "X", "b")
+    assert a != b
+
+    # The length-prefixed fallback payload of `lp` is the joined payload of `joined`.
+    lp = compute_signal_id("A\x1fB\x1fC\x1fD\x1fE", "1", "s", "g", "h")
+    joined = compute_signal_id("9:A", "B", "C", "D", "E1:11:s1:g1:h")
+    assert lp != joined
+
+
+def test_unknown_version_rejected():
+    with pytest.raises(ValueError, match="signal_id version"):
+        compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123", version=3)
+
+
+def test_none_decision_id_is_lazy():
+    none = Decision(context=_ctx(), intent="NONE")
+    assert none._signal_id is None
+    assert none.signal_id == compute_signal_id("EURUSD", T0, "NONE", "MACD_X", "abc123")
+    assert none._signal_id is not None
+
+    buy = Decision(context=_ctx(), intent="BUY", signal_id_version=1)
+    assert buy._signal_id == compute_signal_id("EURUSD", T0, "BUY", "MACD_X", "abc123", version=1)
+    assert buy.to_event()["signal_id"] == buy.signal_id
+
+
+def test_recorder_hashes_each_written_decision_once(tmp_path: Path, monkeypatch):
+    calls = []
+    real = schemas.compute_signal_id
+
+    def counting(*args, **kwargs):
+        calls.append(kwargs["side"])
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(schemas, "compute_signal_id", counting)
+    rec = ConsistencyRecorder(tmp_path, "r")
+    for i in range(50):
+        rec.log_decision(_ctx(decision_time=T0 + timedelta(seconds=i)), intent="NONE")
+    rec.log_decision(_ctx(), intent="BUY")
+    rec.close()
+    assert calls == ["NONE"] * 50 + ["BUY"]
+
+    none = Decision(context=_ctx(), intent="NONE")
+    assert none.context.symbol == "EURUSD" and len(calls) == 51  # never read: never hashed
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.match import audit_trades
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.skew import audit_with_skew, estimate_skew, skew_key
+
+T0 = datetime(2026, 3, 27, tzinfo=timezone.utc)
+
+
+def _streams(offsets: dict[str, float], n: int = 200, seed: int = 3):
+    rng = random.Random(seed)
+    bt, live = [], []
+    for sym, off in offsets.items():
+        for k in range(n):
+            t = T0 + timedelta(seconds=k * 300 + rng.uniform(0, 60))
+            side = Side.BUY if k % 2 else Side.SELL
+            bt.append(Trade("backtest", sym, side, t, 1.0))
+            if rng.random() < 0.9:  # some live trades missing
+                jitter = rng.uniform(-2, 2)
+                live.append(Trade("live", sym, side, t + timedelta(seconds=off + jitter), 1.0))
+    return bt, live
+
+
+def test_estimates_offset_per_symbol():
+    bt, live = _streams({"EURUSD": 95.0, "GBPUSD": -40.0})
+    est = estimate_skew(bt, live, by="symbol")
+    assert est["EURUSD"].applied and est["EURUSD"].offset_s == pytest.approx(95.0, abs=1.0)
+    assert est["GBPUSD"].offset_s == pytest.approx(-40.0, abs=1.0)
+    assert est["EURUSD"].support >= 0.6 * est["EURUSD"].live_trades
+
+
+def test_correction_allows_tight_tolerance():
+    bt, live = _streams({"EURUSD": 95.0})
+    tight = audit_trades(bt, live, time_tolerance_s=5)
+    assert len(tight.matched) == 0
+
+    est = estimate_skew(bt, live)
+    res = audit_with_skew(bt, live, est, time_tolerance_s=5)
+    assert len(res.matched) == len(live)
+    assert not res.extra_in_live
+    # Original live trades come back, with the residual time difference.
+    live_ids = {id(t) for t in live}
+    assert all(id(m.live) in live_ids for m in res.matched)
+    assert max(m.open_time_diff_s for m in res.matched) < 5
+
+
+def test_day_grouping_follows_dst_jump():
+    bt, live = [], []
+    for day, off in ((0, 0.0), (1, 3600.0)):
+        for k in range(20):
+            t = T0 + timedelta(days=day, minutes=k * 30)
+            bt.append(Trade("backtest", "EURUSD", Side.BUY, t, 1.0))
+            live.append(Trade("live", "EURUSD", Side.BUY, t + timedelta(seconds=off), 1.0))
+    est = estimate_skew(bt, live, by="day", max_offset_s=4000)
+    assert [round(e.offset_s) for e in est.values()] == [0, 3600]
+
+
+def test_day_key_is_the_utc_day():
+    # 02:00 at +05:00 is still the previous UTC day.
+    t = datetime(2026, 3, 27, 2, 0, tzinfo=timezone(timedelta(hours=5)))
+    lt = Trade("live", "EURUSD", Side.BUY, t, 1.0)
+    assert skew_key(lt, "day") == "2026-03-26"
+    assert skew_key(lt, "symbol_day") == "EURUSD@2026-03-26"
+
+
+def test_no_support_is_not_applied():
+    bt = [Trade("backtest", "EURUSD", Side.BUY, T0, 1.0)]
+    live = [Trade("live", "EURUSD", Side.BUY, T0 + timedelta(seconds=30), 1.0)]
+    est = estimate_skew(bt, live)
+    assert not est["EURUSD"].applied and est["EURUSD"].offset_s == 0.0
+
+
+def test_cli_auto_skew_reports_offset(tmp_path: Path, capsys):
+    backtest = tmp_path / "bt.csv"
+    live = tmp_path / "lv.csv"
+    bt_rows = ["symbol,side,open_time,open_price"]
+    lv_rows = ["symbol,side,open_time,open_price"]
+    for k in range(10):
+        t = T0 + timedelta(minutes=10 * k)
+        bt_rows.append(f"EURUSD,BUY,{t.isoformat()},1.1")
+        lv_rows.append(f"EURUSD,BUY,{(t + timedelta(seconds=120)).isoformat()},1.1")
+    backtest.write_text("\n".join(bt_rows) + "\n", encoding="utf-8")
+    live.write_text("\n".join(lv_rows) + "\n", encoding="utf-8")
+
+    args = ["audit", "--backtest", str(backtest), "--live", str(live), "--tolerance", "2"]
+    assert main([*args, "--auto-skew"]) == 0
+    out = capsys.readouterr().out
+    assert "skew EURUSD: live-backtest offset=+120.000s" in out
+    assert "matched=10 missing_in_live=0 extra_in_live=0" in out
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import sys
+import types
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.eventlog import EventLog
+from consistency_auditor.recorder import ConsistencyRecorder
+from consistency_auditor.schemas import DecisionContext
+from consistency_auditor.snapshot import (
+    HASH_MISMATCH,
+    MISSING,
+    OK,
+    UNVERIFIED,
+    SnapshotStore,
+    load_snapshots,
+)
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def read_json(path: Path, columns) -> tuple[dict, str | None]:
+    data = json.loads(path.read_text("utf-8"))
+    stored = data.pop("bars_hash", None)
+    return {c: v for c, v in data.items() if columns is None or c in columns}, stored
+
+
+def _decision(log: EventLog, sid: str, snap: str | None, bars_hash: str | None) -> None:
+    ctx = {"symbol": "EURUSD", "decision_time": T0.isoformat()}
+    if bars_hash is not None:
+        ctx["bars_hash"] = bars_hash
+    log.append(
+        {"event_type": "DECISION", "signal_id": sid, "intent": "BUY", "context": ctx,
+         "snapshot_path": snap}
+    )
+
+
+def _record(audit: Path) -> None:
+    snaps = audit / "snapshots"
+    snaps.mkdir(parents=True)
+    files = {
+        "a": {"bars_hash": "h-a", "close": [1.0, 1.1], "volume": [5, 6]},
+        "b": {"bars_hash": "other", "close": [2.0]},  # overwritten by another decision
+        "c": {"close": [3.0]},  # written before hashes were stored
+    }
+    for sid, data in files.items():
+        (snaps / f"bars_{sid}.json").write_text(json.dumps(data), "utf-8")
+    log = EventLog(audit)
+    _decision(log, "a", "bars_a.json", "h-a")
+    _decision(log, "b", "bars_b.json", "h-b")
+    _decision(log, "c", "bars_c.json", "h-c")
+    _decision(log, "gone", "bars_gone.json", "h-g")
+    _decision(log, "none", None, "h-n")
+    log.close()
+
+
+def test_load_verifies_stored_hash_and_projects_columns(tmp_path: Path):
+    audit = tmp_path / "audit"
+    _record(audit)
+    store = SnapshotStore(audit, reader=read_json)
+
+    snaps = store.load(["a", "b", "c", "gone", "none", "unknown"], workers=2)
+    assert [s.status for s in snaps] == [OK, HASH_MISMATCH, UNVERIFIED, MISSING, MISSING, MISSING]
+    assert snaps[0].frame == {"close": [1.0, 1.1], "volume": [5, 6]}
+    assert (snaps[1].logged_hash, snaps[1].found_hash) == ("h-b", "other")
+    assert snaps[3].path == audit / "snapshots" / "bars_gone.json" and snaps[4].path is None
+
+    (projected,) = store.load(["a"], columns=["close"])
+    assert projected.frame == {"close": [1.0, 1.1]}
+    store.load(["a", "a"])
+    assert (store.hits, store.misses) == (1, 4)
+
+
+def test_hasher_and_new_decisions(tmp_path: Path):
+    audit = tmp_path / "audit"
+    _record(audit)
+
+    def hasher(frame: dict) -> str:
+        return f"h-{'c' if frame['close'] == [3.0] else 'x'}"
+
+    snaps = load_snapshots(audit, ["c", "a"], reader=read_json, hasher=hasher)
+    assert [s.status for s in snaps] == [OK, HASH_MISMATCH]
+
+    # A decision logged after the index was built is found on the next call.
+    (audit / "snapshots" / "bars_d.json").write_text(json.dumps({"close": [4.0]}), "utf-8")
+    log = EventLog(audit)
+    _decision(log, "d", "bars_d.json", "h-d")
+    log.close()
+    (snap,) = load_snapshots(audit, ["d"], reader=read_json, hasher=hasher)
+    assert (snap.status, snap.frame) == (HASH_MISMATCH, {"close": [4.0]})
+
+
+def test_cli_show_snapshot_missing(tmp_path: Path, capsys):
+    audit = tmp_path / "audit"
+    _record(audit)
+    assert main(["show-snapshot", "--audit-dir", str(audit), "--signal-id", "none,unknown"]) == 3
+    text = capsys.readouterr().out
+    assert "none: MISSING (no snapshot logged)" in text
+    assert "unknown: MISSING (no snapshot logged)" in text
+
+    assert main(["show-snapshot", "--audit-dir", str(tmp_path / "nope"), "--signal-id", "a"]) == 2
+    assert "audit folder not found" in capsys.readouterr().out
+    argv = ["show-snapshot", "--audit-dir", str(audit), "--signal-id", "a"]
+    assert main([*argv, "--bars-hasher", "nomodule"]) == 2
+    assert "invalid bars hasher" in capsys.readouterr().out
+
+
+def test_without_pyarrow_snapshots_are_written_unverified(tmp_path: Path, monkeypatch):
+    # A pandas whose only Parquet engine is not pyarrow (e.g. fastparquet).
+    class DataFrame:
+        empty = False
+
+        def __init__(self, rows):
+            self.rows = rows
+
+        def to_parquet(self, path, index):
+            Path(path).write_text(json.dumps(self.rows), "utf-8")
+
+    def read_parquet(path, columns=None):
+        return DataFrame(json.loads(Path(path).read_text("utf-8")))
+
+    pandas = types.ModuleType("pandas")
+    pandas.DataFrame = DataFrame
+    pandas.read_parquet = read_parquet
+    monkeypatch.setitem(sys.modules, "pandas", pandas)
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+
+    rec = ConsistencyRecorder(tmp_path, "r")
+    ctx = DecisionContext(
+        symbol="EURUSD",
+        decision_time=T0,
+        bid=1.1,
+        ask=1.1002,
+        spread=0.0002,
+        strategy_tag="MACD_X",
+        params={},
+        bars_hash="h",
+        features_hash="f",
+    )
+    sid = rec.log_decision(ctx, "BUY", bars=DataFrame([[1.0, 1.1]]))
+    rec.close()
+    assert sid != "error_id"
+
+    (snap,) = load_snapshots(rec.audit_dir, [sid])
+    assert (snap.status, snap.logged_hash, snap.frame.rows) == (UNVERIFIED, "h", [[1.0, 1.1]])
+
+
+def test_parquet_round_trip(tmp_path: Path, capsys):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    from consistency_auditor.snapshot import read_arrow_snapshot, save_bars_snapshot
+
+    audit = tmp_path / "audit"
+    bars = pd.DataFrame(
+        {"open": [1.0, 1.1], "close": [1.05, 1.15]},
+        index=pd.DatetimeIndex([T0, T0.replace(hour=1)], name="time"),
+    )
+    log = EventLog(audit)
+    for sid, h in (("p", "hash-p"), ("q", "hash-q")):
+        fname = save_bars_snapshot(audit / "snapshots", sid, bars, bars_hash=h)
+        _decision(log, sid, fname, "hash-p")
+    log.close()
+
+    table, stored = read_arrow_snapshot(audit / "snapshots" / "bars_p.parquet", ["close"])
+    assert table.column_names == ["close"] and stored == "hash-p"
+    p, q = load_snapshots(audit, ["p", "q"])
+    assert (p.status, q.status) == (OK, HASH_MISMATCH)
+    assert p.frame.equals(bars)
+
+    argv = ["show-snapshot", "--audit-dir", str(audit), "--signal-id", "p", "--columns", "close"]
+    assert main(argv) == 0
+    assert "p: OK rows=2" in capsys.readouterr().out
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.match import AuditResult, TradeMatch
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.sketch import LogHistogram
+from consistency_auditor.store import ResultStore
+
+T0 = datetime(2026, 1, 5, 10, tzinfo=timezone.utc)  # a Monday
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    rng = random.Random(1)
+    xs = [rng.lognormvariate(0, 1) * rng.choice([-1, 1]) for _ in range(20_000)] + [0.0] * 100
+    a, b = LogHistogram(0.01), LogHistogram(0.01)
+    for i, x in enumerate(xs):
+        (a if i % 2 else b).add(x)
+    a.merge(b)
+    a = LogHistogram.from_json(a.to_json())
+    xs.sort()
+    for q in (0.05, 0.5, 0.95, 0.99):
+        exact = xs[int(q * (len(xs) - 1))]
+        assert a.quantile(q) == pytest.approx(exact, rel=0.02, abs=1e-9)
+    mags = sorted(abs(x) for x in xs)
+    assert a.abs().quantile(0.95) == pytest.approx(mags[int(0.95 * (len(mags) - 1))], rel=0.02)
+    assert a.count == len(xs)
+
+
+def _result(day: int, diffs: list[float], symbol: str = "EURUSD", missing: int = 0) -> AuditResult:
+    matched = []
+    for k, d in enumerate(diffs):
+        t = T0 + timedelta(days=day, minutes=k)
+        bt = Trade("backtest", symbol, Side.BUY, t, 1.0)
+        lv = Trade("live", symbol, Side.BUY, t + timedelta(seconds=2), 1.0 + d)
+        matched.append(TradeMatch(bt, lv, 2.0, d))
+    miss = [Trade("backtest", symbol, Side.SELL, T0 + timedelta(days=day), 1.0)] * missing
+    return AuditResult(matched=matched, missing_in_live=miss, extra_in_live=[])
+
+
+def test_rollups_answer_trend_queries(tmp_path: Path):
+    with ResultStore(tmp_path / "audit.db") as store:
+        store.add_run("r1", _result(0, [0.001] * 90 + [0.01] * 10), account="A")
+        store.add_run("r2", _result(1, [0.002] * 100, missing=25), account="A")
+        store.add_run("r3", _result(7, [0.003] * 50), account="B")
+        store.add_run("r4", _result(0, [0.5] * 10, symbol="GBPUSD"), account="A")
+
+        weekly = store.query("price_diff", "p95", by=("week",), symbol="EURUSD")
+        assert [(r["week"], r["n"]) for r in weekly] == [("2026-W02", 200), ("2026-W03", 50)]
+        assert weekly[0]["value"] == pytest.approx(0.002, rel=0.02)
+        assert weekly[1]["value"] == pytest.approx(0.003, rel=0.02)
+
+        by_sym = store.query("abs_price_diff", "max", by=("symbol",))
+        assert [r["symbol"] for r in by_sym] == ["EURUSD", "GBPUSD"]
+        assert by_sym[1]["value"] == pytest.approx(0.5)
+
+        rate = store.query("match_rate", by=("day",), account="A", until="2026-01-06")
+        assert [round(r["value"], 3) for r in rate] == [1.0, 0.8]
+
+        with pytest.raises(ValueError, match="already stored"):
+            store.add_run("r1", _result(0, [0.1]))
+        with pytest.raises(ValueError, match="invalid stat"):
+            store.query("price_diff", "p200")
+
+
+def test_cli_audit_store_and_query(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    header = "symbol,side,open_time,open_price\n"
+    bt.write_text(header + "EURUSD,BUY,2026-01-05T10:00:00+00:00,1.1000\n", "utf-8")
+    lv.write_text(header + "EURUSD,BUY,2026-01-05T10:00:30+00:00,1.1005\n", "utf-8")
+    db = tmp_path / "store.db"
+
+    args = ["audit", "--backtest", str(bt), "--live", str(lv), "--store", str(db), "--run-id", "r1"]
+    assert main(args) == 0
+    assert main(args) == 2  # same run id twice
+    capsys.readouterr()
+
+    query = ["query", "--store", str(db), "--metric", "time_diff_s"]
+    assert main([*query, "--stat", "p50", "--by", "week,symbol"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "week\tsymbol\tn\ttime_diff_s_p50"
+    week, sym, n, value = lines[1].split("\t")
+    assert (week, sym, n) == ("2026-W02", "EURUSD", "1")
+    assert float(value) == pytest.approx(30, rel=0.02)
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.io_csv import read_trades_csv
+from consistency_auditor.io_mmap import read_trades_columns
+from consistency_auditor.match import audit_trades
+from consistency_auditor.symbols import SymbolMapper, load_symbol_map
+
+SPEC = {
+    "aliases": {"GER40": "DE40", "gold": "XAUUSD"},
+    "suffixes": [".m", "pro", "-ECN"],
+    "patterns": [[r"(\w{6})_\d+", r"\1"]],
+}
+
+
+def test_mapper_rules():
+    m = SymbolMapper.from_dict(SPEC)
+    assert m("EURUSD.m") == "EURUSD"
+    assert m("eurusdpro") == "EURUSD"
+    assert m("GBPUSD-ecn") == "GBPUSD"
+    assert m("USDJPY_2024") == "USDJPY"
+    assert m(" ger40 ") == "DE40"
+    assert m("Gold.m") == "XAUUSD"  # suffix stripped, then aliased
+    assert m("pro") == "PRO"  # a suffix never eats the whole name
+    # Cached and interned: one object per canonical name.
+    assert m("EURUSD.m") is m("eurusdpro") is m("EURUSD")
+    assert set(m.resolved) >= {"EURUSD.m", "eurusdpro", "EURUSD"}
+
+
+def test_mapper_case_keep_and_errors():
+    m = SymbolMapper(suffixes=[".m"], case="keep")
+    assert m("eurusd.m") == "eurusd"
+    assert m("EURUSD.M") == "EURUSD.M"
+    with pytest.raises(ValueError, match="invalid symbol pattern"):
+        SymbolMapper(patterns=[("(", "")])
+    with pytest.raises(ValueError, match="unknown symbol map keys"):
+        SymbolMapper.from_dict({"alias": {}})
+
+
+def _write(path: Path, rows: list[tuple[str, str, str]]) -> Path:
+    lines = ["symbol,side,open_time,open_price"]
+    lines += [f"{sym},{side},{t},1.1" for sym, side, t in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def test_readers_map_and_intern(tmp_path: Path):
+    bt = _write(
+        tmp_path / "bt.csv",
+        [("EURUSD", "BUY", "2026-01-01T10:00:00Z"), ("GER40", "SELL", "2026-01-01T11:00:00Z")],
+    )
+    lv = _write(
+        tmp_path / "lv.csv",
+        [("EURUSD.m", "BUY", "2026-01-01T10:00:05Z"), ("DE40pro", "SELL", "2026-01-01T11:00:05Z")],
+    )
+
+    # Without a map: broker names stay apart, but symbols are still interned.
+    plain_bt = read_trades_csv(bt, source="backtest")
+    plain_lv = read_trades_csv(lv, source="live")
+    assert plain_bt[0].symbol is read_trades_csv(bt, source="backtest")[0].symbol
+    res = audit_trades(plain_bt, plain_lv)
+    assert len(res.matched) == 0 and len(res.extra_in_live) == 2
+
+    m = SymbolMapper.from_dict(SPEC)
+    mapped_bt = read_trades_csv(bt, source="backtest", symbols=m)
+    mapped_lv = read_trades_csv(lv, source="live", symbols=m)
+    assert [t.symbol for t in mapped_lv] == ["EURUSD", "DE40"]
+    assert mapped_lv[0].symbol is mapped_bt[0].symbol
+    res = audit_trades(mapped_bt, mapped_lv)
+    assert len(res.matched) == 2 and not res.missing_in_live and not res.extra_in_live
+
+    cols = read_trades_columns(lv, source="live", symbols=m)
+    assert cols.symbol == ["EURUSD", "DE40"]
+    assert cols.symbol[0] is mapped_bt[0].symbol
+
+
+def test_cli_symbol_map(tmp_path: Path, capsys):
+    bt = _write(tmp_path / "bt.csv", [("EURUSD", "BUY", "2026-01-01T10:00:00Z")])
+    lv = _write(tmp_path / "lv.csv", [("EURUSD.m", "BUY", "2026-01-01T10:00:05Z")])
+    smap = tmp_path / "symbols.json"
+    smap.write_text(json.dumps(SPEC), encoding="utf-8")
+    assert isinstance(load_symbol_map(smap), SymbolMapper)
+
+    for reader in ("csv", "mmap"):
+        argv = ["audit", "--backtest", str(bt), "--live", str(lv), "--reader", reader]
+        assert main([*argv, "--symbol-map", str(smap)]) == 0
+        assert "matched=1 missing_in_live=0 extra_in_live=0" in capsys.readouterr().out
+
+    argv = ["audit", "--backtest", str(bt), "--live", str(lv), "--symbol-map", "nope.json"]
+    assert main(argv) == 2
+    assert "ERROR: symbol map file not found" in capsys.readouterr().out
+
+    smap.write_text("[1, 2]", encoding="utf-8")
+    assert main(["audit", "--backtest", str(bt), "--live", str(lv), "--symbol-map", str(smap)]) == 2
+    assert "expected a JSON object" in capsys.readouterr().out
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from consistency_auditor.cli import main
+from consistency_auditor.models import Side, Trade
+from consistency_auditor.watch import (
+    CsvTradeParser,
+    EventTradeParser,
+    LineFollower,
+    StreamMatcher,
+    run_watch,
+)
+
+
+def dt(s: str) -> datetime:
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+
+
+def test_stream_matcher_emits_matched_extra_and_missing():
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:00:00"), 1.1000, trade_id="BT-1"),
+        Trade("backtest", "EURUSD", Side.SELL, dt("2026-01-01T12:00:00"), 1.2000, trade_id="BT-2"),
+    ]
+    m = StreamMatcher(bt, time_tolerance_s=120)
+
+    # No trade_id: waits for the time pass.
+    a1 = m.on_live(Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T10:01:00"), 1.1002))
+    assert a1 == []
+
+    # Far later live trade: settles the first one and pushes the watermark past BT-2.
+    a2 = m.on_live(Trade("live", "EURUSD", Side.BUY, dt("2026-01-02T09:00:00"), 1.1500))
+    assert [a["alert"] for a in a2] == ["MATCHED", "MISSING"]
+    assert a2[1]["trade_id"] == "BT-2"
+
+    assert [a["alert"] for a in m.finish()] == ["EXTRA"]
+
+
+def test_stream_matcher_does_not_take_a_trade_a_later_id_claims():
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:00:00"), 1.1, trade_id="A"),
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:03:00"), 1.1, trade_id="B"),
+    ]
+    m = StreamMatcher(bt, time_tolerance_s=120)
+    alerts = m.on_live(Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T10:01:00"), 1.1))
+    alerts += m.on_live(
+        Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T10:01:30"), 1.1, trade_id="A")
+    )
+    alerts += m.finish()
+    pairs = {(a["bt_trade_id"], a["lv_trade_id"]) for a in alerts if a["alert"] == "MATCHED"}
+    assert pairs == {("A", "A"), ("B", "")}
+
+
+def test_stream_matcher_reports_duplicate_backtest_ids():
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:00:00"), 1.1, trade_id="D"),
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T11:00:00"), 1.1, trade_id="D"),
+    ]
+    m = StreamMatcher(bt, time_tolerance_s=120)
+    assert [(c.key, c.reason, len(c.backtest)) for c in m.id_conflicts] == [
+        ("D", "duplicate_backtest", 2)
+    ]
+
+    # The id links nothing; the live trade is matched by time to the nearer one.
+    alerts = m.on_live(
+        Trade("live", "EURUSD", Side.BUY, dt("2026-01-01T10:00:30"), 1.1, trade_id="D")
+    )
+    alerts += m.finish()
+    matched = [a for a in alerts if a["alert"] == "MATCHED"]
+    assert [a["bt_open_time"] for a in matched] == ["2026-01-01T10:00:00+00:00"]
+    assert [a["alert"] for a in alerts].count("MISSING") == 1
+
+
+def test_line_follower_only_returns_complete_lines(tmp_path: Path):
+    p = tmp_path / "live.csv"
+    p.write_text("a,b\n1,", encoding="utf-8")
+    f = LineFollower(p)
+    assert f.poll() == ["a,b"]
+
+    with p.open("a", encoding="utf-8") as fh:
+        fh.write("2\n")
+    assert f.poll() == ["1,2"]
+    f.close()
+
+
+def test_line_follower_reads_a_large_backlog_in_chunks(tmp_path: Path):
+    p = tmp_path / "live.csv"
+    rows = [f"{i},{'x' * (i % 7)}" for i in range(500)]
+    p.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    f = LineFollower(p, chunk_size=64)
+    polls = []
+    while lines := f.poll():
+        polls.append(lines)
+        assert len(f._buf) < 64
+    f.close()
+    assert len(polls) > 1 and max(map(len, polls)) < 20
+    assert [line for lines in polls for line in lines] == rows
+
+    # One line longer than a chunk still comes back whole.
+    p.write_text("y" * 200 + "\nz\n", encoding="utf-8")
+    f = LineFollower(p, chunk_size=64)
+    assert f.poll() == ["y" * 200, "z"]
+    assert f.poll() == []
+    f.close()
+
+
+class _ListSink:
+    def __init__(self):
+        self.alerts = []
+
+    def emit(self, alert):
+        self.alerts.append(alert)
+
+    def close(self):
+        pass
+
+
+def test_watch_survives_rotation_and_bad_lines(tmp_path: Path):
+    bt = [
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T10:00:00"), 1.1, trade_id="1"),
+        Trade("backtest", "EURUSD", Side.BUY, dt("2026-01-01T11:00:00"), 1.1, trade_id="2"),
+    ]
+    p = tmp_path / "live.csv"
+    p.write_text(
+        "trade_id,symbol,side,open_time,open_price\n"
+        "1,EURUSD,BUY,2026-01-01T10:00:05+00:00,1.1\n",
+        encoding="utf-8",
+    )
+    follower = LineFollower(p)
+    parser = CsvTradeParser()
+    assert [parser.feed(line) for line in follower.poll()][1].trade_id == "1"
+
+    # Rotated: a new file (other delimiter) under the same path, header first.
+    p.rename(tmp_path / "live.csv.1")
+    p.write_text(
+        "trade_id;symbol;side;open_time;open_price\n"
+        "x;EURUSD;HOLD;2026-01-01T10:30:00+00:00;1.1\n"
+        "2;EURUSD;BUY;2026-01-01T11:00:05+00:00;1.1\n",
+        encoding="utf-8",
+    )
+    sink = _ListSink()
+    counts = run_watch(StreamMatcher(bt), follower, parser, sink, follow=False, emit_matched=True)
+    assert follower.reopens == 1
+    assert counts == {"MATCHED": 1, "MISSING": 1, "EXTRA": 0, "BAD_LINES": 1}
+    assert [a["lv_trade_id"] for a in sink.alerts if a["alert"] == "MATCHED"] == ["2"]
+
+    events = tmp_path / "events.jsonl"
+    events.write_text('{"event_type": "ORDER_SENT", "signal_id": \n{}\n', encoding="utf-8")
+    counts = run_watch(
+        StreamMatcher(bt), LineFollower(events), EventTradeParser(), _ListSink(), follow=False
+    )
+    assert (counts["BAD_LINES"], counts["MISSING"]) == (1, 2)
+
+
+def test_cli_watch_events_no_follow(tmp_path: Path, capsys):
+    backtest = tmp_path / "backtest.csv"
+    backtest.write_text(
+        "symbol,side,open_time,open_price\n"
+        "EURUSD,BUY,2026-01-01T10:00:00+00:00,1.1000\n"
+        "EURUSD,SELL,2026-01-01T12:00:00+00:00,1.2000\n",
+        encoding="utf-8",
+    )
+    events = tmp_path / "events.jsonl"
+    events.write_text(
+        "\n".join(
+            json.dumps(e)
+            for e in [
+                {
+                    "event_type": "ORDER_SENT",
+                    "signal_id": "s1",
+                    "symbol": "EURUSD",
+                    "side": "BUY",
+                    "volume": 0.1,
+                },
+                {
+                    "event_type": "FILL_OPEN",
+                    "signal_id": "s1",
+                    "timestamp": "2026-01-01T10:00:30+00:00",
+                    "fill_price": 1.1001,
+                },
+            ]
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+    alerts = tmp_path / "alerts.jsonl"
+
+    rc = main(
+        [
+            "watch",
+            "--backtest",
+            str(backtest),
+            "--live",
+            str(events),
+            "--no-follow",
+            "--sink",
+            f"jsonl:{alerts}",
+        ]
+    )
+    out = capsys.readouterr().out
+
+    assert rc == 0
+    assert "matched=1 missing_in_live=1 extra_in_live=0" in out
+    lines = [json.loads(x) for x in alerts.read_text("utf-8").splitlines()]
+    assert [a["alert"] for a in lines] == ["MISSING"]
+
+
+def test_cli_watch_no_follow_equals_audit_on_sorted_input(tmp_path: Path, capsys):
+    rng = random.Random(7)
+    t0 = dt("2026-01-01T00:00:00")
+    header = "trade_id,symbol,side,open_time,open_price\n"
+    bt_rows, lv_rows = [], []
+    for i in range(400):
+        symbol, side = rng.choice(["EURUSD", "GBPUSD"]), rng.choice(["BUY", "SELL"])
+        t = t0 + timedelta(seconds=rng.randrange(6 * 3600))
+        trade_id = f"T{i}" if rng.random() < 0.5 else ""
+        bt_rows.append((trade_id, symbol, side, t))
+        if rng.random() < 0.9:
+            lt = t + timedelta(seconds=rng.randrange(-110, 110))
+            lv_rows.append((trade_id if rng.random() < 0.8 else "", symbol, side, lt))
+    for _ in range(20):
+        lv_rows.append(("", "EURUSD", "BUY", t0 + timedelta(seconds=rng.randrange(6 * 3600))))
+    lv_rows.sort(key=lambda r: r[3])
+
+    paths = {}
+    for name, rows in (("backtest", bt_rows), ("live", lv_rows)):
+        paths[name] = tmp_path / f"{name}.csv"
+        paths[name].write_text(
+            header + "".join(f"{i},{s},{d},{t.isoformat()},1.1\n" for i, s, d, t in rows),
+            encoding="utf-8",
+        )
+    inputs = ["--backtest", str(paths["backtest"]), "--live", str(paths["live"])]
+
+    assert main(["audit", *inputs]) == 0
+    audit_out = capsys.readouterr().out
+    alerts = tmp_path / "alerts.jsonl"
+    assert main(["watch", *inputs, "--no-follow", "--sink", f"jsonl:{alerts}"]) == 0
+    watch_out = capsys.readouterr().out
+
+    counts = next(line for line in audit_out.splitlines() if line.startswith("matched="))
+    assert f"watch done: {counts}" in watch_out
+
+
+def test_cli_watch_bad_backtest_rows(tmp_path: Path, capsys):
+    backtest = tmp_path / "backtest.csv"
+    backtest.write_text(
+        "symbol,side,open_time,open_price\n"
+        "EURUSD,BUY,2026-01-01T10:00:00+00:00,1.1000\n"
+        "EURUSD,HOLD,2026-01-01T11:00:00+00:00,1.1000\n",
+        encoding="utf-8",
+    )
+    live = tmp_path / "live.csv"
+    live.write_text(
+        "symbol,side,open_time,open_price\nEURUSD,BUY,2026-01-01T10:00:10+00:00,1.1\n",
+        encoding="utf-8",
+    )
+    args = ["watch", "--backtest", str(backtest), "--live", str(live), "--no-follow"]
+
+    assert main(args) == 2
+    assert "ERROR:" in capsys.readouterr().out
+
+    assert main([*args, "--on-bad-row", "quarantine"]) == 0
+    out = capsys.readouterr().out
+    assert "backtest: quarantined 1 bad rows" in out
+    assert "matched=1 missing_in_live=0 extra_in_live=0" in out
+    assert (tmp_path / "quarantine_backtest.csv").read_text("utf-8").count("\n") == 2
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from consistency_auditor.cli import main
+from consistency_auditor.match import BacktestIndex, audit_trades, parse_weights
+from consistency_auditor.models import Side, Trade
+
+T0 = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+
+
+def _t(src, sec, price, vol=None, close=None, side=Side.BUY) -> Trade:
+    close_time = None if close is None else T0 + timedelta(seconds=close)
+    return Trade(
+        src, "EURUSD", side, T0 + timedelta(seconds=sec), price, volume=vol, close_time=close_time
+    )
+
+
+def _pairs(res) -> list[tuple[float, float]]:
+    return sorted((m.backtest.volume, m.live.volume) for m in res.matched)
+
+
+def test_weights_prefer_the_closer_trade_over_all_keys():
+    # Two orders 20s apart; the live fills arrive 18s late. Nearest-time pairing gives
+    # the first fill to the second order, and the second fill is then out of reach.
+    bt = [_t("backtest", 0, 1.1000, vol=1.0), _t("backtest", 20, 1.1050, vol=3.0)]
+    lv = [_t("live", 18, 1.1001, vol=1.0), _t("live", 38, 1.1052, vol=3.0)]
+
+    plain = audit_trades(bt, lv, time_tolerance_s=30)
+    assert _pairs(plain) == [(3.0, 1.0)] and len(plain.extra_in_live) == 1
+
+    res = audit_trades(
+        bt, lv, time_tolerance_s=30, price_tolerance=0.01, weights={"price": 1, "volume": 1},
+        max_volume_diff=5.0,
+    )
+    assert _pairs(res) == [(1.0, 1.0), (3.0, 3.0)]
+    assert audit_trades(
+        BacktestIndex(bt), lv, time_tolerance_s=30, price_tolerance=0.01,
+        weights={"price": 1, "volume": 1}, max_volume_diff=5.0,
+    ) == res
+
+
+def test_key_tolerances_gate_and_unknown_values_are_skipped():
+    bt = [_t("backtest", 0, 1.1, vol=1.0, close=600), _t("backtest", 5, 1.1, vol=2.0)]
+    lv = [_t("live", 1, 1.1, vol=2.0, close=900), _t("live", 2, 1.1)]
+
+    res = audit_trades(bt, lv, max_volume_diff=0.5)
+    # The first live trade only fits the 2.0 order; the second has no volume, so any order fits.
+    assert [(m.live.volume, m.backtest.volume) for m in res.matched] == [(2.0, 2.0), (None, 1.0)]
+
+    res = audit_trades(bt, lv, close_tolerance_s=60)
+    # Close times 300s apart: not that pair. A missing close time is no obstacle.
+    assert [(m.live.volume, m.backtest.volume) for m in res.matched] == [(2.0, 2.0), (None, 1.0)]
+
+
+def _times(res) -> list[tuple[datetime, datetime]]:
+    return sorted((m.backtest.open_time, m.live.open_time) for m in res.matched)
+
+
+def test_time_only_weights_equal_greedy_matcher():
+    rng = random.Random(5)
+    for _ in range(50):
+        bt = [_t("backtest", rng.randrange(600), rng.choice([1.1, 1.2])) for _ in range(20)]
+        lv = [_t("live", rng.randrange(600), rng.choice([1.1, 1.2])) for _ in range(20)]
+        plain = audit_trades(bt, lv, time_tolerance_s=30, price_tolerance=0.05)
+        # A far away close tolerance forces the weighted kernel without changing anything.
+        weighted = audit_trades(
+            bt, lv, time_tolerance_s=30, price_tolerance=0.05, close_tolerance_s=1e9
+        )
+        assert _times(weighted) == _times(plain)
+        assert len(weighted.missing_in_live) == len(plain.missing_in_live)
+
+
+def test_weight_validation():
+    assert parse_weights("time=1, price=0.5,") == {"time": 1.0, "price": 0.5}
+    for bad in ("price", "price=x", "price=-1"):
+        with pytest.raises(ValueError, match="invalid weight"):
+            parse_weights(bad)
+    bt = [_t("backtest", 0, 1.1)]
+    with pytest.raises(ValueError, match="unknown match keys"):
+        audit_trades(bt, bt, weights={"sl": 1})
+    with pytest.raises(ValueError, match="needs a volume tolerance"):
+        audit_trades(bt, bt, weights={"volume": 1})
+    with pytest.raises(ValueError, match="partial_fills"):
+        audit_trades(bt, bt, max_volume_diff=1.0, partial_fills=True)
+
+
+def test_cli_weights(tmp_path: Path, capsys):
+    bt = tmp_path / "bt.csv"
+    lv = tmp_path / "lv.csv"
+    bt.write_text(
+        "symbol,side,open_time,open_price,volume\n"
+        "EURUSD,BUY,2026-01-01T10:00:00Z,1.1000,1.0\n"
+        "EURUSD,BUY,2026-01-01T10:00:20Z,1.1050,3.0\n",
+        encoding="utf-8",
+    )
+    lv.write_text(
+        "symbol,side,open_time,open_price,volume\n"
+        "EURUSD,BUY,2026-01-01T10:00:18Z,1.1001,1.0\n"
+        "EURUSD,BUY,2026-01-01T10:00:38Z,1.1052,3.0\n",
+        encoding="utf-8",
+    )
+    argv = ["audit", "--backtest", str(bt), "--live", str(lv), "--tolerance", "30"]
+    assert main([*argv, "--max-volume-diff", "0.5"]) == 0
+    text = capsys.readouterr().out
+    assert "matched=2 " in text and "price_diff=+0.000100" in text
+
+    assert main([*argv, "--weights", "volume=1"]) == 2
+    assert "needs a volume tolerance" in capsys.readouterr().out
+    assert main([*argv, "--max-volume-diff", "1", "--partial-fills"]) == 2
+    assert "does not apply with --partial-fills" in capsys.readouterr().out